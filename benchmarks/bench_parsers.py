@@ -0,0 +1,64 @@
+"""Micro-benchmark of the HTML parser backends on saved AustLII fixtures.
+
+    python benchmarks/bench_parsers.py [--repeat N] [--scale N]
+
+``--scale`` repeats the body of ``.the-document`` to approximate the
+multi-megabyte fallback pages of the largest consolidated acts.
+"""
+
+from __future__ import annotations
+
+import argparse
+import sys
+import timeit
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from legalbot.parsers import BACKENDS  # noqa: E402
+
+FIXTURES = Path(__file__).resolve().parent / "fixtures"
+SECTION_START, SECTION_END = "<!-- section -->", "<!-- /section -->"
+
+
+def scaled_document(scale: int) -> str:
+    html = (FIXTURES / "document.html").read_text(encoding="utf-8")
+    head, rest = html.split(SECTION_START, 1)
+    section, tail = rest.split(SECTION_END, 1)
+    return head + section * scale + tail
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--repeat", type=int, default=200)
+    parser.add_argument("--scale", type=int, default=2000)
+    args = parser.parse_args()
+
+    cases = {
+        ".card a": ("cards", (FIXTURES / "toc.html").read_text(encoding="utf-8"), args.repeat),
+        ".side-download a": (
+            "downloads",
+            (FIXTURES / "legislation.html").read_text(encoding="utf-8"),
+            args.repeat,
+        ),
+        ".the-document": ("document_text", scaled_document(args.scale), max(1, args.repeat // 100)),
+    }
+    backends = {}
+    for name, factory in BACKENDS.items():
+        try:
+            backends[name] = factory()
+        except ImportError:
+            print(f"skipping {name}: not installed")
+
+    print(f"{'selector':<20}{'bytes':>12}" + "".join(f"{name:>14}" for name in backends))
+    for selector, (method, html, number) in cases.items():
+        row = f"{selector:<20}{len(html.encode()):>12}"
+        for backend in backends.values():
+            fn = getattr(backend, method)
+            seconds = min(timeit.repeat(lambda: fn(html), number=number, repeat=3)) / number
+            row += f"{seconds * 1e3:>12.3f}ms"
+        print(row)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,233 @@
+"""End-to-end scrape benchmark against the local mock AustLII server.
+
+    python benchmarks/bench_scrape.py [--sizes 1000 10000 50000] [--output results.json]
+
+For each corpus size a fresh mock server and a fresh scraper process are
+started, so peak RSS and CPU belong to the scraper alone.  Reports docs/s,
+bytes/s, p50/p95/p99 request latency per stage (index, page, download) and
+peak RSS as JSON for regression tracking.
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import platform
+import resource
+import subprocess
+import sys
+import time
+from collections import defaultdict
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import AsyncIterator, Callable
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+import httpx  # noqa: E402
+import numpy as np  # noqa: E402
+
+from legalbot.http import make_client  # noqa: E402
+from legalbot.pipeline import PipelineConfig, ScrapePipeline  # noqa: E402
+
+
+def classify(url: httpx.URL) -> str:
+    path = url.path
+    if "/viewtoc/" in path:
+        return "index"
+    return "page" if path.endswith("/") else "download"
+
+
+class _TimedStream(httpx.AsyncByteStream):
+    def __init__(self, inner: httpx.AsyncByteStream, done: Callable[[int], None]) -> None:
+        self._inner = inner
+        self._done = done
+        self._bytes = 0
+        self._closed = False
+
+    async def __aiter__(self) -> AsyncIterator[bytes]:
+        async for chunk in self._inner:
+            self._bytes += len(chunk)
+            yield chunk
+
+    async def aclose(self) -> None:
+        await self._inner.aclose()
+        if not self._closed:
+            self._closed = True
+            self._done(self._bytes)
+
+
+class TimingTransport(httpx.AsyncBaseTransport):
+    """Record time from request start until the body is closed, by stage."""
+
+    def __init__(self, inner: httpx.AsyncBaseTransport) -> None:
+        self._inner = inner
+        self.latency: dict[str, list[float]] = defaultdict(list)
+        self.bytes = 0
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        start = time.perf_counter()
+        response = await self._inner.handle_async_request(request)
+        stage = classify(request.url)
+
+        def done(nbytes: int) -> None:
+            self.latency[stage].append(time.perf_counter() - start)
+            self.bytes += nbytes
+
+        response.stream = _TimedStream(response.stream, done)
+        return response
+
+    async def aclose(self) -> None:
+        await self._inner.aclose()
+
+
+def percentiles(samples: list[float]) -> dict[str, float]:
+    if not samples:
+        return {"count": 0}
+    p50, p95, p99 = np.percentile(np.asarray(samples), [50, 95, 99])
+    return {
+        "count": len(samples),
+        "p50_ms": round(p50 * 1e3, 3),
+        "p95_ms": round(p95 * 1e3, 3),
+        "p99_ms": round(p99 * 1e3, 3),
+    }
+
+
+async def _scrape(base_url: str, config: PipelineConfig) -> dict:
+    transport = TimingTransport(
+        httpx.AsyncHTTPTransport(
+            limits=httpx.Limits(
+                max_connections=config.per_host, max_keepalive_connections=config.per_host
+            )
+        )
+    )
+    client = make_client(transport=transport)
+    records = content_bytes = 0
+    start = time.perf_counter()
+    try:
+        async for record in ScrapePipeline(config, client=client).run():
+            records += 1
+            content_bytes += len(record.Content)
+    finally:
+        await client.aclose()
+    elapsed = time.perf_counter() - start
+    return {
+        "records": records,
+        "seconds": round(elapsed, 3),
+        "docs_per_sec": round(records / elapsed, 2),
+        "bytes": transport.bytes,
+        "bytes_per_sec": round(transport.bytes / elapsed),
+        "content_bytes": content_bytes,
+        "latency": {stage: percentiles(s) for stage, s in sorted(transport.latency.items())},
+        # ru_maxrss is KiB on Linux, bytes on macOS.
+        "peak_rss_mb": round(
+            resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+            / (1024 * 1024 if sys.platform == "darwin" else 1024),
+            1,
+        ),
+    }
+
+
+def run_one(args: argparse.Namespace) -> None:
+    config = PipelineConfig(
+        page_workers=args.page_workers,
+        download_workers=args.download_workers,
+        queue_size=args.queue_size,
+        per_host=args.per_host,
+        base_url=args.base_url,
+        format_policy=args.format_policy,
+    )
+    print(json.dumps(asyncio.run(_scrape(args.base_url, config))))
+
+
+def _start_server(args: argparse.Namespace, docs: int) -> tuple[subprocess.Popen, int, str]:
+    command = [
+        sys.executable, "-m", "legalbot.mock_server",
+        "--port", "0",
+        "--docs", str(docs),
+        "--latency", str(args.latency),
+        "--max-size", str(args.max_size),
+        "--error-rate", str(args.error_rate),
+    ]
+    server = subprocess.Popen(command, cwd=ROOT, stdout=subprocess.PIPE, text=True)
+    assert server.stdout is not None
+    # "serving <n> documents at <url>"; n is docs rounded up to whole toc pages.
+    words = server.stdout.readline().split()
+    return server, int(words[1]), words[-1]
+
+
+def run_suite(args: argparse.Namespace) -> dict:
+    results = []
+    for docs in args.sizes:
+        server, corpus_size, base_url = _start_server(args, docs)
+        try:
+            command = [
+                sys.executable, __file__, "--run-one",
+                "--base-url", base_url,
+                "--per-host", str(args.per_host),
+                "--page-workers", str(args.page_workers),
+                "--download-workers", str(args.download_workers),
+                "--queue-size", str(args.queue_size),
+                "--format-policy", args.format_policy,
+            ]
+            output = subprocess.run(command, check=True, capture_output=True, text=True).stdout
+        finally:
+            server.terminate()
+            server.wait()
+        result = {"docs": docs, "corpus_size": corpus_size, **json.loads(output)}
+        print(
+            f"{docs:>7} docs  {result['docs_per_sec']:>9.1f} docs/s  "
+            f"{result['bytes_per_sec'] / 1e6:>8.2f} MB/s  peak {result['peak_rss_mb']} MB",
+            file=sys.stderr,
+        )
+        results.append(result)
+    try:
+        revision = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=ROOT, capture_output=True, text=True
+        ).stdout.strip()
+    except OSError:
+        revision = ""
+    return {
+        "timestamp": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "git_revision": revision,
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "settings": {
+            key: value
+            for key, value in vars(args).items()
+            if key not in {"output", "run_one", "base_url"}
+        },
+        "results": results,
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 10000, 50000])
+    parser.add_argument("--output", help="write the JSON report here (default: stdout)")
+    parser.add_argument("--per-host", type=int, default=32)
+    parser.add_argument("--page-workers", type=int, default=16)
+    parser.add_argument("--download-workers", type=int, default=16)
+    parser.add_argument("--queue-size", type=int, default=64)
+    parser.add_argument("--format-policy", default="prefer-text")
+    parser.add_argument("--latency", type=float, default=0.005, help="mock server latency (s)")
+    parser.add_argument("--max-size", type=int, default=256 * 1024, help="largest mock document")
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--run-one", action="store_true", help=argparse.SUPPRESS)
+    parser.add_argument("--base-url", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.run_one:
+        run_one(args)
+        return
+    report = json.dumps(run_suite(args), indent=2)
+    if args.output:
+        Path(args.output).write_text(report + "\n", encoding="utf-8")
+    else:
+        print(report)
+
+
+if __name__ == "__main__":
+    main()
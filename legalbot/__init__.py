@@ -0,0 +1,3 @@
+"""AustLII consolidated legislation scraper and processing pipeline."""
+
+__version__ = "0.1.0"
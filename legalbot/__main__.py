@@ -0,0 +1,553 @@
+"""Command line entry point: ``python -m legalbot``."""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import logging
+import os
+import sys
+from dataclasses import asdict
+
+from .cache import HttpCache
+from .config import BASE_URL, index_pages
+from .crawler import crawl_index
+from .formats import POLICIES
+from .frontier import Frontier
+from .http import make_client
+from .incremental import IncrementalPipeline, iter_contents, iter_dataset, load_dataset
+from .metrics import dump_metrics, serve_metrics
+from .models import LegislationRecord
+from .parsers import BACKENDS, use_backend
+from .pipeline import PipelineConfig, ScrapePipeline, scrape
+from .retry import DeadLetterQueue
+from .scheduler import DownloadOrder
+from .sizes import size_bytes
+
+
+logger = logging.getLogger("legalbot")
+
+
+async def _run_index(args: argparse.Namespace) -> None:
+    pages = index_pages(args.jurisdiction, args.type, args.page, base_url=args.base_url)
+    client = make_client(max_connections=args.per_host, http2=args.http2)
+    try:
+        async for link in crawl_index(
+            pages, client=client, per_host=args.per_host, base_url=args.base_url
+        ):
+            sys.stdout.write(json.dumps(asdict(link)) + "\n")
+    finally:
+        await client.aclose()
+
+
+class _JsonLinesOut:
+    """Records as JSONL on stdout or in a file; ``append`` resumes an existing file."""
+
+    def __init__(self, path: "str | None", append: bool = False) -> None:
+        if path and append and os.path.exists(path):
+            _trim_partial_line(path)
+        mode = "a" if append else "w"
+        self._fh = open(path, mode, encoding="utf-8") if path else sys.stdout
+
+    def write(self, record: LegislationRecord) -> None:
+        self._fh.write(json.dumps(record.to_dict(), ensure_ascii=False) + "\n")
+
+    def close(self) -> None:
+        if self._fh is not sys.stdout:
+            self._fh.close()
+
+
+def _trim_partial_line(path: str, block: int = 64 * 1024) -> None:
+    """Cut off a final line left unfinished by an interrupted run."""
+    with open(path, "rb+") as fh:
+        end = fh.seek(0, os.SEEK_END)
+        while end > 0:
+            start = max(0, end - block)
+            fh.seek(start)
+            newline = fh.read(end - start).rfind(b"\n")
+            if newline >= 0:
+                fh.truncate(start + newline + 1)
+                return
+            end = start
+        fh.truncate(0)
+
+
+def _jsonl_urls(path: str) -> set[str]:
+    with open(path, encoding="utf-8") as fh:
+        return {json.loads(line)["URL"] for line in fh if line.endswith("\n") and line.strip()}
+
+
+def _committed_urls(args: argparse.Namespace) -> set[str]:
+    """URLs already in the output named by ``args``, for a resumed run."""
+    if args.jsonl_dir:
+        from .storage.jsonl import committed_urls
+
+        return committed_urls(args.jsonl_dir)
+    if args.parquet:
+        from .storage.parquet import committed_urls
+
+        return committed_urls(args.parquet)
+    if args.output and os.path.exists(args.output):
+        return _jsonl_urls(args.output)
+    return set()
+
+
+def _open_sink(args: argparse.Namespace, append: bool = False):
+    if args.jsonl_dir:
+        from .storage.jsonl import ShardedJsonlWriter
+
+        return ShardedJsonlWriter(args.jsonl_dir, checkpoint_every=args.checkpoint_every)
+    if args.parquet:
+        from .storage.parquet import ParquetWriter
+
+        return ParquetWriter(args.parquet)
+    return _JsonLinesOut(args.output, append)
+
+
+async def _run_scrape(args: argparse.Namespace) -> None:
+    pages = index_pages(args.jurisdiction, args.type, args.page, base_url=args.base_url)
+    config = PipelineConfig(
+        page_workers=args.page_workers,
+        download_workers=args.download_workers,
+        queue_size=args.queue_size,
+        per_host=args.per_host,
+        adaptive=args.adaptive,
+        max_per_host=args.max_per_host,
+        respect_robots=args.respect_robots,
+        http2=args.http2,
+        inline_content=args.keep_content or not args.blob_dir,
+        base_url=args.base_url,
+        download_order=DownloadOrder(args.download_order),
+        byte_rate=args.byte_rate,
+        format_policy=args.format_policy,
+    )
+    cache = HttpCache(args.cache_dir) if args.cache_dir else None
+    frontier = Frontier(args.frontier) if args.frontier else None
+    dead_letters = DeadLetterQueue(args.dead_letters) if args.dead_letters else None
+    blobs = None
+    if args.blob_dir:
+        from .blobs import BlobStore
+
+        blobs = BlobStore(args.blob_dir)
+    skip_urls = None
+    # A frontier skips documents it has marked done, so a resumed run must
+    # keep, not replace, the output those documents went to.
+    resume = bool(args.jsonl_dir) or frontier is not None
+    if resume:
+        skip_urls = _committed_urls(args)
+        if skip_urls:
+            logger.info("resuming: %d records already committed", len(skip_urls))
+        if frontier is not None:
+            frontier.requeue_uncommitted(skip_urls)
+    sink = _open_sink(args, append=resume)
+    background = []
+    if args.metrics_port is not None:
+        server = await serve_metrics(args.metrics_port)
+        logger.info("serving metrics on port %d", args.metrics_port)
+        background.append(asyncio.create_task(server.serve_forever()))
+    if args.metrics_file:
+        background.append(
+            asyncio.create_task(dump_metrics(args.metrics_file, args.metrics_interval))
+        )
+    if args.incremental:
+        pages = list(pages)
+        pipeline = IncrementalPipeline(
+            load_dataset(args.incremental),
+            config,
+            cache=cache,
+            skip_urls=skip_urls,
+            frontier=frontier,
+            dead_letters=dead_letters,
+            blobs=blobs,
+        )
+        records = pipeline.run(pages)
+    else:
+        records = scrape(pages, config, cache, skip_urls, frontier, dead_letters, blobs)
+    try:
+        async for record in records:
+            sink.write(record)
+    finally:
+        sink.close()
+        if frontier is not None:
+            frontier.close()
+        for task in background:
+            task.cancel()
+        await asyncio.gather(*background, return_exceptions=True)
+    if dead_letters is not None and dead_letters.added:
+        logger.warning("%d failed items written to %s", dead_letters.added, args.dead_letters)
+    if args.incremental:
+        report = json.dumps(pipeline.finish(pages).to_dict(), indent=2)
+        if args.report:
+            with open(args.report, "w", encoding="utf-8") as fh:
+                fh.write(report + "\n")
+        else:
+            sys.stderr.write(report + "\n")
+
+
+async def _run_replay(args: argparse.Namespace) -> None:
+    dead_letters = DeadLetterQueue(args.dead_letters)
+    config = PipelineConfig(per_host=args.per_host, http2=args.http2, base_url=args.base_url)
+    pipeline = ScrapePipeline(config, dead_letters=dead_letters)
+    sink = _open_sink(args)
+    try:
+        with dead_letters.replay() as letters:
+            logger.info("replaying %d failed items", len(letters))
+            async for record in pipeline.replay(letters):
+                sink.write(record)
+    finally:
+        sink.close()
+    if dead_letters.added:
+        logger.warning("%d items failed again", dead_letters.added)
+
+
+async def _run_dedup(args: argparse.Namespace) -> None:
+    from .dedup import deduplicate
+
+    stats = deduplicate(iter_contents(args.source, args.blob_dir), args.dest, args.near)
+    sys.stderr.write(json.dumps(stats.to_dict(), indent=2) + "\n")
+
+
+async def _run_reextract(args: argparse.Namespace) -> None:
+    from .blobs import BlobStore, reextract
+
+    sink = _open_sink(args)
+    try:
+        for record in reextract(iter_dataset(args.dataset), BlobStore(args.blob_dir)):
+            sink.write(record)
+    finally:
+        sink.close()
+
+
+async def _run_chunk(args: argparse.Namespace) -> None:
+    from .chunking import approx_tokens, chunk_records
+
+    tokenizer = cache = None
+    if args.tokenizer:
+        from .tokenizer import CachedTokenizer, TokenCache, get_tokenizer
+
+        tokenizer = get_tokenizer(args.tokenizer)
+        if args.token_cache:
+            cache = TokenCache(args.token_cache)
+            tokenizer = CachedTokenizer(tokenizer, cache)
+    out = open(args.output, "w", encoding="utf-8") if args.output else sys.stdout
+    try:
+        chunks = chunk_records(
+            iter_contents(args.dataset, args.blob_dir), args.max_tokens, approx_tokens, tokenizer
+        )
+        for chunk in chunks:
+            out.write(json.dumps(asdict(chunk), ensure_ascii=False) + "\n")
+    finally:
+        if out is not sys.stdout:
+            out.close()
+        if cache is not None:
+            logger.info("token cache: %d hits, %d misses", cache.hits, cache.misses)
+            cache.close()
+
+
+async def _run_tokens(args: argparse.Namespace) -> None:
+    from .tokens import TokenCounter
+
+    counter = TokenCounter(args.encoding, args.processes, args.threads, args.batch_size)
+    out = open(args.output, "w", encoding="utf-8") if args.output else sys.stdout
+    try:
+        for record, tokens in counter.count(iter_contents(args.dataset, args.blob_dir)):
+            row = {
+                "URL": record.URL,
+                "JurisdictionAbb": record.JurisdictionAbb,
+                "Type": record.Type,
+                "ContentHash": record.ContentHash,
+                "TokenCount": tokens,
+            }
+            out.write(json.dumps(row, ensure_ascii=False) + "\n")
+    finally:
+        if out is not sys.stdout:
+            out.close()
+    report = json.dumps(counter.report(), indent=2)
+    if args.histograms:
+        with open(args.histograms, "w", encoding="utf-8") as fh:
+            fh.write(report + "\n")
+    else:
+        sys.stderr.write(report + "\n")
+    logger.info("counted %d distinct texts, reused %d counts", counter.counted, counter.reused)
+
+
+async def _run_embed(args: argparse.Namespace) -> None:
+    from .embedding import Embedder, EmbeddingCache, EmbeddingConfig, embed_chunks
+
+    config = EmbeddingConfig(
+        model=args.model,
+        revision=args.revision,
+        max_length=args.max_length,
+        token_budget=args.token_budget,
+        window=args.window,
+        threads=args.threads,
+        dtype=args.dtype,
+        pooling=args.pooling,
+    )
+    cache = None
+    if args.cache:
+        cache = EmbeddingCache(args.cache, args.cache_size)
+    try:
+        embedder = embed_chunks(args.chunks, args.dest, Embedder(config, cache))
+    finally:
+        if cache is not None:
+            cache.close()
+    logger.info(
+        "%d batches, %.1f%% of model input was padding",
+        embedder.batches,
+        100 * embedder.padding_ratio,
+    )
+    if cache is not None:
+        logger.info(
+            "embedding cache: %d hits, %d misses, %d evicted",
+            cache.hits,
+            cache.misses,
+            cache.evicted,
+        )
+
+
+async def _run_frontier(args: argparse.Namespace) -> None:
+    frontier = Frontier(args.db)
+    try:
+        for (stage, status), count in sorted(frontier.stats().items()):
+            sys.stdout.write(f"{stage:<10}{status:<10}{count:>8}\n")
+    finally:
+        frontier.close()
+
+
+def _byte_size(value: str) -> int:
+    size = size_bytes(value if value[-1:].upper() == "B" else value + "B")
+    if size <= 0:
+        raise argparse.ArgumentTypeError(f"invalid size: {value!r}")
+    return int(size)
+
+
+def _byte_rate(value: str) -> float:
+    rate = size_bytes(value if value[-1:].upper() == "B" else value + "B")
+    if rate <= 0:
+        raise argparse.ArgumentTypeError(f"invalid byte rate: {value!r}")
+    return rate
+
+
+def _add_selection_args(parser: argparse.ArgumentParser) -> None:
+    parser.add_argument("--jurisdiction", action="append", help="e.g. CTH; repeatable")
+    parser.add_argument("--type", action="append", choices=["act", "reg"])
+    parser.add_argument("--page", action="append", help="toc letter; repeatable")
+
+
+def _add_blob_dir_arg(parser: argparse.ArgumentParser) -> None:
+    parser.add_argument(
+        "--blob-dir", help="blob store to read Content from for records scraped without it"
+    )
+
+
+def _add_output_args(parser: argparse.ArgumentParser) -> None:
+    output = parser.add_mutually_exclusive_group()
+    output.add_argument("-o", "--output", help="JSONL output path (default: stdout)")
+    output.add_argument("--parquet", metavar="DIR", help="write a partitioned Parquet dataset")
+    output.add_argument(
+        "--jsonl-dir",
+        metavar="DIR",
+        help="append to sharded, checkpointed JSONL; resumes after an interrupted run",
+    )
+    parser.add_argument(
+        "--checkpoint-every", type=int, default=100, help="records per fsync'd commit"
+    )
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(prog="legalbot")
+    parser.add_argument("--base-url", default=BASE_URL)
+    parser.add_argument(
+        "--per-host",
+        type=int,
+        default=8,
+        help="concurrent requests per host (the starting point when adaptive)",
+    )
+    parser.add_argument("--parser", choices=sorted(BACKENDS), help="HTML parser backend")
+    parser.add_argument(
+        "--http2",
+        action=argparse.BooleanOptionalAction,
+        default=True,
+        help="multiplex requests over HTTP/2 when the server offers it",
+    )
+    parser.add_argument("-v", "--verbose", action="store_true")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    index = commands.add_parser("index", help="crawl toc pages, printing .card a links as JSONL")
+    _add_selection_args(index)
+    index.set_defaults(func=_run_index)
+
+    run = commands.add_parser("scrape", help="run the full index -> page -> download pipeline")
+    _add_selection_args(run)
+    _add_output_args(run)
+    run.add_argument("--page-workers", type=int, default=8)
+    run.add_argument("--download-workers", type=int, default=8)
+    run.add_argument("--queue-size", type=int, default=64, help="bound on each inter-stage queue")
+    run.add_argument(
+        "--fixed-rate",
+        dest="adaptive",
+        action="store_false",
+        help="keep --per-host fixed instead of adapting it to the host's responses",
+    )
+    run.add_argument(
+        "--max-per-host", type=int, default=32, help="ceiling for adaptive per-host concurrency"
+    )
+    run.add_argument(
+        "--ignore-robots",
+        dest="respect_robots",
+        action="store_false",
+        help="do not apply the robots.txt Crawl-delay",
+    )
+    run.add_argument(
+        "--download-order",
+        choices=[order.value for order in DownloadOrder],
+        default=DownloadOrder.FIFO.value,
+        help="order queued downloads by advertised size",
+    )
+    run.add_argument(
+        "--byte-rate",
+        type=_byte_rate,
+        help="download budget per second, e.g. 2MB (default: unlimited)",
+    )
+    run.add_argument(
+        "--format-policy",
+        choices=sorted(POLICIES),
+        default="prefer-text",
+        help="how to pick between Text/RTF downloads and .the-document",
+    )
+    run.add_argument("--cache-dir", help="revalidate pages and downloads against this HTTP cache")
+    run.add_argument(
+        "--incremental",
+        metavar="DATASET",
+        help="only download documents whose version changed since this dataset",
+    )
+    run.add_argument("--report", help="write the incremental change report here (default: stderr)")
+    run.add_argument("--frontier", metavar="DB", help="SQLite crawl frontier to resume and update")
+    run.add_argument(
+        "--blob-dir",
+        metavar="DIR",
+        help="keep fetched bodies in this content-addressed store; records refer to them by hash",
+    )
+    run.add_argument(
+        "--keep-content", action="store_true", help="with --blob-dir, still write Content inline"
+    )
+    run.add_argument(
+        "--dead-letters",
+        metavar="FILE",
+        help="append work that runs out of retries here, for the replay command",
+    )
+    run.add_argument(
+        "--metrics-port", type=int, help="serve Prometheus metrics on localhost:PORT/metrics"
+    )
+    run.add_argument("--metrics-file", help="periodically write Prometheus metrics to this file")
+    run.add_argument(
+        "--metrics-interval", type=float, default=30.0, help="seconds between metrics file writes"
+    )
+    run.set_defaults(func=_run_scrape)
+
+    replay = commands.add_parser("replay", help="retry the work recorded in a dead-letter file")
+    replay.add_argument("dead_letters", metavar="FILE")
+    _add_output_args(replay)
+    replay.set_defaults(func=_run_replay)
+
+    dedup = commands.add_parser(
+        "dedup", help="store each distinct document text once, referenced by ContentHash"
+    )
+    dedup.add_argument("source", help="JSONL file, or sharded JSONL or Parquet directory")
+    dedup.add_argument("dest", help="directory for records/ and texts.parquet")
+    dedup.add_argument(
+        "--near",
+        type=float,
+        metavar="JACCARD",
+        help="also fold texts at least this similar (MinHash estimate, e.g. 0.9) onto the first",
+    )
+    _add_blob_dir_arg(dedup)
+    dedup.set_defaults(func=_run_dedup)
+
+    reextract = commands.add_parser(
+        "reextract", help="rebuild Content from the bodies in a blob store, without fetching"
+    )
+    reextract.add_argument("dataset", help="JSONL file, or sharded JSONL or Parquet directory")
+    reextract.add_argument("blob_dir")
+    _add_output_args(reextract)
+    reextract.set_defaults(func=_run_reextract)
+
+    chunk = commands.add_parser(
+        "chunk", help="split Content into token-bounded chunks along Part/Division/section lines"
+    )
+    chunk.add_argument("dataset", help="JSONL file, or sharded JSONL or Parquet directory")
+    chunk.add_argument("-o", "--output", help="JSONL output path (default: stdout)")
+    chunk.add_argument("--max-tokens", type=int, default=512)
+    chunk.add_argument(
+        "--tokenizer",
+        metavar="SPEC",
+        help="count with tiktoken:NAME, sentencepiece:MODEL or hf:MODEL[@REV] "
+        "(default: approximate)",
+    )
+    chunk.add_argument(
+        "--token-cache", metavar="DB", help="SQLite cache of encodings by text hash"
+    )
+    _add_blob_dir_arg(chunk)
+    chunk.set_defaults(func=_run_chunk)
+
+    tokens = commands.add_parser(
+        "tokens", help="count tiktoken tokens of every Content, with per-jurisdiction histograms"
+    )
+    tokens.add_argument("dataset", help="JSONL file, or sharded JSONL or Parquet directory")
+    tokens.add_argument("-o", "--output", help="JSONL output path (default: stdout)")
+    tokens.add_argument(
+        "--histograms", metavar="FILE", help="JSON histogram path (default: stderr)"
+    )
+    tokens.add_argument("--encoding", default="cl100k_base", help="tiktoken encoding name")
+    tokens.add_argument("--processes", type=int, help="worker processes (default: CPU count)")
+    tokens.add_argument("--threads", type=int, default=4, help="encoder threads per process")
+    tokens.add_argument("--batch-size", type=int, default=64, help="texts per encode_batch call")
+    _add_blob_dir_arg(tokens)
+    tokens.set_defaults(func=_run_tokens)
+
+    embed = commands.add_parser(
+        "embed", help="embed the chunks from `chunk` into a NumPy memmap, on CPU"
+    )
+    embed.add_argument("chunks", help="JSONL file written by the chunk command")
+    embed.add_argument("dest", help="directory for embeddings.npy and embeddings.json")
+    embed.add_argument("--model", default="BAAI/bge-small-en-v1.5")
+    embed.add_argument("--revision", help="model revision (branch, tag or commit)")
+    embed.add_argument("--max-length", type=int, default=512, help="truncate chunks to this")
+    embed.add_argument(
+        "--token-budget", type=int, default=16384, help="padded tokens per forward pass"
+    )
+    embed.add_argument("--window", type=int, default=4096, help="chunks length-sorted together")
+    embed.add_argument("--threads", type=int, help="torch intra-op threads")
+    embed.add_argument("--dtype", choices=["float16", "float32"], default="float16")
+    embed.add_argument("--pooling", choices=["mean", "cls"], default="mean")
+    embed.add_argument("--cache", metavar="DB", help="SQLite cache of vectors by chunk hash")
+    embed.add_argument(
+        "--cache-size",
+        type=_byte_size,
+        metavar="SIZE",
+        help="evict least recently used vectors past this, e.g. 2G",
+    )
+    embed.set_defaults(func=_run_embed)
+
+    status = commands.add_parser("frontier", help="summarise a crawl frontier by stage and status")
+    status.add_argument("db")
+    status.set_defaults(func=_run_frontier)
+    return parser
+
+
+def main(argv: "list[str] | None" = None) -> None:
+    parser = build_parser()
+    args = parser.parse_args(argv)
+    if args.command == "scrape" and args.frontier:
+        if not (args.output or args.parquet or args.jsonl_dir):
+            parser.error("--frontier needs -o, --parquet or --jsonl-dir to resume into")
+    logging.basicConfig(level=logging.INFO if args.verbose else logging.WARNING)
+    if args.parser:
+        use_backend(args.parser)
+    asyncio.run(args.func(args))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,100 @@
+"""Content-addressed, zstd-compressed store of fetched bodies.
+
+Every body that ``Content`` is extracted from (a Text or RTF download, or
+the legislation page for the ``.the-document`` fallback) is stored once
+under the SHA-256 of its bytes, and the record refers to it by
+``BlobHash``.  Bodies are kept as decoded text in UTF-8, so a blob's hash
+does not depend on transfer encoding or the server's charset.  New cleaning
+rules can then be applied with :func:`reextract` without downloading
+anything again::
+
+    root/ab/ab3f...e1.zst
+"""
+
+from __future__ import annotations
+
+import hashlib
+import os
+import threading
+import uuid
+from pathlib import Path
+from typing import Iterable, Iterator
+
+import zstandard
+
+from .formats import EXTRACTORS, HTML_SOURCE
+from .models import LegislationRecord
+from .parsing import extract_document_text
+
+
+class BlobStore:
+    """Blobs under ``root``, compressed at zstd ``level`` and named by their SHA-256."""
+
+    def __init__(self, root: "str | os.PathLike[str]", level: int = 9) -> None:
+        self.root = Path(root)
+        self.level = level
+        self.stored = 0
+        self.reused = 0
+        # zstd contexts are not safe to share between threads.
+        self._local = threading.local()
+
+    def _compressor(self) -> zstandard.ZstdCompressor:
+        if not hasattr(self._local, "compressor"):
+            self._local.compressor = zstandard.ZstdCompressor(level=self.level)
+            self._local.decompressor = zstandard.ZstdDecompressor()
+        return self._local.compressor
+
+    def path(self, digest: str) -> Path:
+        return self.root / digest[:2] / f"{digest}.zst"
+
+    def __contains__(self, digest: str) -> bool:
+        return self.path(digest).exists()
+
+    def put(self, data: bytes) -> str:
+        """Store ``data`` unless already present; return its SHA-256 hex digest."""
+        digest = hashlib.sha256(data).hexdigest()
+        path = self.path(digest)
+        if path.exists():
+            self.reused += 1
+            return digest
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = path.with_name(f"{path.name}.{uuid.uuid4().hex}.tmp")
+        try:
+            tmp.write_bytes(self._compressor().compress(data))
+            os.replace(tmp, path)
+        except BaseException:
+            tmp.unlink(missing_ok=True)
+            raise
+        self.stored += 1
+        return digest
+
+    def put_text(self, text: str) -> str:
+        return self.put(text.encode("utf-8"))
+
+    def get(self, digest: str, verify: bool = False) -> bytes:
+        self._compressor()
+        data = self._local.decompressor.decompress(self.path(digest).read_bytes())
+        if verify and hashlib.sha256(data).hexdigest() != digest:
+            raise ValueError(f"blob {digest} is corrupt")
+        return data
+
+    def get_text(self, digest: str) -> str:
+        return self.get(digest).decode("utf-8")
+
+
+def extract_blob(store: BlobStore, record: LegislationRecord) -> str:
+    """Re-run ``Content`` extraction for ``record`` from its stored body."""
+    body = store.get_text(record.BlobHash)
+    if record.ContentSource == HTML_SOURCE:
+        return extract_document_text(body)
+    return EXTRACTORS[record.ContentSource](body)
+
+
+def reextract(
+    records: Iterable[LegislationRecord], store: BlobStore
+) -> Iterator[LegislationRecord]:
+    """Fill ``Content`` of each record with a blob from its body; others pass through."""
+    for record in records:
+        if record.BlobHash:
+            record.Content = extract_blob(store, record)
+        yield record
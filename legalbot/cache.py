@@ -0,0 +1,131 @@
+"""On-disk HTTP revalidation cache.
+
+Responses carrying an ``ETag`` or ``Last-Modified`` header are stored by URL.
+Later fetches send ``If-None-Match`` / ``If-Modified-Since`` and reuse the
+stored body when the server answers ``304 Not Modified``.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import hashlib
+import json
+import os
+import uuid
+from dataclasses import asdict, dataclass
+from pathlib import Path
+from typing import Optional
+
+import httpx
+
+from .http import HostLimiter
+from .metrics import BYTES_RECEIVED, CACHE_RESPONSES, IN_FLIGHT
+
+
+@dataclass
+class CacheEntry:
+    url: str
+    etag: Optional[str]
+    last_modified: Optional[str]
+    encoding: str
+    body: bytes
+
+    @classmethod
+    def from_response(cls, url: str, response: httpx.Response) -> "CacheEntry":
+        return cls(
+            url=url,
+            etag=response.headers.get("ETag"),
+            last_modified=response.headers.get("Last-Modified"),
+            encoding=response.encoding or "utf-8",
+            body=response.content,
+        )
+
+    @property
+    def revalidatable(self) -> bool:
+        return bool(self.etag or self.last_modified)
+
+    def validators(self) -> dict[str, str]:
+        headers = {}
+        if self.etag:
+            headers["If-None-Match"] = self.etag
+        if self.last_modified:
+            headers["If-Modified-Since"] = self.last_modified
+        return headers
+
+    def text(self) -> str:
+        return self.body.decode(self.encoding, errors="replace")
+
+
+class HttpCache:
+    """Store of :class:`CacheEntry` objects under ``root``, one meta/body pair per URL."""
+
+    def __init__(self, root: "str | os.PathLike[str]") -> None:
+        self.root = Path(root)
+        self.hits = 0
+        self.misses = 0
+
+    def _paths(self, url: str) -> tuple[Path, Path]:
+        key = hashlib.sha256(url.encode("utf-8")).hexdigest()
+        directory = self.root / key[:2]
+        return directory / f"{key}.json", directory / f"{key}.body"
+
+    def load(self, url: str) -> Optional[CacheEntry]:
+        meta_path, body_path = self._paths(url)
+        try:
+            meta = json.loads(meta_path.read_text(encoding="utf-8"))
+            body = body_path.read_bytes()
+        except (OSError, ValueError):
+            return None
+        if meta.get("url") != url:
+            return None
+        return CacheEntry(body=body, **meta)
+
+    def store(self, entry: CacheEntry) -> None:
+        meta_path, body_path = self._paths(entry.url)
+        meta_path.parent.mkdir(parents=True, exist_ok=True)
+        meta = asdict(entry)
+        del meta["body"]
+        # Body first, then metadata, each via rename, so a reader never
+        # pairs new validators with a stale body.
+        _atomic_write(body_path, entry.body)
+        _atomic_write(meta_path, json.dumps(meta).encode("utf-8"))
+
+
+def _atomic_write(path: Path, data: bytes) -> None:
+    # A unique name per write, so concurrent stores of one URL never share a temp file.
+    tmp = path.with_name(f"{path.name}.{uuid.uuid4().hex}.tmp")
+    try:
+        tmp.write_bytes(data)
+        os.replace(tmp, path)
+    except BaseException:
+        tmp.unlink(missing_ok=True)
+        raise
+
+
+async def fetch_cached(
+    client: httpx.AsyncClient,
+    limiter: HostLimiter,
+    cache: HttpCache,
+    url: str,
+    stage: str = "other",
+) -> str:
+    """Conditional GET of ``url``, serving the cached body on ``304``."""
+    entry = await asyncio.to_thread(cache.load, url)
+    headers = entry.validators() if entry else {}
+    async with limiter.slot(url) as permit:
+        with IN_FLIGHT.track(stage=stage):
+            async with client.stream("GET", url, headers=headers) as response:
+                permit.observe(response)
+                await response.aread()
+    BYTES_RECEIVED.inc(len(response.content), stage=stage)
+    if response.status_code == 304 and entry is not None:
+        cache.hits += 1
+        CACHE_RESPONSES.inc(result="hit")
+        return entry.text()
+    response.raise_for_status()
+    cache.misses += 1
+    CACHE_RESPONSES.inc(result="miss")
+    fresh = CacheEntry.from_response(url, response)
+    if fresh.revalidatable:
+        await asyncio.to_thread(cache.store, fresh)
+    return response.text
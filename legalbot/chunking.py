@@ -0,0 +1,285 @@
+"""Split legislation text into token-bounded chunks along its structure.
+
+AustLII plain-text downloads keep the heading hierarchy of an Act on lines
+of their own::
+
+    CHAPTER 2--LIABILITY RULES
+    PART 2-1--ASSESSMENT
+    Division 5--Income years
+    Subdivision A--General
+    5-1 Who must pay income tax
+
+:func:`parse_blocks` cuts the text at those headings into blocks, each with
+the path of headings above it.  :func:`chunk_text` then packs consecutive
+blocks that share a Division (or whatever the lowest structural level is)
+into chunks of at most ``max_tokens``, so a chunk never straddles two
+Divisions and usually holds whole sections.  A section too long for one
+chunk is split at subsection markers or blank lines, then at words.  Sizes
+are approximate token counts unless a :mod:`legalbot.tokenizer` is given.
+
+Headings are recognised heuristically: Chapter/Part/Division/Subdivision/
+Schedule lines need a ``--`` (or dash) before their title unless the keyword
+is in capitals, and a section heading is a short line starting with a
+section number and a capitalised title.
+"""
+
+from __future__ import annotations
+
+import bisect
+import re
+from dataclasses import dataclass, field
+from typing import Callable, Iterable, Iterator, Optional, Sequence
+
+from .models import LegislationRecord
+from .tokenizer import Tokenizer
+
+CHAPTER, PART, DIVISION, SUBDIVISION, SECTION = range(5)
+
+_STRUCTURE_LEVELS = {
+    "chapter": CHAPTER,
+    "schedule": CHAPTER,
+    "part": PART,
+    "division": DIVISION,
+    "subdivision": SUBDIVISION,
+}
+
+_STRUCTURE = re.compile(
+    r"^(?P<keyword>chapter|schedule|part|division|subdivision)\s+"
+    r"(?P<number>[0-9A-Z]+(?:[.-][0-9A-Z]+)*)\s*(?:(?:--|[–—])\s*(?P<title>\S.*))?$",
+    re.IGNORECASE,
+)
+_SECTION = re.compile(
+    r"^(?:SECT(?:ION)?\s+)?(?P<number>\d+[A-Z]{0,3}(?:[-.]\d+[A-Z]{0,3})*)\.?\s+"
+    r"(?P<title>[A-Z][^;]*?(?:[^\s.;,:]|etc\.))$"
+)
+_MAX_HEADING = 120
+
+# Lines that start a new paragraph inside a section: "(1)", "(a)", "(iv)".
+_PARAGRAPH = re.compile(r"^\s*\((?:\d+[A-Z]?|[a-z]{1,4})\)\s")
+
+_TOKEN = re.compile(r"\w+|[^\w\s]")
+
+
+def approx_tokens(text: str) -> int:
+    """Words plus punctuation marks; close to, if a little under, BPE token counts."""
+    return len(_TOKEN.findall(text))
+
+
+def heading_level(line: str) -> Optional[int]:
+    """The structural level of a heading line, or None for body text."""
+    line = line.strip()
+    if not line or len(line) > _MAX_HEADING:
+        return None
+    if match := _STRUCTURE.match(line):
+        keyword = match["keyword"]
+        if match["title"] is None and not keyword.isupper():
+            return None
+        return _STRUCTURE_LEVELS[keyword.lower()]
+    if _SECTION.match(line):
+        return SECTION
+    return None
+
+
+@dataclass
+class Block:
+    """A heading and the text up to the next heading, as offsets into the document."""
+
+    path: tuple[tuple[int, str], ...]
+    start: int
+    end: int
+    tokens: int = 0
+
+    @property
+    def group(self) -> tuple[str, ...]:
+        """The structural headings above this block, excluding its section."""
+        return tuple(heading for level, heading in self.path if level < SECTION)
+
+
+def parse_blocks(text: str) -> list[Block]:
+    """Cut ``text`` at every heading line; text before the first heading is a block too."""
+    blocks: list[Block] = []
+    path: tuple[tuple[int, str], ...] = ()
+    start = offset = 0
+    for line in text.splitlines(keepends=True):
+        level = heading_level(line)
+        if level is not None:
+            if offset > start:
+                blocks.append(Block(path, start, offset))
+            path = tuple(entry for entry in path if entry[0] < level) + ((level, line.strip()),)
+            start = offset
+        offset += len(line)
+    if offset > start:
+        blocks.append(Block(path, start, offset))
+    return blocks
+
+
+@dataclass
+class Chunk:
+    url: str
+    index: int
+    # Headings shared by everything in the chunk, outermost first.
+    path: list[str]
+    # Headings of the sections the chunk includes, in order.
+    sections: list[str]
+    text: str
+    tokens: int
+    start: int
+    end: int
+    metadata: dict = field(default_factory=dict)
+
+
+def _split_block(
+    text: str, block: Block, max_tokens: int, count: Callable[[int, int], int]
+) -> Iterator[Block]:
+    """Split an oversized block at paragraph starts, then at words."""
+    cuts = [block.start]
+    offset = block.start
+    for line in text[block.start : block.end].splitlines(keepends=True):
+        if offset > block.start and (_PARAGRAPH.match(line) or not line.strip()):
+            cuts.append(offset)
+        offset += len(line)
+    cuts.append(block.end)
+    pieces = [Block(block.path, a, b) for a, b in zip(cuts, cuts[1:]) if b > a]
+    for piece in pieces:
+        piece.tokens = count(piece.start, piece.end)
+        if piece.tokens <= max_tokens:
+            yield piece
+            continue
+        start = piece.start
+        tokens = 0
+        for word in re.finditer(r"\S+\s*", text[piece.start : piece.end]):
+            size = count(piece.start + word.start(), piece.start + word.end())
+            if tokens and tokens + size > max_tokens:
+                yield Block(block.path, start, piece.start + word.start(), tokens)
+                start, tokens = piece.start + word.start(), 0
+            tokens += size
+        yield Block(block.path, start, piece.end, tokens)
+
+
+def _common_path(blocks: list[Block]) -> list[str]:
+    path = []
+    for entries in zip(*(block.path for block in blocks)):
+        if any(entry != entries[0] for entry in entries):
+            break
+        path.append(entries[0][1])
+    return path
+
+
+def chunk_text(
+    text: str,
+    url: str = "",
+    max_tokens: int = 512,
+    count: Callable[[str], int] = approx_tokens,
+    token_starts: Optional[Sequence[int]] = None,
+) -> list[Chunk]:
+    """Pack ``text``'s blocks into chunks of at most ``max_tokens`` by ``count``.
+
+    Given the sorted character offsets at which ``text``'s tokens start, as
+    from a :class:`~legalbot.tokenizer.Tokenizer`, spans are counted from
+    those instead and ``count`` is not called.
+    """
+
+    def span_tokens(start: int, end: int) -> int:
+        if token_starts is None:
+            return count(text[start:end])
+        return bisect.bisect_left(token_starts, end) - bisect.bisect_left(token_starts, start)
+
+    pieces: list[Block] = []
+    for block in parse_blocks(text):
+        block.tokens = span_tokens(block.start, block.end)
+        if block.tokens <= max_tokens:
+            pieces.append(block)
+        else:
+            pieces.extend(_split_block(text, block, max_tokens, span_tokens))
+    # A Part or Division heading followed directly by a deeper heading
+    # belongs with what follows it, not in a chunk of its own.
+    merged: list[Block] = []
+    carried: Optional[int] = None
+    for index, piece in enumerate(pieces):
+        level, heading = piece.path[-1] if piece.path else (SECTION, "")
+        if level < SECTION and index + 1 < len(pieces):
+            if text[piece.start : piece.end].strip() == heading:
+                carried = piece.start if carried is None else carried
+                continue
+        if carried is not None:
+            piece = Block(piece.path, carried, piece.end)
+            piece.tokens = span_tokens(piece.start, piece.end)
+            carried = None
+            if piece.tokens > max_tokens:
+                merged.extend(_split_block(text, piece, max_tokens, span_tokens))
+                continue
+        merged.append(piece)
+    pieces = merged
+
+    chunks: list[Chunk] = []
+    current: list[Block] = []
+    tokens = 0
+
+    def flush() -> None:
+        start, end = current[0].start, current[-1].end
+        sections = []
+        for block in current:
+            heading = block.path[-1][1] if block.path and block.path[-1][0] == SECTION else None
+            if heading and (not sections or sections[-1] != heading):
+                sections.append(heading)
+        path = _common_path(current)
+        chunks.append(
+            Chunk(url, len(chunks), path, sections, text[start:end], tokens, start, end)
+        )
+
+    for piece in pieces:
+        if current and (tokens + piece.tokens > max_tokens or piece.group != current[0].group):
+            flush()
+            current, tokens = [], 0
+        current.append(piece)
+        tokens += piece.tokens
+    if current:
+        flush()
+    return chunks
+
+
+def chunk_records(
+    records: Iterable[LegislationRecord],
+    max_tokens: int = 512,
+    count: Callable[[str], int] = approx_tokens,
+    tokenizer: Optional[Tokenizer] = None,
+    batch_size: int = 16,
+) -> Iterator[Chunk]:
+    """Chunk the ``Content`` of each record, tagging chunks with the record's metadata.
+
+    With a ``tokenizer``, documents are encoded ``batch_size`` at a time and
+    chunk sizes are its token counts.
+    """
+    batch: list[LegislationRecord] = []
+    for record in records:
+        if not record.Content:
+            continue
+        batch.append(record)
+        if tokenizer is None or len(batch) >= batch_size:
+            yield from _chunk_batch(batch, max_tokens, count, tokenizer)
+            batch = []
+    if batch:
+        yield from _chunk_batch(batch, max_tokens, count, tokenizer)
+
+
+def _chunk_batch(
+    records: list[LegislationRecord],
+    max_tokens: int,
+    count: Callable[[str], int],
+    tokenizer: Optional[Tokenizer],
+) -> Iterator[Chunk]:
+    if tokenizer is None:
+        starts: list[Optional[list[int]]] = [None] * len(records)
+    else:
+        starts = [enc.starts for enc in tokenizer.encode_batch([r.Content for r in records])]
+    for record, token_starts in zip(records, starts):
+        metadata = {
+            "Title": record.Title,
+            "JurisdictionAbb": record.JurisdictionAbb,
+            "Type": record.Type,
+            "Date": record.Date,
+            "ContentHash": record.ContentHash,
+        }
+        for chunk in chunk_text(record.Content, record.URL, max_tokens, count, token_starts):
+            chunk.metadata = metadata
+            yield chunk
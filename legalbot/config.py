@@ -0,0 +1,56 @@
+"""Static configuration derived from planning.md."""
+
+from __future__ import annotations
+
+import string
+from typing import Iterator, NamedTuple
+
+BASE_URL = "https://www.austlii.edu.au"
+
+INDEX_URL_TEMPLATE = (
+    BASE_URL + "/cgi-bin/viewtoc/au/legis/{jurisdiction_abb}/consol_{type}/toc-{page}.html"
+)
+
+JURISDICTIONS: dict[str, str] = {
+    "CTH": "Commonwealth of Australia",
+    "ACT": "Australian Capital Territory",
+    "NSW": "New South Wales",
+    "NT": "Northern Territory",
+    "QLD": "Queensland",
+    "SA": "South Australia",
+    "TAS": "Tasmania",
+    "VIC": "Victoria",
+    "WA": "Western Australia",
+}
+
+# consol_{type} path segment -> dataset ``Type`` value.
+LEGISLATION_TYPES: dict[str, str] = {
+    "act": "Primary",
+    "reg": "Secondary",
+}
+
+PAGES: tuple[str, ...] = tuple(string.ascii_uppercase)
+
+
+class IndexPage(NamedTuple):
+    """One ``toc-{page}.html`` index page."""
+
+    jurisdiction_abb: str
+    type: str
+    page: str
+    url: str
+
+
+def index_pages(
+    jurisdictions: "list[str] | None" = None,
+    types: "list[str] | None" = None,
+    pages: "list[str] | None" = None,
+    base_url: str = BASE_URL,
+) -> Iterator[IndexPage]:
+    """Yield every index page, 9 jurisdictions x 2 types x 26 letters by default."""
+    template = INDEX_URL_TEMPLATE.replace(BASE_URL, base_url.rstrip("/"), 1)
+    for abb in jurisdictions or JURISDICTIONS:
+        for type_ in types or LEGISLATION_TYPES:
+            for page in pages or PAGES:
+                url = template.format(jurisdiction_abb=abb.lower(), type=type_, page=page)
+                yield IndexPage(abb.upper(), type_, page, url)
@@ -0,0 +1,106 @@
+"""Concurrent crawl of the AustLII table-of-contents pages."""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+from typing import AsyncIterator, Iterable, NamedTuple, Optional
+
+import httpx
+
+from .config import BASE_URL, IndexPage, index_pages
+from .http import HostLimiter, fetch_text, make_client
+from .metrics import CARD_LINKS, INDEX_PAGES, STAGE_SECONDS
+from .models import IndexLink
+from .parsing import extract_cards
+
+logger = logging.getLogger(__name__)
+
+
+class IndexResult(NamedTuple):
+    page: IndexPage
+    links: list[IndexLink]
+    error: Optional[BaseException] = None
+
+
+async def _crawl_page(
+    client: httpx.AsyncClient,
+    limiter: HostLimiter,
+    page: IndexPage,
+    base_url: str,
+) -> IndexResult:
+    with STAGE_SECONDS.time(stage="index"):
+        try:
+            html = await fetch_text(client, limiter, page.url, stage="index")
+        except httpx.HTTPStatusError as exc:
+            # Letters with no legislation are served as 404s.
+            if exc.response.status_code == 404:
+                INDEX_PAGES.inc(status="empty")
+                return IndexResult(page, [])
+            INDEX_PAGES.inc(status="error")
+            return IndexResult(page, [], exc)
+        except httpx.HTTPError as exc:
+            INDEX_PAGES.inc(status="error")
+            return IndexResult(page, [], exc)
+        links = [
+            IndexLink(page.jurisdiction_abb, page.type, url, title)
+            for url, title in extract_cards(html, base_url)
+        ]
+    INDEX_PAGES.inc(status="ok")
+    CARD_LINKS.inc(len(links))
+    return IndexResult(page, links)
+
+
+async def crawl_index_pages(
+    pages: Optional[Iterable[IndexPage]] = None,
+    *,
+    client: Optional[httpx.AsyncClient] = None,
+    limiter: Optional[HostLimiter] = None,
+    per_host: int = 8,
+    base_url: str = BASE_URL,
+) -> AsyncIterator[IndexResult]:
+    """Fetch index pages concurrently, yielding one result per page as it completes.
+
+    Transport and HTTP errors are reported in :attr:`IndexResult.error`
+    rather than raised, so one bad letter does not abort the index phase.
+    """
+    pages = list(pages if pages is not None else index_pages(base_url=base_url))
+    limiter = limiter or HostLimiter(per_host)
+    owns_client = client is None
+    client = client or make_client(max_connections=per_host)
+
+    tasks = [
+        asyncio.create_task(_crawl_page(client, limiter, page, base_url))
+        for page in pages
+    ]
+    try:
+        for future in asyncio.as_completed(tasks):
+            yield await future
+    finally:
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        if owns_client:
+            await client.aclose()
+
+
+async def crawl_index(
+    pages: Optional[Iterable[IndexPage]] = None,
+    *,
+    client: Optional[httpx.AsyncClient] = None,
+    limiter: Optional[HostLimiter] = None,
+    per_host: int = 8,
+    base_url: str = BASE_URL,
+) -> AsyncIterator[IndexLink]:
+    """Fetch all index pages concurrently, yielding links as each page completes.
+
+    Pages that fail are logged and skipped.
+    """
+    async for result in crawl_index_pages(
+        pages, client=client, limiter=limiter, per_host=per_host, base_url=base_url
+    ):
+        if result.error is not None:
+            logger.warning("index page failed: %s: %s", result.page.url, result.error)
+            continue
+        for link in result.links:
+            yield link
@@ -0,0 +1,203 @@
+"""Content deduplication across jurisdictions, types and toc letters.
+
+The same text turns up under several URLs: titles listed under more than
+one letter, and instruments republished under both ``consol_act`` and
+``consol_reg``.  Each record's ``Content`` is normalised (Unicode NFKC,
+line endings, runs of whitespace) and hashed with SHA-256 into
+``ContentHash``.  :func:`deduplicate` writes every distinct text once, to
+``texts.parquet``, and the records, without ``Content``, to a partitioned
+``records/`` dataset that refers to it by hash.
+
+Near-duplicates, such as a reprint that differs only in its cover page, are
+optionally folded onto the first text within a Jaccard similarity threshold,
+found with MinHash signatures over word shingles and LSH banding.  This
+drops the later text, so it is off by default.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import os
+import re
+import unicodedata
+import zlib
+from dataclasses import dataclass
+from itertools import islice
+from pathlib import Path
+from typing import Iterable, Iterator, Optional
+
+import numpy as np
+
+from .models import LegislationRecord
+
+_SPACES = re.compile(r"[^\S\n]+")
+_BLANK_LINES = re.compile(r"\n{3,}")
+
+_MERSENNE_PRIME = np.uint64((1 << 61) - 1)
+_MAX_HASH = np.uint64(0xFFFFFFFF)
+
+
+def normalize_content(text: str) -> str:
+    """Canonical form of a document text for hashing."""
+    text = unicodedata.normalize("NFKC", text).replace("\r\n", "\n").replace("\r", "\n")
+    text = _SPACES.sub(" ", text)
+    text = "\n".join(line.strip() for line in text.split("\n"))
+    return _BLANK_LINES.sub("\n\n", text).strip()
+
+
+def content_hash(text: str) -> str:
+    return hashlib.sha256(normalize_content(text).encode("utf-8")).hexdigest()
+
+
+class MinHasher:
+    """MinHash signatures of word ``shingle_size``-grams."""
+
+    def __init__(self, num_perm: int = 128, shingle_size: int = 5, seed: int = 1) -> None:
+        self.num_perm = num_perm
+        self.shingle_size = shingle_size
+        rng = np.random.default_rng(seed)
+        self._a = rng.integers(1, _MERSENNE_PRIME, num_perm, dtype=np.uint64)
+        self._b = rng.integers(0, _MERSENNE_PRIME, num_perm, dtype=np.uint64)
+
+    def shingles(self, text: str) -> np.ndarray:
+        words = text.split()
+        size = self.shingle_size
+        grams = {" ".join(words[i : i + size]) for i in range(max(1, len(words) - size + 1))}
+        return np.fromiter(
+            (zlib.crc32(gram.encode("utf-8")) for gram in grams), dtype=np.uint64, count=len(grams)
+        )
+
+    def signature(self, text: str, block: int = 4096) -> np.ndarray:
+        signature = np.full(self.num_perm, _MAX_HASH, dtype=np.uint64)
+        shingles = self.shingles(text)
+        # Permute in blocks of shingles to bound the (shingles x num_perm) matrix.
+        for start in range(0, len(shingles), block):
+            hashes = shingles[start : start + block, None]
+            permuted = ((hashes * self._a + self._b) % _MERSENNE_PRIME) & _MAX_HASH
+            np.minimum(signature, permuted.min(axis=0), out=signature)
+        return signature.astype(np.uint32)
+
+
+def lsh_bands(num_perm: int, threshold: float) -> tuple[int, int]:
+    """The (bands, rows) split of a signature whose LSH threshold is nearest ``threshold``."""
+    candidates = [(num_perm // rows, rows) for rows in range(1, num_perm + 1)]
+    return min(candidates, key=lambda br: abs((1 / br[0]) ** (1 / br[1]) - threshold))
+
+
+class NearDuplicateIndex:
+    """LSH index of MinHash signatures, answering "is this close to one seen before?"."""
+
+    def __init__(self, threshold: float = 0.9, num_perm: int = 128) -> None:
+        self.threshold = threshold
+        self.bands, self.rows = lsh_bands(num_perm, threshold)
+        self._buckets: list[dict[bytes, list[str]]] = [{} for _ in range(self.bands)]
+        self._signatures: dict[str, np.ndarray] = {}
+
+    def _keys(self, signature: np.ndarray) -> Iterator[tuple[dict[bytes, list[str]], bytes]]:
+        for band, buckets in enumerate(self._buckets):
+            yield buckets, signature[band * self.rows : (band + 1) * self.rows].tobytes()
+
+    def query(self, signature: np.ndarray) -> Optional[str]:
+        """The first indexed key whose estimated Jaccard similarity reaches the threshold."""
+        checked: set[str] = set()
+        for buckets, key in self._keys(signature):
+            for candidate in buckets.get(key, ()):
+                if candidate in checked:
+                    continue
+                checked.add(candidate)
+                if np.mean(self._signatures[candidate] == signature) >= self.threshold:
+                    return candidate
+        return None
+
+    def add(self, key: str, signature: np.ndarray) -> None:
+        self._signatures[key] = signature
+        for buckets, band in self._keys(signature):
+            buckets.setdefault(band, []).append(key)
+
+
+@dataclass
+class DedupStats:
+    records: int = 0
+    unique: int = 0
+    exact_duplicates: int = 0
+    near_duplicates: int = 0
+    bytes_in: int = 0
+    bytes_out: int = 0
+
+    def to_dict(self) -> dict:
+        return dict(self.__dict__)
+
+
+class Deduplicator:
+    """Assign ``ContentHash`` to records, pointing duplicates at the first copy of their text."""
+
+    def __init__(self, near_threshold: Optional[float] = None, num_perm: int = 128) -> None:
+        self.stats = DedupStats()
+        self._seen: set[str] = set()
+        self._hasher = MinHasher(num_perm) if near_threshold else None
+        self._near = NearDuplicateIndex(near_threshold, num_perm) if near_threshold else None
+
+    def assign(self, record: LegislationRecord) -> bool:
+        """Set ``record.ContentHash``; True if its text has not been seen before."""
+        self.stats.records += 1
+        if not record.Content:
+            record.ContentHash = ""
+            return False
+        text = normalize_content(record.Content)
+        digest = hashlib.sha256(text.encode("utf-8")).hexdigest()
+        size = len(record.Content.encode("utf-8"))
+        self.stats.bytes_in += size
+        record.ContentHash = digest
+        if digest in self._seen:
+            self.stats.exact_duplicates += 1
+            return False
+        if self._near is not None:
+            assert self._hasher is not None
+            signature = self._hasher.signature(text)
+            if (canonical := self._near.query(signature)) is not None:
+                self.stats.near_duplicates += 1
+                record.ContentHash = canonical
+                return False
+            self._near.add(digest, signature)
+        self._seen.add(digest)
+        self.stats.unique += 1
+        self.stats.bytes_out += size
+        return True
+
+
+def deduplicate(
+    records: Iterable[LegislationRecord],
+    dest: "str | os.PathLike[str]",
+    near_threshold: Optional[float] = None,
+) -> DedupStats:
+    """Write ``dest/records/`` (without Content) and ``dest/texts.parquet`` (each text once)."""
+    from .storage.parquet import ParquetWriter, TextsWriter
+
+    dest = Path(dest)
+    dest.mkdir(parents=True, exist_ok=True)
+    dedup = Deduplicator(near_threshold)
+    with ParquetWriter(dest / "records") as out, TextsWriter(dest / "texts.parquet") as texts:
+        for record in records:
+            if dedup.assign(record):
+                texts.write(record.ContentHash, record.Content)
+            record.Content = ""
+            out.write(record)
+    return dedup.stats
+
+
+def iter_deduplicated(
+    root: "str | os.PathLike[str]", batch_size: int = 500
+) -> Iterator[LegislationRecord]:
+    """Yield the records of a :func:`deduplicate` output with ``Content`` filled back in."""
+    from .storage.parquet import TextsReader, iter_records
+
+    root = Path(root)
+    texts = TextsReader(root / "texts.parquet")
+    records = iter_records(root / "records")
+    # Look texts up a batch of records at a time, so only the texts in use
+    # are held in memory.
+    while batch := list(islice(records, batch_size)):
+        found = texts.get_many(record.ContentHash for record in batch)
+        for record in batch:
+            record.Content = found.get(record.ContentHash, "")
+            yield record
@@ -0,0 +1,317 @@
+"""Batched CPU embedding of chunks with transformers and torch.
+
+On CPU the cost of a forward pass is close to proportional to
+``batch size x padded length``, so chunks are embedded in windows of
+``window`` at a time, sorted by token length within the window and cut
+into batches of at most ``token_budget`` padded tokens.  Similar lengths
+share a batch, so there is little padding, and short chunks go in large
+batches while long ones go a few at a time.  The model runs under
+``torch.inference_mode`` on ``threads`` intra-op threads.
+
+Embeddings are written in input order to ``embeddings.npy``, a NumPy memmap
+of ``float16`` or ``float32`` rows, one per line of the chunks file, next to
+``embeddings.json`` describing the model and pooling.
+
+With an :class:`EmbeddingCache`, each chunk's vector is looked up by the
+SHA-256 of its text, the model and its revision before the model is run,
+so after an incremental scrape only chunks whose text changed are embedded.
+"""
+
+from __future__ import annotations
+
+import functools
+import json
+import os
+import time
+from dataclasses import asdict, dataclass
+from itertools import islice
+from pathlib import Path
+from typing import Iterable, Iterator, Optional, Sequence
+
+import numpy as np
+
+from .sqlitedb import connect, select_in, transaction
+from .tokenizer import text_hash
+
+
+@dataclass
+class EmbeddingConfig:
+    model: str = "BAAI/bge-small-en-v1.5"
+    revision: Optional[str] = None
+    # Longer chunks are truncated; keep chunking's max_tokens below this.
+    max_length: int = 512
+    # Padded tokens (batch size x longest input) per forward pass.
+    token_budget: int = 16384
+    max_batch: int = 256
+    window: int = 4096
+    threads: Optional[int] = None
+    dtype: str = "float16"
+    pooling: str = "mean"
+    normalize: bool = True
+
+    @property
+    def variant(self) -> str:
+        """Settings other than model and revision that change the vectors."""
+        return f"{self.pooling}:{int(self.normalize)}:{self.max_length}"
+
+
+def plan_batches(
+    lengths: Sequence[int], token_budget: int, max_batch: int = 256
+) -> list[list[int]]:
+    """Group indices into ``lengths`` by length so each group's padded size fits the budget."""
+    order = sorted(range(len(lengths)), key=lengths.__getitem__)
+    batches: list[list[int]] = []
+    batch: list[int] = []
+    for index in order:
+        # Sorted ascending, so this input sets the batch's padded length.
+        if batch and (
+            (len(batch) + 1) * lengths[index] > token_budget or len(batch) >= max_batch
+        ):
+            batches.append(batch)
+            batch = []
+        batch.append(index)
+    if batch:
+        batches.append(batch)
+    return batches
+
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS vectors (
+    model       TEXT NOT NULL,
+    revision    TEXT NOT NULL,
+    variant     TEXT NOT NULL,
+    hash        TEXT NOT NULL,
+    vector      BLOB NOT NULL,
+    used_at     REAL NOT NULL,
+    PRIMARY KEY (model, revision, variant, hash)
+);
+CREATE INDEX IF NOT EXISTS vectors_used_at ON vectors (used_at);
+"""
+
+
+class EmbeddingCache:
+    """SQLite store of float32 vectors by text hash, model, revision and settings.
+
+    Entries are stamped when written or read; once the stored vectors pass
+    ``max_bytes`` the least recently used are evicted.  An unpinned model
+    revision is cached as ``""``, so pin one if the model may move.
+    """
+
+    def __init__(self, path: "str | os.PathLike[str]", max_bytes: Optional[int] = None) -> None:
+        self.max_bytes = max_bytes
+        self._db = connect(path, _SCHEMA)
+        self.size = self._db.execute(
+            "SELECT COALESCE(SUM(LENGTH(vector)), 0) FROM vectors"
+        ).fetchone()[0]
+        self.hits = 0
+        self.misses = 0
+        self.evicted = 0
+
+    def close(self) -> None:
+        self._db.close()
+
+    @staticmethod
+    def _key(config: EmbeddingConfig) -> tuple[str, str, str]:
+        return config.model, config.revision or "", config.variant
+
+    def get_many(self, config: EmbeddingConfig, hashes: Sequence[str]) -> dict[str, np.ndarray]:
+        found: dict[str, np.ndarray] = {}
+        unique = list(dict.fromkeys(hashes))
+        rows = select_in(
+            self._db,
+            "SELECT hash, vector FROM vectors WHERE model = ? AND revision = ?"
+            " AND variant = ? AND hash IN ({})",
+            self._key(config),
+            unique,
+        )
+        for digest, vector in rows:
+            found[digest] = np.frombuffer(vector, dtype=np.float32)
+        if found:
+            now = time.time()
+            with transaction(self._db):
+                self._db.executemany(
+                    "UPDATE vectors SET used_at = ? WHERE model = ? AND revision = ?"
+                    " AND variant = ? AND hash = ?",
+                    [(now, *self._key(config), digest) for digest in found],
+                )
+        self.hits += len(found)
+        self.misses += len(unique) - len(found)
+        return found
+
+    def put_many(self, config: EmbeddingConfig, vectors: dict[str, np.ndarray]) -> None:
+        now = time.time()
+        rows = [
+            (*self._key(config), digest, np.asarray(vector, dtype=np.float32).tobytes(), now)
+            for digest, vector in vectors.items()
+        ]
+        if not rows:
+            return
+        before = self._db.total_changes
+        with transaction(self._db):
+            self._db.executemany(
+                "INSERT OR IGNORE INTO vectors (model, revision, variant, hash, vector, used_at)"
+                " VALUES (?, ?, ?, ?, ?, ?)",
+                rows,
+            )
+        # Vectors of one model are all the same size.
+        self.size += (self._db.total_changes - before) * len(rows[0][4])
+        if self.max_bytes is not None and self.size > self.max_bytes:
+            self.evict(self.max_bytes)
+
+    def evict(self, max_bytes: int) -> None:
+        """Drop least recently used vectors until the rest fit in ``max_bytes``."""
+        rows = self._db.execute(
+            "SELECT rowid, LENGTH(vector) FROM vectors ORDER BY used_at"
+        ).fetchall()
+        victims = []
+        remaining = self.size
+        for rowid, size in rows:
+            if remaining <= max_bytes:
+                break
+            victims.append((rowid,))
+            remaining -= size
+        with transaction(self._db):
+            self._db.executemany("DELETE FROM vectors WHERE rowid = ?", victims)
+        # Only count what was deleted, so a failed eviction leaves the size right.
+        self.size = remaining
+        self.evicted += len(victims)
+
+
+class Embedder:
+    """A transformers encoder loaded on first use, embedding texts in token-budgeted batches.
+
+    With a ``cache``, only texts it has no vector for reach the model.
+    """
+
+    def __init__(
+        self, config: Optional[EmbeddingConfig] = None, cache: Optional[EmbeddingCache] = None
+    ) -> None:
+        self.config = config or EmbeddingConfig()
+        self.cache = cache
+        self.batches = 0
+        self.padded_tokens = 0
+        self.real_tokens = 0
+
+    @functools.cached_property
+    def _model(self):
+        import torch
+        from transformers import AutoModel, AutoTokenizer
+
+        if self.config.threads:
+            torch.set_num_threads(self.config.threads)
+        tokenizer = AutoTokenizer.from_pretrained(self.config.model, revision=self.config.revision)
+        model = AutoModel.from_pretrained(self.config.model, revision=self.config.revision)
+        model.eval()
+        return tokenizer, model
+
+    @property
+    def dim(self) -> int:
+        return self._model[1].config.hidden_size
+
+    def _forward(self, encoded: list[list[int]]):
+        import torch
+
+        tokenizer, model = self._model
+        inputs = tokenizer.pad({"input_ids": encoded}, return_tensors="pt")
+        mask = inputs["attention_mask"]
+        self.batches += 1
+        self.padded_tokens += mask.numel()
+        self.real_tokens += int(mask.sum())
+        with torch.inference_mode():
+            hidden = model(**inputs).last_hidden_state
+            if self.config.pooling == "cls":
+                pooled = hidden[:, 0]
+            else:
+                weights = mask.unsqueeze(-1).to(hidden.dtype)
+                pooled = (hidden * weights).sum(1) / weights.sum(1).clamp(min=1)
+            if self.config.normalize:
+                pooled = torch.nn.functional.normalize(pooled, dim=-1)
+        return pooled.float().numpy()
+
+    def embed(self, texts: Sequence[str]) -> np.ndarray:
+        """Embeddings of ``texts`` as rows of a ``(len(texts), dim)`` float32 array, in order."""
+        if self.cache is None or not texts:
+            return self._embed(texts)
+        hashes = [text_hash(text) for text in texts]
+        known = self.cache.get_many(self.config, hashes)
+        missing = {digest: text for digest, text in zip(hashes, texts) if digest not in known}
+        if missing:
+            fresh = dict(zip(missing, self._embed(list(missing.values()))))
+            self.cache.put_many(self.config, fresh)
+            known.update(fresh)
+        return np.stack([known[digest] for digest in hashes])
+
+    def _embed(self, texts: Sequence[str]) -> np.ndarray:
+        if not texts:
+            return np.empty((0, self.dim), dtype=np.float32)
+        tokenizer, _ = self._model
+        encoded = tokenizer(
+            list(texts),
+            truncation=True,
+            max_length=self.config.max_length,
+            return_attention_mask=False,
+        )["input_ids"]
+        out = np.empty((len(texts), self.dim), dtype=np.float32)
+        lengths = [len(ids) for ids in encoded]
+        for batch in plan_batches(lengths, self.config.token_budget, self.config.max_batch):
+            out[batch] = self._forward([encoded[i] for i in batch])
+        return out
+
+    @property
+    def padding_ratio(self) -> float:
+        """Share of the tokens run through the model that were padding."""
+        return 1 - self.real_tokens / self.padded_tokens if self.padded_tokens else 0.0
+
+
+def _windows(texts: Iterable[str], size: int) -> Iterator[list[str]]:
+    it = iter(texts)
+    while window := list(islice(it, size)):
+        yield window
+
+
+def iter_chunk_texts(path: "str | os.PathLike[str]") -> Iterator[str]:
+    """The ``text`` of each chunk in a JSONL file written by ``python -m legalbot chunk``."""
+    with open(path, encoding="utf-8") as fh:
+        for line in fh:
+            if line.strip():
+                yield json.loads(line)["text"]
+
+
+def _open_embeddings(dest: Path, config: EmbeddingConfig, rows: int, dim: int) -> np.memmap:
+    return np.lib.format.open_memmap(
+        dest / "embeddings.npy", mode="w+", dtype=np.dtype(config.dtype), shape=(rows, dim)
+    )
+
+
+def embed_chunks(
+    chunks: "str | os.PathLike[str]",
+    dest: "str | os.PathLike[str]",
+    embedder: Optional[Embedder] = None,
+) -> Embedder:
+    """Embed every chunk in the JSONL file ``chunks`` into ``dest/embeddings.npy``."""
+    embedder = embedder or Embedder()
+    config = embedder.config
+    dest = Path(dest)
+    dest.mkdir(parents=True, exist_ok=True)
+    rows = sum(1 for _ in iter_chunk_texts(chunks))
+    out = None
+    row = 0
+    for window in _windows(iter_chunk_texts(chunks), config.window):
+        vectors = embedder.embed(window)
+        if out is None:
+            # Take the width from the first vectors rather than the model,
+            # which a fully cached run never has to load.
+            dim = vectors.shape[1]
+            out = _open_embeddings(dest, config, rows, dim)
+        out[row : row + len(window)] = vectors
+        row += len(window)
+    if out is None:
+        dim = embedder.dim
+        out = _open_embeddings(dest, config, rows, dim)
+    out.flush()
+    del out
+    meta = dict(asdict(config), rows=rows, dim=dim)
+    with open(dest / "embeddings.json", "w", encoding="utf-8") as fh:
+        json.dump(meta, fh, indent=2)
+        fh.write("\n")
+    return embedder
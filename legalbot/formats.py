@@ -0,0 +1,109 @@
+"""Choosing which source a record's ``Content`` comes from.
+
+Planning.md prefers the plain-text download and otherwise ``.the-document``.
+:class:`CostModelPolicy` generalises that: every viable source is scored by
+the bytes it still needs to fetch plus the CPU to turn it into text, both in
+byte-equivalents, and the cheapest wins.  That lets an RTF download beat
+re-parsing a multi-megabyte HTML page, while a small page still falls back
+to ``.the-document`` rather than paying for another request.
+"""
+
+from __future__ import annotations
+
+from dataclasses import dataclass, field
+from typing import Callable, Optional, Protocol, Sequence
+
+from .parsing import DownloadLink
+from .rtf import rtf_to_text
+from .scheduler import DEFAULT_SIZE
+from .sizes import MISSING, size_bytes
+
+# ``Content`` source recorded for the ``.the-document`` fallback.
+HTML_SOURCE = "HTML"
+
+# Converters from a fetched download body to plain text, by content type.
+# PDF has none, so PDF links are never chosen.
+EXTRACTORS: dict[str, Callable[[str], str]] = {
+    "Text": lambda body: body,
+    "RTF": rtf_to_text,
+}
+
+
+@dataclass
+class PageProgress:
+    """How much of the legislation page has been, and will be, read."""
+
+    total: Optional[int]
+    read: int = 0
+
+
+class FormatPolicy(Protocol):
+    def choose(
+        self, downloads: Sequence[DownloadLink], page: PageProgress
+    ) -> Optional[DownloadLink]:
+        """Return the download to fetch, or None to use ``.the-document``."""
+        ...
+
+
+class PreferTextPolicy:
+    """The planning.md rule: plain text if offered, else ``.the-document``."""
+
+    def choose(
+        self, downloads: Sequence[DownloadLink], page: PageProgress
+    ) -> Optional[DownloadLink]:
+        return next((d for d in downloads if d.content_type == "Text"), None)
+
+
+@dataclass
+class CostModelPolicy:
+    """Pick the source with the lowest estimated fetch + extraction cost."""
+
+    # CPU cost per byte of input, relative to transferring one byte.
+    cpu_per_byte: dict[str, float] = field(
+        default_factory=lambda: {"Text": 0.0, "RTF": 0.5, HTML_SOURCE: 3.0}
+    )
+    # Fixed cost of issuing one more request, in byte-equivalents.
+    request_overhead: int = 32 * 1024
+    # Rough size of an HTML page relative to its RTF/Text export, used when
+    # the page length is unknown.
+    html_expansion: float = 2.0
+
+    def cost(self, download: DownloadLink) -> float:
+        size = size_bytes(download.size)
+        if size == MISSING:
+            size = DEFAULT_SIZE
+        return self.request_overhead + size * (1.0 + self.cpu_per_byte[download.content_type])
+
+    def html_cost(self, downloads: Sequence[DownloadLink], page: PageProgress) -> float:
+        total = page.total
+        if total is None:
+            sizes = [size_bytes(d.size) for d in downloads if d.content_type in EXTRACTORS]
+            sizes = [s for s in sizes if s != MISSING]
+            total = int(self.html_expansion * min(sizes)) if sizes else DEFAULT_SIZE
+        remaining = max(total - page.read, 0)
+        return remaining + total * self.cpu_per_byte[HTML_SOURCE]
+
+    def choose(
+        self, downloads: Sequence[DownloadLink], page: PageProgress
+    ) -> Optional[DownloadLink]:
+        viable = [
+            d
+            for d in downloads
+            if d.content_type in EXTRACTORS and d.content_type in self.cpu_per_byte
+        ]
+        if not viable:
+            return None
+        best = min(viable, key=self.cost)
+        if self.cost(best) <= self.html_cost(downloads, page):
+            return best
+        return None
+
+
+POLICIES: dict[str, Callable[[], FormatPolicy]] = {
+    "prefer-text": PreferTextPolicy,
+    "cost": CostModelPolicy,
+}
+
+
+def extract_content(download: DownloadLink, body: str) -> str:
+    return EXTRACTORS[download.content_type](body)
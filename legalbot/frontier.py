@@ -0,0 +1,174 @@
+"""Persistent crawl frontier in SQLite.
+
+Every index page and every legislation document gets a row recording which
+stage it has reached, its status, how many attempts it has had and the last
+error.  A restarted scrape reads the frontier instead of starting over:
+index pages already crawled are not refetched, documents part-way through
+resume at their stage, and failures are retried up to ``max_attempts``.
+"""
+
+from __future__ import annotations
+
+import json
+import os
+import time
+from collections import Counter
+from dataclasses import asdict
+from typing import Iterable
+
+from .config import IndexPage
+from .models import IndexLink, LegislationRecord
+from .parsing import DownloadLink
+from .sqlitedb import connect, select_in, transaction
+
+INDEX, PAGE, DOWNLOAD = "index", "page", "download"
+PENDING, DONE, FAILED = "pending", "done", "failed"
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS frontier (
+    url         TEXT PRIMARY KEY,
+    stage       TEXT NOT NULL,
+    status      TEXT NOT NULL,
+    attempts    INTEGER NOT NULL DEFAULT 0,
+    last_error  TEXT,
+    payload     TEXT NOT NULL,
+    updated_at  REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS frontier_stage_status ON frontier (stage, status);
+"""
+
+
+class Frontier:
+    """SQLite-backed record of crawl progress, keyed by URL."""
+
+    def __init__(self, path: "str | os.PathLike[str]", max_attempts: int = 3) -> None:
+        self.max_attempts = max_attempts
+        self._db = connect(path, _SCHEMA)
+
+    def close(self) -> None:
+        self._db.close()
+
+    def _retryable(self, stage: str) -> list[tuple[str, str, str]]:
+        return self._db.execute(
+            "SELECT url, stage, payload FROM frontier"
+            " WHERE stage = ? AND (status = ? OR (status = ? AND attempts < ?))",
+            (stage, PENDING, FAILED, self.max_attempts),
+        ).fetchall()
+
+    # Index pages
+
+    def seed_index(self, pages: Iterable[IndexPage]) -> None:
+        now = time.time()
+        with transaction(self._db):
+            self._db.executemany(
+                "INSERT OR IGNORE INTO frontier (url, stage, status, payload, updated_at)"
+                " VALUES (?, ?, ?, ?, ?)",
+                [(p.url, INDEX, PENDING, json.dumps(p), now) for p in pages],
+            )
+
+    def pending_index(self) -> list[IndexPage]:
+        return [IndexPage(*json.loads(payload)) for _, _, payload in self._retryable(INDEX)]
+
+    def complete_index(self, page: IndexPage, links: list[IndexLink]) -> list[IndexLink]:
+        """Mark ``page`` crawled and add its links; return those still to be scraped."""
+        now = time.time()
+        # The links and the page's DONE commit together, so a crash cannot
+        # leave the page done with some of its links never recorded.
+        with transaction(self._db):
+            self._db.executemany(
+                "INSERT OR IGNORE INTO frontier (url, stage, status, payload, updated_at)"
+                " VALUES (?, ?, ?, ?, ?)",
+                [(l.url, PAGE, PENDING, json.dumps(_link_payload(l)), now) for l in links],
+            )
+            self._db.execute(
+                "UPDATE frontier SET status = ?, attempts = attempts + 1, last_error = NULL,"
+                " updated_at = ? WHERE url = ?",
+                (DONE, now, page.url),
+            )
+        pending = {
+            url
+            for (url,) in select_in(
+                self._db,
+                "SELECT url FROM frontier WHERE stage = ?"
+                " AND (status = ? OR (status = ? AND attempts < ?)) AND url IN ({})",
+                (PAGE, PENDING, FAILED, self.max_attempts),
+                list(dict.fromkeys(l.url for l in links)),
+            )
+        }
+        return [link for link in links if link.url in pending]
+
+    # Documents
+
+    def pending_pages(self) -> list[IndexLink]:
+        return [IndexLink(**json.loads(payload)["link"]) for _, _, payload in self._retryable(PAGE)]
+
+    def pending_downloads(self) -> list[tuple[LegislationRecord, DownloadLink]]:
+        pending = []
+        for _, _, payload in self._retryable(DOWNLOAD):
+            data = json.loads(payload)
+            pending.append((LegislationRecord(**data["record"]), DownloadLink(*data["download"])))
+        return pending
+
+    def to_download(self, url: str, record: LegislationRecord, download: DownloadLink) -> None:
+        """Advance a document to the download stage, keeping its parsed metadata."""
+        with transaction(self._db):
+            row = self._db.execute(
+                "SELECT payload FROM frontier WHERE url = ?", (url,)
+            ).fetchone()
+            payload = json.loads(row[0]) if row else {}
+            payload.update(record=record.to_dict(), download=list(download))
+            self._db.execute(
+                "UPDATE frontier SET stage = ?, status = ?, attempts = 0, last_error = NULL,"
+                " payload = ?, updated_at = ? WHERE url = ?",
+                (DOWNLOAD, PENDING, json.dumps(payload), time.time(), url),
+            )
+
+    def done(self, url: str) -> None:
+        with transaction(self._db):
+            self._db.execute(
+                "UPDATE frontier SET status = ?, attempts = attempts + 1, last_error = NULL,"
+                " updated_at = ? WHERE url = ?",
+                (DONE, time.time(), url),
+            )
+
+    def fail(self, url: str, error: BaseException) -> None:
+        with transaction(self._db):
+            self._db.execute(
+                "UPDATE frontier SET status = ?, attempts = attempts + 1, last_error = ?,"
+                " updated_at = ? WHERE url = ?",
+                (FAILED, f"{type(error).__name__}: {error}", time.time(), url),
+            )
+
+    def requeue_uncommitted(self, committed: set[str]) -> int:
+        """Send finished documents that never reached durable output back to the page stage.
+
+        Documents are marked done when emitted, which can be ahead of the
+        sink's last checkpoint if the run was interrupted.
+        """
+        with transaction(self._db):
+            rows = self._db.execute(
+                "SELECT url FROM frontier WHERE stage IN (?, ?) AND status = ?",
+                (PAGE, DOWNLOAD, DONE),
+            ).fetchall()
+            requeue = [url for (url,) in rows if url not in committed]
+            self._db.executemany(
+                "UPDATE frontier SET stage = ?, status = ?, attempts = 0, updated_at = ?"
+                " WHERE url = ?",
+                [(PAGE, PENDING, time.time(), url) for url in requeue],
+            )
+        return len(requeue)
+
+    def stats(self) -> Counter:
+        """Row counts by ``(stage, status)``."""
+        return Counter(
+            {
+                (stage, status): count
+                for stage, status, count in self._db.execute(
+                    "SELECT stage, status, COUNT(*) FROM frontier GROUP BY stage, status"
+                )
+            }
+        )
+
+
+def _link_payload(link: IndexLink) -> dict:
+    return {"link": asdict(link)}
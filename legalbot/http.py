@@ -0,0 +1,94 @@
+"""Shared async HTTP client and per-host concurrency limiting."""
+
+from __future__ import annotations
+
+import asyncio
+import importlib.util
+import logging
+from collections import defaultdict
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Optional
+from urllib.parse import urlsplit
+
+import httpx
+
+from . import __version__
+from .metrics import BYTES_RECEIVED, IN_FLIGHT
+
+logger = logging.getLogger(__name__)
+
+USER_AGENT = f"legalbot/{__version__} (+https://github.com/Pinkieseb/legalbot)"
+
+DEFAULT_TIMEOUT = httpx.Timeout(30.0, connect=10.0)
+
+
+def http2_available() -> bool:
+    return importlib.util.find_spec("h2") is not None
+
+
+def make_client(
+    max_connections: int = 32,
+    timeout: httpx.Timeout = DEFAULT_TIMEOUT,
+    transport: Optional[httpx.AsyncBaseTransport] = None,
+    http2: bool = True,
+) -> httpx.AsyncClient:
+    """Create the connection-pooled client shared by every stage of a run.
+
+    With ``http2`` (and the ``h2`` package installed) HTTPS requests are
+    multiplexed over as few connections as the server's stream limit
+    allows, and closing a streamed response early resets one stream rather
+    than dropping a connection.  Servers that do not offer HTTP/2 in the
+    TLS handshake, and plain ``http://`` URLs, use the HTTP/1.1 keep-alive
+    pool.  A custom ``transport`` brings its own connection limits.
+    """
+    if http2 and not http2_available():
+        logger.warning("h2 is not installed; using HTTP/1.1")
+        http2 = False
+    limits = httpx.Limits(
+        max_connections=max_connections,
+        max_keepalive_connections=max_connections,
+    )
+    return httpx.AsyncClient(
+        limits=limits,
+        transport=transport,
+        http2=http2,
+        timeout=timeout,
+        follow_redirects=True,
+        headers={"User-Agent": USER_AGENT},
+    )
+
+
+class Permit:
+    """Handed out by :meth:`HostLimiter.slot` for the duration of one request."""
+
+    def observe(self, response: httpx.Response) -> None:
+        """Report the response once its headers have arrived."""
+
+
+class HostLimiter:
+    """Bound the number of in-flight requests to any single host."""
+
+    def __init__(self, per_host: int = 8) -> None:
+        self.per_host = per_host
+        self._semaphores: dict[str, asyncio.Semaphore] = defaultdict(
+            lambda: asyncio.Semaphore(self.per_host)
+        )
+
+    @asynccontextmanager
+    async def slot(self, url: str) -> AsyncIterator[Permit]:
+        async with self._semaphores[urlsplit(url).netloc]:
+            yield Permit()
+
+
+async def fetch_text(
+    client: httpx.AsyncClient, limiter: HostLimiter, url: str, stage: str = "other"
+) -> str:
+    """GET ``url`` within the host's concurrency budget and return the decoded body."""
+    async with limiter.slot(url) as permit:
+        with IN_FLIGHT.track(stage=stage):
+            async with client.stream("GET", url) as response:
+                permit.observe(response)
+                await response.aread()
+            BYTES_RECEIVED.inc(len(response.content), stage=stage)
+            response.raise_for_status()
+            return response.text
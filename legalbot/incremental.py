@@ -0,0 +1,178 @@
+"""Incremental re-scrape against a previously stored dataset.
+
+AustLII download filenames embed the consolidation date
+(``act1990/20190912.pdf``), so a record whose ``.side-download a`` URLs and
+sizes are unchanged can reuse its stored ``Content`` without downloading it
+again.  Legislation pages are still fetched to read the current links.
+"""
+
+from __future__ import annotations
+
+import json
+import os
+from collections import Counter, defaultdict
+from dataclasses import dataclass, field
+from typing import Iterable, Iterator, Mapping, Optional
+
+from .config import LEGISLATION_TYPES, PAGES, IndexPage
+from .models import IndexLink, LegislationRecord
+from .parsing import DownloadLink
+from .pipeline import ScrapePipeline, build_record, page_stage
+
+VersionKey = tuple[tuple[str, Optional[str]], ...]
+
+
+def version_key(record: LegislationRecord) -> VersionKey:
+    """The (download URL, size) pairs that identify a consolidation."""
+    return tuple(
+        (url, size)
+        for url, size in zip(record.DownloadURLs, record.DownloadSizes)
+        if url is not None
+    )
+
+
+def same_content(record: LegislationRecord, old: LegislationRecord) -> bool:
+    """Whether ``record`` has the text ``old`` was stored with."""
+    if record.BlobHash and old.BlobHash:
+        return record.BlobHash == old.BlobHash
+    from .dedup import content_hash
+
+    if old.Content:
+        return content_hash(record.Content) == content_hash(old.Content)
+    return bool(old.ContentHash) and content_hash(record.Content) == old.ContentHash
+
+
+def iter_dataset(path: str) -> Iterator[LegislationRecord]:
+    """Read a JSONL file, or a sharded JSONL, Parquet or deduplicated dataset directory."""
+    if os.path.isdir(path):
+        from .storage import jsonl
+
+        if os.path.exists(os.path.join(path, "texts.parquet")):
+            from .dedup import iter_deduplicated
+
+            yield from iter_deduplicated(path)
+        elif os.path.exists(os.path.join(path, jsonl.CHECKPOINT)):
+            yield from jsonl.iter_records(path)
+        else:
+            from .storage import parquet
+
+            yield from parquet.iter_records(path)
+        return
+    with open(path, encoding="utf-8") as fh:
+        for line in fh:
+            if line.strip():
+                yield LegislationRecord(**json.loads(line))
+
+
+def iter_contents(path: str, blob_dir: Optional[str] = None) -> Iterator[LegislationRecord]:
+    """:func:`iter_dataset` for readers of ``Content``.
+
+    Records scraped with a blob store and without ``--keep-content`` carry
+    only a ``BlobHash``; their ``Content`` is re-extracted from ``blob_dir``,
+    and without one they are an error rather than silently empty.
+    """
+    store = None
+    if blob_dir:
+        from .blobs import BlobStore
+
+        store = BlobStore(blob_dir)
+    for record in iter_dataset(path):
+        if not record.Content and record.BlobHash:
+            if store is None:
+                raise ValueError(
+                    f"{record.URL} keeps its Content in a blob store; "
+                    "read the dataset with the blob directory it was scraped with"
+                )
+            from .blobs import extract_blob
+
+            record.Content = extract_blob(store, record)
+        yield record
+
+
+def load_dataset(path: str) -> dict[str, LegislationRecord]:
+    """Read a dataset (see :func:`iter_dataset`) into a URL -> record mapping."""
+    return {record.URL: record for record in iter_dataset(path)}
+
+
+@dataclass
+class ChangeReport:
+    """Per ``(JurisdictionAbb, Type)`` counts of what an incremental run changed."""
+
+    added: Counter = field(default_factory=Counter)
+    updated: Counter = field(default_factory=Counter)
+    unchanged: Counter = field(default_factory=Counter)
+    removed: Counter = field(default_factory=Counter)
+    removed_urls: list[str] = field(default_factory=list)
+
+    def to_dict(self) -> dict:
+        groups: dict[str, dict[str, int]] = defaultdict(dict)
+        for name in ("added", "updated", "unchanged", "removed"):
+            for (abb, type_), count in getattr(self, name).items():
+                groups[f"{abb}/{type_}"][name] = count
+        return {"by_group": dict(sorted(groups.items())), "removed_urls": sorted(self.removed_urls)}
+
+
+class IncrementalPipeline(ScrapePipeline):
+    """A :class:`ScrapePipeline` that only downloads documents whose version changed."""
+
+    def __init__(self, previous: Mapping[str, LegislationRecord], *args, **kwargs) -> None:
+        super().__init__(*args, **kwargs)
+        self.previous = previous
+        self.report = ChangeReport()
+        self._seen: set[str] = set()
+
+    async def process_page(
+        self, link: IndexLink
+    ) -> tuple[LegislationRecord, Optional[DownloadLink]]:
+        with page_stage():
+            return await self._compare_page(link)
+
+    async def _compare_page(
+        self, link: IndexLink
+    ) -> tuple[LegislationRecord, Optional[DownloadLink]]:
+        page = await self.read_page(link.url)
+        record = build_record(link, page.downloads)
+        group = (record.JurisdictionAbb, record.Type)
+        self._seen.add(record.URL)
+
+        old = self.previous.get(record.URL)
+        key = version_key(record)
+        if old is not None and key and key == version_key(old):
+            self.report.unchanged[group] += 1
+            record.ContentTypes = old.ContentTypes
+            record.DownloadURLs = old.DownloadURLs
+            record.DownloadSizes = old.DownloadSizes
+            record.Content = old.Content
+            record.ContentSource = old.ContentSource
+            record.ContentHash = old.ContentHash
+            record.BlobHash = old.BlobHash
+            record.whenScraped = old.whenScraped
+            return record, None
+
+        if page.source is None:
+            await self.document_fallback(record, page)
+            # Without download links there is no version to compare; the
+            # page text itself is the version.
+            if old is not None and not key and same_content(record, old):
+                self.report.unchanged[group] += 1
+                record.ContentHash = old.ContentHash
+                record.whenScraped = old.whenScraped
+                return record, None
+        (self.report.added if old is None else self.report.updated)[group] += 1
+        return record, page.source
+
+    def finish(self, pages: Iterable[IndexPage]) -> ChangeReport:
+        """Record removals among previous records in the scope of ``pages``."""
+        scope: dict[tuple[str, str], set[str]] = defaultdict(set)
+        for page in pages:
+            scope[(page.jurisdiction_abb, LEGISLATION_TYPES[page.type])].add(page.page)
+        for url, record in self.previous.items():
+            letters = scope.get((record.JurisdictionAbb, record.Type))
+            if not letters or url in self._seen or url in self.skip_urls:
+                continue
+            # A restricted run only vouches for the toc letters it crawled.
+            if len(letters) < len(PAGES) and record.Title[:1].upper() not in letters:
+                continue
+            self.report.removed[(record.JurisdictionAbb, record.Type)] += 1
+            self.report.removed_urls.append(url)
+        return self.report
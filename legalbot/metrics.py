@@ -0,0 +1,276 @@
+"""Counters and histograms for the scraper, in Prometheus text format.
+
+A small in-process registry rather than a client library dependency.
+:func:`serve_metrics` exposes it on ``/metrics`` and :func:`dump_metrics`
+periodically writes it to a file (compatible with node_exporter's textfile
+collector), so a multi-hour run can be watched without a profiler.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import math
+import os
+import threading
+import time
+from contextlib import contextmanager
+from typing import Iterator, Sequence, TypeVar
+
+LabelValues = tuple[str, ...]
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _format_labels(names: Sequence[str], values: Sequence[str], extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _format_value(value: float) -> str:
+    if math.isinf(value):
+        return "+Inf" if value > 0 else "-Inf"
+    return repr(float(value)) if not float(value).is_integer() else str(int(value))
+
+
+class _Metric:
+    kind = ""
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> None:
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+
+    def _key(self, labels: dict[str, str]) -> LabelValues:
+        if set(labels) != set(self.labelnames):
+            raise ValueError(f"{self.name} expects labels {self.labelnames}, got {tuple(labels)}")
+        return tuple(str(labels[name]) for name in self.labelnames)
+
+    def _header(self) -> list[str]:
+        return [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+
+    def render(self) -> list[str]:
+        raise NotImplementedError
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def __init__(self, *args, **kwargs) -> None:
+        super().__init__(*args, **kwargs)
+        self._values: dict[LabelValues, float] = {}
+
+    def inc(self, amount: float = 1.0, **labels: str) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def value(self, **labels: str) -> float:
+        return self._values.get(self._key(labels), 0.0)
+
+    def render(self) -> list[str]:
+        with self._lock:
+            items = sorted(self._values.items())
+        return self._header() + [
+            f"{self.name}{_format_labels(self.labelnames, key)} {_format_value(value)}"
+            for key, value in items
+        ]
+
+
+class Gauge(Counter):
+    kind = "gauge"
+
+    def dec(self, amount: float = 1.0, **labels: str) -> None:
+        self.inc(-amount, **labels)
+
+    def set(self, value: float, **labels: str) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = value
+
+    @contextmanager
+    def track(self, **labels: str) -> Iterator[None]:
+        """Count the block as in progress while it runs."""
+        self.inc(**labels)
+        try:
+            yield
+        finally:
+            self.dec(**labels)
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Sequence[str] = (),
+        buckets: Sequence[float] = DEFAULT_BUCKETS,
+    ) -> None:
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets)) + (math.inf,)
+        self._counts: dict[LabelValues, list[int]] = {}
+        self._sums: dict[LabelValues, float] = {}
+
+    def observe(self, value: float, **labels: str) -> None:
+        key = self._key(labels)
+        with self._lock:
+            counts = self._counts.setdefault(key, [0] * len(self.buckets))
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    counts[i] += 1
+                    break
+            self._sums[key] = self._sums.get(key, 0.0) + value
+
+    @contextmanager
+    def time(self, **labels: str) -> Iterator[None]:
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start, **labels)
+
+    def render(self) -> list[str]:
+        lines = self._header()
+        with self._lock:
+            items = sorted(
+                (key, list(counts), self._sums[key]) for key, counts in self._counts.items()
+            )
+        for key, counts, total in items:
+            cumulative = 0
+            for bound, count in zip(self.buckets, counts):
+                cumulative += count
+                le = 'le="' + _format_value(bound) + '"'
+                lines.append(
+                    f"{self.name}_bucket{_format_labels(self.labelnames, key, le)} {cumulative}"
+                )
+            labels = _format_labels(self.labelnames, key)
+            lines.append(f"{self.name}_sum{labels} {_format_value(total)}")
+            lines.append(f"{self.name}_count{labels} {cumulative}")
+        return lines
+
+
+M = TypeVar("M", bound=_Metric)
+
+
+class Registry:
+    def __init__(self) -> None:
+        self._metrics: dict[str, _Metric] = {}
+
+    def _register(self, metric: M) -> M:
+        if metric.name in self._metrics:
+            raise ValueError(f"duplicate metric {metric.name}")
+        self._metrics[metric.name] = metric
+        return metric
+
+    def counter(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> Counter:
+        return self._register(Counter(name, documentation, labelnames))
+
+    def gauge(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> Gauge:
+        return self._register(Gauge(name, documentation, labelnames))
+
+    def histogram(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Sequence[str] = (),
+        buckets: Sequence[float] = DEFAULT_BUCKETS,
+    ) -> Histogram:
+        return self._register(Histogram(name, documentation, labelnames, buckets))
+
+    def render(self) -> str:
+        lines: list[str] = []
+        for metric in self._metrics.values():
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = Registry()
+
+INDEX_PAGES = REGISTRY.counter(
+    "legalbot_index_pages_total", "Index (toc) pages fetched, by outcome.", ["status"]
+)
+CARD_LINKS = REGISTRY.counter(
+    "legalbot_card_links_total", ".card a links extracted from index pages."
+)
+LEGISLATION_PAGES = REGISTRY.counter(
+    "legalbot_legislation_pages_total", "Legislation pages parsed, by outcome.", ["status"]
+)
+DOWNLOADS = REGISTRY.counter(
+    "legalbot_downloads_total", "Content downloads, by content type and outcome.",
+    ["content_type", "status"],
+)
+DOCUMENT_FALLBACKS = REGISTRY.counter(
+    "legalbot_document_fallbacks_total", "Records whose Content came from .the-document."
+)
+RECORDS = REGISTRY.counter("legalbot_records_total", "Records emitted by the pipeline.")
+BYTES_RECEIVED = REGISTRY.counter(
+    "legalbot_bytes_received_total", "Response body bytes received, by stage.", ["stage"]
+)
+CACHE_RESPONSES = REGISTRY.counter(
+    "legalbot_cache_responses_total", "Conditional GETs, by result (hit = 304).", ["result"]
+)
+RETRIES = REGISTRY.counter("legalbot_retries_total", "Request retries, by stage.", ["stage"])
+IN_FLIGHT = REGISTRY.gauge(
+    "legalbot_requests_in_flight", "Requests currently in progress, by stage.", ["stage"]
+)
+CONCURRENCY_LIMIT = REGISTRY.gauge(
+    "legalbot_concurrency_limit", "Adaptive concurrency window, by host.", ["host"]
+)
+STAGE_SECONDS = REGISTRY.histogram(
+    "legalbot_stage_seconds", "Time to complete one item of a stage.", ["stage"]
+)
+
+
+async def serve_metrics(
+    port: int, host: str = "127.0.0.1", registry: Registry = REGISTRY
+) -> asyncio.AbstractServer:
+    """Serve ``registry`` as Prometheus text on ``http://host:port/metrics``."""
+
+    async def handle(reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        try:
+            request = await reader.readline()
+            while (await reader.readline()).strip():
+                pass
+            path = request.split()[1].decode() if len(request.split()) > 1 else "/"
+            if path.split("?")[0] == "/metrics":
+                status, body = "200 OK", registry.render().encode()
+            else:
+                status, body = "404 Not Found", b"not found\n"
+            writer.write(
+                f"HTTP/1.1 {status}\r\n"
+                "Content-Type: text/plain; version=0.0.4; charset=utf-8\r\n"
+                f"Content-Length: {len(body)}\r\nConnection: close\r\n\r\n".encode()
+                + body
+            )
+            await writer.drain()
+        finally:
+            writer.close()
+
+    return await asyncio.start_server(handle, host, port)
+
+
+def write_metrics(path: "str | os.PathLike[str]", registry: Registry = REGISTRY) -> None:
+    tmp = f"{path}.tmp"
+    with open(tmp, "w", encoding="utf-8") as fh:
+        fh.write(registry.render())
+    os.replace(tmp, path)
+
+
+async def dump_metrics(
+    path: "str | os.PathLike[str]", interval: float = 30.0, registry: Registry = REGISTRY
+) -> None:
+    """Rewrite ``path`` with the current metrics every ``interval`` seconds until cancelled."""
+    try:
+        while True:
+            await asyncio.sleep(interval)
+            await asyncio.to_thread(write_metrics, path, registry)
+    finally:
+        write_metrics(path, registry)
@@ -0,0 +1,421 @@
+"""Local stand-in for AustLII, for offline end-to-end runs and benchmarks.
+
+Serves a deterministic synthetic corpus with the same URL layout and
+markup the scraper relies on::
+
+    /cgi-bin/viewtoc/au/legis/{jurisdiction}/consol_{type}/toc-{A..Z}.html   .card a
+    /au/legis/{jurisdiction}/consol_{type}/{slug}/          .side-download a, .the-document
+    /au/legis/{jurisdiction}/consol_{type}/{slug}/{YYYYMMDD}.{txt,rtf,pdf}
+
+Latency, error rate, document sizes and the mix of available formats are
+configurable, as are a robots.txt ``Crawl-delay`` and a concurrency
+``capacity`` beyond which requests get ``429``.  Responses carry
+``Content-Length``, ``ETag`` and ``Last-Modified`` and honour conditional
+requests.  Bumping ``revision``
+moves a ``change_rate`` fraction of documents to a new consolidation date,
+for exercising incremental runs.
+
+    python -m legalbot.mock_server --docs 10000 --latency 0.02 --error-rate 0.01
+"""
+
+from __future__ import annotations
+
+import argparse
+import html
+import math
+import random
+import re
+import threading
+import time
+from contextlib import contextmanager
+from dataclasses import dataclass
+from datetime import date, datetime, timedelta, timezone
+from email.utils import format_datetime
+from functools import lru_cache
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Iterator, Optional
+
+from .config import JURISDICTIONS, LEGISLATION_TYPES, PAGES
+
+BASE_DATE = date(2019, 9, 12)
+
+_TOC = re.compile(r"^/cgi-bin/viewtoc/au/legis/(\w+)/consol_(act|reg)/toc-([A-Z])\.html$")
+_PAGE = re.compile(r"^/au/legis/(\w+)/consol_(act|reg)/([a-z0-9]+)/$")
+_DOWNLOAD = re.compile(r"^/au/legis/(\w+)/consol_(act|reg)/([a-z0-9]+)/(\d{8})\.(txt|rtf|pdf)$")
+
+_WORDS = (
+    "administration amendment application assessment authority business commission "
+    "consolidated corporations court criminal customs development education employment "
+    "environment evidence family financial health heritage industrial insurance land "
+    "local management marine migration native occupational planning police privacy "
+    "property protection public regulation road safety security social superannuation "
+    "taxation telecommunications transport tribunal water workplace"
+).split()
+
+
+@dataclass
+class MockConfig:
+    docs: int = 1000
+    seed: int = 0
+    latency: float = 0.0
+    jitter: float = 0.0
+    error_rate: float = 0.0
+    min_size: int = 2 * 1024
+    max_size: int = 2 * 1024 * 1024
+    text_fraction: float = 0.9
+    rtf_fraction: float = 0.95
+    pdf_fraction: float = 0.95
+    revision: int = 0
+    change_rate: float = 0.1
+    # Advertised in robots.txt; 0 for none.
+    crawl_delay: float = 0.0
+    # Concurrent requests served before answering 429; 0 for unlimited.
+    capacity: int = 0
+
+    @property
+    def docs_per_page(self) -> int:
+        pages = len(JURISDICTIONS) * len(LEGISLATION_TYPES) * len(PAGES)
+        return max(1, math.ceil(self.docs / pages))
+
+
+@dataclass(frozen=True)
+class MockDocument:
+    jurisdiction: str
+    type: str
+    slug: str
+    title: str
+    size: int
+    version: date
+    has_text: bool
+    has_rtf: bool
+    has_pdf: bool
+
+    @property
+    def path(self) -> str:
+        return f"/au/legis/{self.jurisdiction}/consol_{self.type}/{self.slug}/"
+
+    @property
+    def stamp(self) -> str:
+        return self.version.strftime("%Y%m%d")
+
+    @property
+    def etag(self) -> str:
+        return f'"{self.slug}-{self.stamp}"'
+
+
+def format_size(n: int) -> str:
+    """Format like AustLII's download labels: ``86.4 KB``, ``146 KB``, ``2.12 KB``."""
+    for unit, scale in (("MB", 1024**2), ("KB", 1024)):
+        if n >= scale:
+            value = n / scale
+            return f"{value:.3g} {unit}" if value < 1000 else f"{value:.0f} {unit}"
+    return f"{n} B"
+
+
+class MockCorpus:
+    """Deterministic synthetic corpus; documents are derived on demand, never stored."""
+
+    def __init__(self, config: MockConfig) -> None:
+        self.config = config
+        self._sections = self._section_pool()
+
+    def _rng(self, *key: object) -> random.Random:
+        return random.Random(":".join(map(str, (self.config.seed,) + key)))
+
+    def _section_pool(self, count: int = 64) -> list[str]:
+        rng = self._rng("sections")
+        sections = []
+        for n in range(count):
+            words = [rng.choice(_WORDS) for _ in range(rng.randint(150, 400))]
+            body = " ".join(words).capitalize()
+            heading = f"{n + 1} {rng.choice(_WORDS).title()} {rng.choice(_WORDS)}"
+            sections.append(f"{heading}\n(1) {body}.\n")
+        return sections
+
+    def document(self, jurisdiction: str, type_: str, letter: str, index: int) -> MockDocument:
+        cfg = self.config
+        rng = self._rng(jurisdiction, type_, letter, index)
+        words = [letter + rng.choice(_WORDS)[1:]]
+        words += [rng.choice(_WORDS) for _ in range(rng.randint(1, 4))]
+        year = rng.randint(1901, 2023)
+        kind = "Act" if type_ == "act" else "Regulations"
+        title = " ".join(w.title() for w in words) + f" {kind} {year}"
+        slug = "".join(w[0] for w in words).lower() + f"{year}{index:04d}"
+        size = int(math.exp(rng.uniform(math.log(cfg.min_size), math.log(cfg.max_size))))
+        days = sum(
+            365
+            for revision in range(1, cfg.revision + 1)
+            if self._rng(slug, jurisdiction, type_, revision).random() < cfg.change_rate
+        )
+        return MockDocument(
+            jurisdiction=jurisdiction,
+            type=type_,
+            slug=slug,
+            title=title,
+            size=size,
+            version=BASE_DATE + timedelta(days=days),
+            has_text=rng.random() < cfg.text_fraction,
+            has_rtf=rng.random() < cfg.rtf_fraction,
+            has_pdf=rng.random() < cfg.pdf_fraction,
+        )
+
+    def page_documents(self, jurisdiction: str, type_: str, letter: str) -> list[MockDocument]:
+        return [
+            self.document(jurisdiction, type_, letter, i)
+            for i in range(self.config.docs_per_page)
+        ]
+
+    def lookup(self, jurisdiction: str, type_: str, slug: str) -> Optional[MockDocument]:
+        if not slug[-4:].isdigit():
+            return None
+        doc = self.document(jurisdiction, type_, slug[0].upper(), int(slug[-4:]))
+        if doc.slug != slug or int(slug[-4:]) >= self.config.docs_per_page:
+            return None
+        return doc
+
+    @lru_cache(maxsize=64)
+    def text(self, doc: MockDocument) -> str:
+        """Plain-text body with Part/Division/section structure, about ``doc.size`` bytes."""
+        rng = self._rng("text", doc.slug, doc.stamp)
+        parts = [f"{doc.title.upper()}\n- As at {doc.version:%d %B %Y}\n\n"]
+        total = len(parts[0])
+        part = division = 0
+        while total < doc.size:
+            if division % 4 == 0:
+                part += 1
+                heading = f"PART {part}--{rng.choice(_WORDS).upper()}\n"
+                parts.append(heading)
+                total += len(heading)
+            division += 1
+            heading = f"Division {division}--{rng.choice(_WORDS).title()}\n"
+            parts.append(heading)
+            total += len(heading)
+            for _ in range(rng.randint(1, 5)):
+                section = rng.choice(self._sections)
+                parts.append(section)
+                total += len(section)
+        return "".join(parts)
+
+    _RTF_HEADER = "{\\rtf1\\ansi\\deff0{\\fonttbl{\\f0 Times New Roman;}}\\pard "
+
+    def rtf(self, doc: MockDocument) -> str:
+        # Generated text has no backslashes or braces to escape.
+        return self._RTF_HEADER + self.text(doc).replace("\n", "\\par\n") + "}"
+
+    def rtf_size(self, doc: MockDocument) -> int:
+        text = self.text(doc)
+        return len(self._RTF_HEADER) + len(text) + 4 * text.count("\n") + 1
+
+    def pdf(self, doc: MockDocument) -> bytes:
+        size = int(len(self.text(doc)) * 1.6)
+        header = b"%PDF-1.4\n% synthetic\n"
+        return header + b"0" * max(0, size - len(header))
+
+    def download_sizes(self, doc: MockDocument) -> dict[str, int]:
+        sizes = {}
+        if doc.has_rtf:
+            sizes["rtf"] = self.rtf_size(doc)
+        if doc.has_pdf:
+            sizes["pdf"] = int(len(self.text(doc)) * 1.6)
+        if doc.has_text:
+            sizes["txt"] = len(self.text(doc))
+        return sizes
+
+    def toc_html(self, jurisdiction: str, type_: str, letter: str) -> str:
+        items = "".join(
+            f'<li><a href="{d.path}">{html.escape(d.title)}</a></li>\n'
+            for d in self.page_documents(jurisdiction, type_, letter)
+        )
+        name = JURISDICTIONS[jurisdiction.upper()]
+        return (
+            f"<!DOCTYPE html><html><head><title>{name} - {letter}</title></head><body>"
+            f'<div class="container"><div class="row"><div class="card"><ul>\n{items}'
+            "</ul></div></div></div></body></html>"
+        )
+
+    def page_html(self, doc: MockDocument) -> str:
+        labels = {"rtf": "RTF format", "pdf": "PDF format", "txt": "Plain text (ASCII)"}
+        links = "".join(
+            f'<li><a href="{doc.path}{doc.stamp}.{ext}">'
+            f"{labels[ext]} ({format_size(size)})</a></li>"
+            for ext, size in self.download_sizes(doc).items()
+        )
+        paragraphs = "".join(
+            f"<p>{html.escape(line)}</p>\n" for line in self.text(doc).splitlines() if line
+        )
+        return (
+            f"<!DOCTYPE html><html><head><title>{html.escape(doc.title)}</title></head><body>"
+            f'<div class="container"><div class="row">'
+            f'<aside><div class="side-download"><h4>Download</h4><ul>{links}</ul></div></aside>'
+            f'<main><div class="the-document">\n<h1>{html.escape(doc.title.upper())}</h1>\n'
+            f"{paragraphs}</div></main></div></div></body></html>"
+        )
+
+
+class MockHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    server: "MockServer"
+
+    def log_message(self, format: str, *args: object) -> None:
+        pass
+
+    def _send(
+        self,
+        status: int,
+        body: bytes = b"",
+        content_type: str = "text/html; charset=utf-8",
+        doc: Optional[MockDocument] = None,
+    ) -> None:
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        if doc is not None:
+            self.send_header("ETag", doc.etag)
+            modified = datetime.combine(doc.version, datetime.min.time(), timezone.utc)
+            self.send_header("Last-Modified", format_datetime(modified, usegmt=True))
+        if status in (429, 503):
+            self.send_header("Retry-After", "1")
+        self.end_headers()
+        if self.command != "HEAD":
+            self.wfile.write(body)
+        self.server.stats.record(status, len(body))
+
+    def do_HEAD(self) -> None:
+        self.do_GET()
+
+    def do_GET(self) -> None:
+        with self.server.admit() as admitted:
+            if not admitted:
+                return self._send(429, b"Too Many Requests", "text/plain")
+            self._serve()
+
+    def _serve(self) -> None:
+        config = self.server.corpus.config
+        delay = config.latency + (random.uniform(0, config.jitter) if config.jitter else 0.0)
+        if delay:
+            time.sleep(delay)
+        if config.error_rate and random.random() < config.error_rate:
+            return self._send(503, b"Service Unavailable", "text/plain")
+        path = self.path.split("?", 1)[0]
+        corpus = self.server.corpus
+
+        if path == "/robots.txt":
+            rules = f"Crawl-delay: {config.crawl_delay:g}" if config.crawl_delay else "Disallow:"
+            return self._send(200, f"User-agent: *\n{rules}\n".encode(), "text/plain")
+
+        if match := _TOC.match(path):
+            jurisdiction, type_, letter = match.groups()
+            if jurisdiction.upper() not in JURISDICTIONS:
+                return self._send(404, b"Not Found", "text/plain")
+            return self._send(200, corpus.toc_html(jurisdiction, type_, letter).encode())
+
+        if match := _PAGE.match(path):
+            doc = corpus.lookup(*match.groups())
+            if doc is None:
+                return self._send(404, b"Not Found", "text/plain")
+            if self.headers.get("If-None-Match") == doc.etag:
+                return self._send(304, doc=doc)
+            return self._send(200, corpus.page_html(doc).encode(), doc=doc)
+
+        if match := _DOWNLOAD.match(path):
+            jurisdiction, type_, slug, stamp, ext = match.groups()
+            doc = corpus.lookup(jurisdiction, type_, slug)
+            if doc is None or stamp != doc.stamp or ext not in corpus.download_sizes(doc):
+                return self._send(404, b"Not Found", "text/plain")
+            if self.headers.get("If-None-Match") == doc.etag:
+                return self._send(304, doc=doc)
+            if ext == "txt":
+                return self._send(200, corpus.text(doc).encode(), "text/plain", doc)
+            if ext == "rtf":
+                return self._send(200, corpus.rtf(doc).encode(), "application/rtf", doc)
+            return self._send(200, corpus.pdf(doc), "application/pdf", doc)
+
+        return self._send(404, b"Not Found", "text/plain")
+
+
+class ServerStats:
+    """Thread-safe request and byte counters."""
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self.requests = 0
+        self.bytes_sent = 0
+        self.by_status: dict[int, int] = {}
+
+    def record(self, status: int, nbytes: int) -> None:
+        with self._lock:
+            self.requests += 1
+            self.bytes_sent += nbytes
+            self.by_status[status] = self.by_status.get(status, 0) + 1
+
+
+class MockServer(ThreadingHTTPServer):
+    daemon_threads = True
+    request_queue_size = 256
+
+    def __init__(self, address: tuple[str, int], config: MockConfig) -> None:
+        super().__init__(address, MockHandler)
+        self.corpus = MockCorpus(config)
+        self.stats = ServerStats()
+        self._active = 0
+        self._active_lock = threading.Lock()
+
+    @contextmanager
+    def admit(self) -> Iterator[bool]:
+        """Count a request as in progress; False if it exceeds ``capacity``."""
+        capacity = self.corpus.config.capacity
+        with self._active_lock:
+            admitted = not capacity or self._active < capacity
+            if admitted:
+                self._active += 1
+        try:
+            yield admitted
+        finally:
+            if admitted:
+                with self._active_lock:
+                    self._active -= 1
+
+    @property
+    def base_url(self) -> str:
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}"
+
+
+@contextmanager
+def run_mock_server(
+    config: Optional[MockConfig] = None, host: str = "127.0.0.1", port: int = 0
+) -> Iterator[MockServer]:
+    """Serve ``config``'s corpus on a background thread for the duration of the block."""
+    server = MockServer((host, port), config or MockConfig())
+    thread = threading.Thread(target=server.serve_forever, name="mock-austlii", daemon=True)
+    thread.start()
+    try:
+        yield server
+    finally:
+        server.shutdown()
+        server.server_close()
+        thread.join()
+
+
+def main(argv: "list[str] | None" = None) -> None:
+    parser = argparse.ArgumentParser(prog="python -m legalbot.mock_server")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8080)
+    defaults = MockConfig()
+    for name, value in vars(defaults).items():
+        parser.add_argument(f"--{name.replace('_', '-')}", type=type(value), default=value)
+    args = parser.parse_args(argv)
+    config = MockConfig(**{name: getattr(args, name) for name in vars(defaults)})
+    server = MockServer((args.host, args.port), config)
+    total = config.docs_per_page * len(JURISDICTIONS) * len(LEGISLATION_TYPES) * len(PAGES)
+    print(f"serving {total} documents at {server.base_url}", flush=True)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,58 @@
+"""Record types shared between scraper stages."""
+
+from __future__ import annotations
+
+from dataclasses import asdict, dataclass, field
+from typing import Any, Optional
+
+from .config import JURISDICTIONS, LEGISLATION_TYPES
+
+
+@dataclass(frozen=True)
+class IndexLink:
+    """A ``.card a`` element found on an index page."""
+
+    jurisdiction_abb: str
+    type: str
+    url: str
+    title: str
+
+
+@dataclass
+class LegislationRecord:
+    """One row of the legislation dataset described in planning.md."""
+
+    Type: str
+    JurisdictionAbb: str
+    Jurisdiction: str
+    Date: Optional[str]
+    Title: str
+    URL: str
+    ContentTypes: list[str] = field(default_factory=list)
+    DownloadURLs: list[Optional[str]] = field(default_factory=list)
+    DownloadSizes: list[Optional[str]] = field(default_factory=list)
+    Content: str = ""
+    whenScraped: str = ""
+    # Where Content came from: the chosen download's content type, or "HTML"
+    # for the .the-document fallback.  Not part of the planning.md schema.
+    ContentSource: str = ""
+    # SHA-256 of the normalised Content, set by legalbot.dedup; records that
+    # share it share one stored text.  Not part of the planning.md schema.
+    ContentHash: str = ""
+    # SHA-256 of the body Content was extracted from, in a legalbot.blobs
+    # store.  Not part of the planning.md schema.
+    BlobHash: str = ""
+
+    @classmethod
+    def from_link(cls, link: IndexLink) -> "LegislationRecord":
+        return cls(
+            Type=LEGISLATION_TYPES[link.type],
+            JurisdictionAbb=link.jurisdiction_abb,
+            Jurisdiction=JURISDICTIONS[link.jurisdiction_abb],
+            Date=None,
+            Title=link.title,
+            URL=link.url,
+        )
+
+    def to_dict(self) -> dict[str, Any]:
+        return asdict(self)
@@ -0,0 +1,198 @@
+"""Pluggable HTML parser backends.
+
+Each backend answers exactly the three selectors the scraper needs:
+``.card a`` and ``.side-download a`` as raw ``(href, text)`` pairs, and the
+plain text of ``.the-document``.  selectolax's lexbor engine is the fast
+path; BeautifulSoup is the fallback when selectolax is not installed.
+"""
+
+from __future__ import annotations
+
+import re
+from typing import Callable, Iterable, Optional, Protocol
+
+RawLink = tuple[str, str]
+
+# Elements that start a new line of ``.the-document`` text; everything else
+# is inline and flows into the surrounding line.
+BLOCK_TAGS = frozenset(
+    "address article aside blockquote br dd div dl dt footer form h1 h2 h3 h4 h5 h6 "
+    "header hr li main nav ol p pre section table tbody td tfoot th thead tr ul".split()
+)
+SKIP_TAGS = frozenset({"script", "style", "template", "noscript"})
+
+_SPACES = re.compile(r"\s+")
+
+
+class TextJoiner:
+    """Accumulate inline text fragments into rendered lines.
+
+    Whitespace inside a line is collapsed as a browser would; empty lines
+    are dropped.
+    """
+
+    def __init__(self) -> None:
+        self.lines: list[str] = []
+        self._current: list[str] = []
+
+    def add(self, fragment: str) -> None:
+        self._current.append(fragment)
+
+    def break_line(self) -> None:
+        if not self._current:
+            return
+        line = _SPACES.sub(" ", "".join(self._current)).strip()
+        self._current = []
+        if line:
+            self.lines.append(line)
+
+
+def join_fragments(fragments: Iterable[Optional[str]]) -> str:
+    """Render text fragments, with ``None`` marking block boundaries, as lines."""
+    joiner = TextJoiner()
+    for fragment in fragments:
+        if fragment is None:
+            joiner.break_line()
+        else:
+            joiner.add(fragment)
+    joiner.break_line()
+    return "\n".join(joiner.lines)
+
+
+class ParserBackend(Protocol):
+    name: str
+
+    def cards(self, html: str) -> list[RawLink]: ...
+
+    def downloads(self, html: str) -> list[RawLink]: ...
+
+    def document_text(self, html: str) -> Optional[str]: ...
+
+
+class SelectolaxBackend:
+    name = "selectolax"
+
+    def __init__(self) -> None:
+        from selectolax.lexbor import LexborHTMLParser
+
+        self._parse = LexborHTMLParser
+
+    def _links(self, html: str, selector: str) -> list[RawLink]:
+        links = []
+        for node in self._parse(html).css(selector):
+            href = node.attributes.get("href")
+            if href:
+                links.append((href, node.text(strip=True)))
+        return links
+
+    def cards(self, html: str) -> list[RawLink]:
+        return self._links(html, ".card a")
+
+    def downloads(self, html: str) -> list[RawLink]:
+        return self._links(html, ".side-download a")
+
+    def document_text(self, html: str) -> Optional[str]:
+        node = self._parse(html).css_first(".the-document")
+        if node is None:
+            return None
+        fragments: list[Optional[str]] = []
+        self._walk(node, fragments)
+        return join_fragments(fragments)
+
+    def _walk(self, node, fragments: list[Optional[str]]) -> None:
+        for child in node.iter(include_text=True):
+            tag = child.tag
+            if tag == "-text":
+                fragments.append(child.text_content)
+            elif tag in BLOCK_TAGS:
+                fragments.append(None)
+                self._walk(child, fragments)
+                fragments.append(None)
+            elif tag not in SKIP_TAGS and not tag.startswith("-"):
+                self._walk(child, fragments)
+
+
+class SoupBackend:
+    name = "bs4"
+
+    def __init__(self) -> None:
+        from bs4 import BeautifulSoup, NavigableString
+
+        self._string_type = NavigableString
+
+        try:
+            import lxml  # noqa: F401
+
+            features = "lxml"
+        except ImportError:
+            features = "html.parser"
+        self._parse: Callable = lambda html: BeautifulSoup(html, features)
+
+    def _links(self, html: str, selector: str) -> list[RawLink]:
+        links = []
+        for node in self._parse(html).select(selector):
+            href = node.get("href")
+            if href:
+                links.append((href, node.get_text(strip=True)))
+        return links
+
+    def cards(self, html: str) -> list[RawLink]:
+        return self._links(html, ".card a")
+
+    def downloads(self, html: str) -> list[RawLink]:
+        return self._links(html, ".side-download a")
+
+    def document_text(self, html: str) -> Optional[str]:
+        node = self._parse(html).select_one(".the-document")
+        if node is None:
+            return None
+        fragments: list[Optional[str]] = []
+        self._walk(node, fragments)
+        return join_fragments(fragments)
+
+    def _walk(self, node, fragments: list[Optional[str]]) -> None:
+        for child in node.children:
+            if isinstance(child, self._string_type):
+                # Comments, doctypes and CDATA are NavigableString subclasses.
+                if type(child) is self._string_type:
+                    fragments.append(str(child))
+            elif child.name in BLOCK_TAGS:
+                fragments.append(None)
+                self._walk(child, fragments)
+                fragments.append(None)
+            elif child.name not in SKIP_TAGS:
+                self._walk(child, fragments)
+
+
+BACKENDS: dict[str, Callable[[], ParserBackend]] = {
+    SelectolaxBackend.name: SelectolaxBackend,
+    SoupBackend.name: SoupBackend,
+}
+
+_active: Optional[ParserBackend] = None
+
+
+def get_backend(name: Optional[str] = None) -> ParserBackend:
+    """Return the named backend, or the first importable one in preference order."""
+    if name is not None:
+        return BACKENDS[name]()
+    for factory in BACKENDS.values():
+        try:
+            return factory()
+        except ImportError:
+            continue
+    raise ImportError("no HTML parser backend available; install selectolax or beautifulsoup4")
+
+
+def active_backend() -> ParserBackend:
+    global _active
+    if _active is None:
+        _active = get_backend()
+    return _active
+
+
+def use_backend(name: Optional[str]) -> ParserBackend:
+    """Select the backend used by :mod:`legalbot.parsing` for this process."""
+    global _active
+    _active = get_backend(name)
+    return _active
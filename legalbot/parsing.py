@@ -0,0 +1,76 @@
+"""HTML extraction for the selectors named in planning.md.
+
+Parsing is delegated to the backend chosen in :mod:`legalbot.parsers`.
+"""
+
+from __future__ import annotations
+
+import re
+from typing import NamedTuple, Optional
+from urllib.parse import urljoin
+
+from .config import BASE_URL
+from .parsers import RawLink, active_backend
+
+_LABEL_SIZE = re.compile(r"\(([\d.,]+\s*[KMG]?B)\)\s*$", re.IGNORECASE)
+_VERSION_DATE = re.compile(r"/(\d{4})(\d{2})(\d{2})\.\w+$")
+
+
+class DownloadLink(NamedTuple):
+    """A ``.side-download a`` element, e.g. ``RTF format (86.4 KB)``."""
+
+    url: str
+    content_type: str
+    size: Optional[str]
+
+
+def parse_download_label(label: str) -> tuple[str, Optional[str]]:
+    """Split anchor text into ``(content_type, size)``.
+
+    ``"Plain text (ASCII) (2.12 KB)"`` -> ``("Text", "2.12 KB")``.
+    """
+    match = _LABEL_SIZE.search(label)
+    size = match.group(1) if match else None
+    lowered = label.lower()
+    if "plain text" in lowered or "ascii" in lowered:
+        return "Text", size
+    if "rtf" in lowered:
+        return "RTF", size
+    if "pdf" in lowered:
+        return "PDF", size
+    name = label[: match.start()] if match else label
+    return name.replace("format", "").strip() or "Unknown", size
+
+
+def version_date(download_url: Optional[str]) -> Optional[str]:
+    """Return the ISO consolidation date embedded in a download filename, if any."""
+    if not download_url:
+        return None
+    match = _VERSION_DATE.search(download_url)
+    if not match:
+        return None
+    return "-".join(match.groups())
+
+
+def extract_cards(html: str, base_url: str = BASE_URL) -> list[tuple[str, str]]:
+    """Return ``(absolute_url, title)`` for every ``.card a`` element."""
+    return [(urljoin(base_url, href), title) for href, title in active_backend().cards(html)]
+
+
+def download_links(raw: list[RawLink], page_url: str) -> list[DownloadLink]:
+    """Resolve raw ``(href, label)`` pairs from ``.side-download a``."""
+    links = []
+    for href, label in raw:
+        content_type, size = parse_download_label(label)
+        links.append(DownloadLink(urljoin(page_url, href), content_type, size))
+    return links
+
+
+def extract_downloads(html: str, page_url: str) -> list[DownloadLink]:
+    """Return every ``.side-download a`` link on a legislation page."""
+    return download_links(active_backend().downloads(html), page_url)
+
+
+def extract_document_text(html: str) -> str:
+    """Return the plain text of ``.the-document``, or an empty string."""
+    return active_backend().document_text(html) or ""
@@ -0,0 +1,513 @@
+"""Streaming index -> legislation page -> download pipeline.
+
+Each stage runs its own worker pool and hands work to the next through a
+bounded queue, so downloads for early index letters start while later
+letters are still being crawled, and a slow consumer stalls the upstream
+stages instead of growing memory.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import functools
+import logging
+from contextlib import contextmanager
+from dataclasses import asdict, dataclass
+from datetime import datetime, timezone
+from typing import (
+    TYPE_CHECKING,
+    Any,
+    AsyncIterator,
+    Awaitable,
+    Callable,
+    Iterable,
+    Iterator,
+    Mapping,
+    Optional,
+)
+
+import httpx
+
+from .cache import HttpCache, fetch_cached
+from .config import BASE_URL, LEGISLATION_TYPES, IndexPage, index_pages
+from .crawler import crawl_index_pages
+from .formats import HTML_SOURCE, POLICIES, PageProgress, extract_content
+from .frontier import DOWNLOAD, INDEX, PAGE, Frontier
+from .http import HostLimiter, fetch_text, make_client
+from .metrics import (
+    DOCUMENT_FALLBACKS,
+    DOWNLOADS,
+    LEGISLATION_PAGES,
+    RECORDS,
+    RETRIES,
+    STAGE_SECONDS,
+)
+from .models import IndexLink, LegislationRecord
+from .parsing import (
+    DownloadLink,
+    download_links,
+    extract_document_text,
+    extract_downloads,
+    version_date,
+)
+from .politeness import AdaptiveLimiter, fetch_crawl_delay
+from .retry import DeadLetter, DeadLetterQueue, Retrier, RetryPolicy, error_class
+from .scheduler import ByteRateLimiter, DownloadOrder, DownloadQueue, sort_by_order
+from .sizes import size_bytes
+from .streaming import StreamingPageParser, stream_page
+
+if TYPE_CHECKING:
+    from .blobs import BlobStore
+
+logger = logging.getLogger(__name__)
+
+_DONE = object()
+
+# Fills the links and downloads queues for one run of the stages.
+_Producer = Callable[[asyncio.Queue, "DownloadQueue"], Awaitable[None]]
+
+
+@dataclass
+class PipelineConfig:
+    page_workers: int = 8
+    download_workers: int = 8
+    queue_size: int = 64
+    per_host: int = 8
+    # Steer each host's concurrency between 1 and max_per_host from response
+    # latency and 429/503s, starting at per_host; False keeps it fixed.
+    adaptive: bool = True
+    max_per_host: int = 32
+    # Space requests by the Crawl-delay in the site's robots.txt (adaptive only).
+    respect_robots: bool = True
+    # Negotiate HTTP/2 where the server offers it; HTTP/1.1 keep-alive otherwise.
+    http2: bool = True
+    base_url: str = BASE_URL
+    # Parse legislation pages from the response stream rather than buffering
+    # them.  Ignored when an HTTP cache or blob store is in use, which need
+    # whole bodies.
+    stream_pages: bool = True
+    download_order: DownloadOrder = DownloadOrder.FIFO
+    # Download budget in bytes per second, using the sizes advertised in
+    # ``.side-download a``; None for no limit.
+    byte_rate: Optional[float] = None
+    # Key into legalbot.formats.POLICIES.
+    format_policy: str = "prefer-text"
+    # Per error class; None for legalbot.retry.POLICIES.
+    retry_policies: Optional[Mapping[str, RetryPolicy]] = None
+    # With a blob store, False leaves Content out of records and has them
+    # refer to their body by BlobHash only.
+    inline_content: bool = True
+
+
+@dataclass
+class LegislationPage:
+    """The parts of a legislation page the scraper uses."""
+
+    downloads: list[DownloadLink]
+    # The download chosen by the format policy; None means ``.the-document``.
+    source: Optional[DownloadLink] = None
+    html: Optional[str] = None
+    streamed_text: Optional[str] = None
+
+    def document_text(self) -> str:
+        if self.streamed_text is not None:
+            return self.streamed_text
+        return extract_document_text(self.html or "")
+
+
+@dataclass
+class _PendingDownload:
+    record: LegislationRecord
+    link: DownloadLink
+
+    @property
+    def size_bytes(self) -> int:
+        return size_bytes(self.link.size)
+
+
+def _now() -> str:
+    return datetime.now(timezone.utc).isoformat(timespec="seconds")
+
+
+def build_record(link: IndexLink, downloads: list[DownloadLink]) -> LegislationRecord:
+    """Populate the metadata columns of a record from its download links."""
+    record = LegislationRecord.from_link(link)
+    for download in downloads:
+        record.ContentTypes.append(download.content_type)
+        record.DownloadURLs.append(download.url)
+        record.DownloadSizes.append(download.size)
+    record.Date = next(filter(None, map(version_date, record.DownloadURLs)), None)
+    return record
+
+
+def apply_document_fallback(record: LegislationRecord, page: LegislationPage) -> None:
+    """Fill ``Content`` from ``.the-document`` when no download was chosen."""
+    record.ContentTypes.append("Text")
+    record.DownloadURLs.append(None)
+    record.DownloadSizes.append(None)
+    record.Content = page.document_text()
+    record.ContentSource = HTML_SOURCE
+    DOCUMENT_FALLBACKS.inc()
+
+
+@contextmanager
+def page_stage() -> Iterator[None]:
+    """Time one legislation page's processing and count how it ended."""
+    with STAGE_SECONDS.time(stage="page"):
+        try:
+            yield
+        except Exception:
+            LEGISLATION_PAGES.inc(status="error")
+            raise
+    LEGISLATION_PAGES.inc(status="ok")
+
+
+class ScrapePipeline:
+    """Three-stage scrape with per-stage worker counts and bounded hand-off queues."""
+
+    def __init__(
+        self,
+        config: Optional[PipelineConfig] = None,
+        client: Optional[httpx.AsyncClient] = None,
+        limiter: Optional[HostLimiter] = None,
+        cache: Optional[HttpCache] = None,
+        skip_urls: Optional[set[str]] = None,
+        frontier: Optional[Frontier] = None,
+        dead_letters: Optional[DeadLetterQueue] = None,
+        blobs: Optional[BlobStore] = None,
+    ) -> None:
+        self.config = config or PipelineConfig()
+        self.client = client
+        if limiter is None:
+            config = self.config
+            limiter = (
+                AdaptiveLimiter(config.per_host, config.max_per_host)
+                if config.adaptive
+                else HostLimiter(config.per_host)
+            )
+        self.limiter = limiter
+        self.cache = cache
+        # Legislation URLs already persisted by an earlier, interrupted run.
+        self.skip_urls = skip_urls or set()
+        self.frontier = frontier
+        self.dead_letters = dead_letters
+        self.blobs = blobs
+        self.retrier = Retrier(self.config.retry_policies)
+        self.byte_budget = (
+            ByteRateLimiter(self.config.byte_rate) if self.config.byte_rate else None
+        )
+        self.policy = POLICIES[self.config.format_policy]()
+
+    async def fetch(self, url: str, stage: str = "other") -> str:
+        """Fetch a legislation page or download, revalidating against the cache if set."""
+        assert self.client is not None
+        if self.cache is not None:
+            return await fetch_cached(self.client, self.limiter, self.cache, url, stage)
+        return await fetch_text(self.client, self.limiter, url, stage)
+
+    async def read_page(self, url: str) -> LegislationPage:
+        """Fetch a legislation page and let the format policy pick its content source."""
+        if self.cache is None and self.blobs is None and self.config.stream_pages:
+            assert self.client is not None
+            decision: list[Optional[DownloadLink]] = []
+
+            def wants_document(parser: StreamingPageParser) -> bool:
+                progress = PageProgress(parser.content_length, parser.bytes_read)
+                decision.append(self.policy.choose(download_links(parser.downloads, url), progress))
+                return decision[-1] is None
+
+            parser = await stream_page(self.client, self.limiter, url, wants_document)
+            downloads = download_links(parser.downloads, url)
+            if not decision:
+                # No .side-download block; the whole page has been read.
+                read = parser.bytes_read
+                decision.append(self.policy.choose(downloads, PageProgress(read, read)))
+            return LegislationPage(
+                downloads, decision[-1], streamed_text=parser.document_text() or ""
+            )
+        html = await self.fetch(url, "page")
+        downloads = extract_downloads(html, url)
+        size = len(html.encode("utf-8"))
+        source = self.policy.choose(downloads, PageProgress(size, size))
+        return LegislationPage(downloads, source, html=html)
+
+    async def process_page(
+        self, link: IndexLink
+    ) -> tuple[LegislationRecord, Optional[DownloadLink]]:
+        """Stage 2: parse ``.side-download a``; falls back to ``.the-document``."""
+        with page_stage():
+            page = await self.read_page(link.url)
+            record = build_record(link, page.downloads)
+            if page.source is None:
+                await self.document_fallback(record, page)
+        return record, page.source
+
+    async def store_body(self, body: str) -> str:
+        """Put a fetched body in the blob store, returning its hash."""
+        assert self.blobs is not None
+        return await asyncio.to_thread(self.blobs.put_text, body)
+
+    async def document_fallback(self, record: LegislationRecord, page: LegislationPage) -> None:
+        apply_document_fallback(record, page)
+        if self.blobs is not None and page.html is not None:
+            record.BlobHash = await self.store_body(page.html)
+
+    async def process_download(self, pending: _PendingDownload) -> LegislationRecord:
+        """Stage 3: fetch the plain-text content."""
+        if self.byte_budget is not None:
+            await self.byte_budget.acquire(pending.size_bytes)
+        content_type = pending.link.content_type
+        with STAGE_SECONDS.time(stage="download"):
+            try:
+                body = await self.fetch(pending.link.url, "download")
+                if self.blobs is not None:
+                    pending.record.BlobHash = await self.store_body(body)
+                pending.record.Content = extract_content(pending.link, body)
+            except Exception:
+                DOWNLOADS.inc(content_type=content_type, status="error")
+                raise
+        DOWNLOADS.inc(content_type=content_type, status="ok")
+        pending.record.ContentSource = content_type
+        return pending.record
+
+    async def _resume_frontier(
+        self, pages: list[IndexPage], links: asyncio.Queue, downloads: DownloadQueue
+    ) -> list[IndexPage]:
+        """Queue work left over from an earlier run; return the index pages still to crawl."""
+        assert self.frontier is not None
+        self.frontier.seed_index(pages)
+        scope = {(p.jurisdiction_abb, p.type) for p in pages}
+        type_codes = {name: code for code, name in LEGISLATION_TYPES.items()}
+        resumed = [
+            _PendingDownload(record, download)
+            for record, download in self.frontier.pending_downloads()
+            if (record.JurisdictionAbb, type_codes[record.Type]) in scope
+            and record.URL not in self.skip_urls
+        ]
+        order = self.config.download_order
+        for pending in sort_by_order(resumed, order, lambda p: p.link.size):
+            await downloads.put(pending)
+        for link in self.frontier.pending_pages():
+            if (link.jurisdiction_abb, link.type) in scope and link.url not in self.skip_urls:
+                await links.put(link)
+        pending = {page.url for page in self.frontier.pending_index()}
+        return [page for page in pages if page.url in pending]
+
+    def _failed(
+        self,
+        stage: str,
+        url: str,
+        exc: BaseException,
+        attempts: int,
+        retry: Callable[[], Awaitable[None]],
+        payload: Any,
+    ) -> None:
+        """Schedule another attempt at failed work, or dead-letter it once its policy gives up."""
+        delay = self.retrier.delay(exc, attempts)
+        if delay is not None:
+            logger.info("%s %s: retry %d in %.1fs after %s", stage, url, attempts, delay, exc)
+            RETRIES.inc(stage=stage)
+            self.retrier.schedule(stage, delay, retry)
+            return
+        logger.error(
+            "%s %s failed after %d attempt(s): %s: %s",
+            stage,
+            url,
+            attempts,
+            type(exc).__name__,
+            exc,
+            exc_info=error_class(exc) == "other",
+        )
+        if self.frontier is not None:
+            self.frontier.fail(url, exc)
+        if self.dead_letters is not None:
+            self.dead_letters.add(stage, url, exc, attempts, payload)
+
+    async def _crawl(self, pages: list[IndexPage], links: asyncio.Queue, attempts: int = 1) -> None:
+        async for result in crawl_index_pages(
+            pages, client=self.client, limiter=self.limiter, base_url=self.config.base_url
+        ):
+            page = result.page
+            if result.error is not None:
+                retry = functools.partial(self._crawl, [page], links, attempts + 1)
+                self._failed(INDEX, page.url, result.error, attempts, retry, list(page))
+                continue
+            new_links = result.links
+            if self.frontier is not None:
+                new_links = self.frontier.complete_index(page, new_links)
+            for link in new_links:
+                if link.url not in self.skip_urls:
+                    await links.put(link)
+
+    async def _produce_links(
+        self, pages: Iterable[IndexPage], links: asyncio.Queue, downloads: DownloadQueue
+    ) -> None:
+        pages = list(pages)
+        if self.frontier is not None:
+            pages = await self._resume_frontier(pages, links, downloads)
+        await self._crawl(pages, links)
+        await self.retrier.drain(INDEX)
+
+    async def _produce_dead_letters(
+        self, letters: list[DeadLetter], links: asyncio.Queue, downloads: DownloadQueue
+    ) -> None:
+        pages = []
+        for letter in letters:
+            if letter.stage == INDEX:
+                pages.append(IndexPage(*letter.payload))
+            elif letter.stage == PAGE:
+                await links.put(IndexLink(**letter.payload["link"]))
+            elif letter.stage == DOWNLOAD:
+                record = LegislationRecord(**letter.payload["record"])
+                download = DownloadLink(*letter.payload["download"])
+                await downloads.put(_PendingDownload(record, download))
+        await self._crawl(pages, links)
+        await self.retrier.drain(INDEX)
+
+    async def _run_page(
+        self,
+        link: IndexLink,
+        downloads: DownloadQueue,
+        out: asyncio.Queue,
+        attempts: int = 1,
+    ) -> None:
+        try:
+            record, download = await self.process_page(link)
+        except Exception as exc:
+            retry = functools.partial(self._run_page, link, downloads, out, attempts + 1)
+            self._failed(PAGE, link.url, exc, attempts, retry, {"link": asdict(link)})
+            return
+        if download is None:
+            record.whenScraped = record.whenScraped or _now()
+            if self.frontier is not None:
+                self.frontier.done(link.url)
+            await out.put(record)
+        else:
+            if self.frontier is not None:
+                self.frontier.to_download(link.url, record, download)
+            await downloads.put(_PendingDownload(record, download))
+
+    async def _run_download(
+        self, pending: _PendingDownload, out: asyncio.Queue, attempts: int = 1
+    ) -> None:
+        try:
+            record = await self.process_download(pending)
+        except Exception as exc:
+            retry = functools.partial(self._run_download, pending, out, attempts + 1)
+            payload = {"record": pending.record.to_dict(), "download": list(pending.link)}
+            self._failed(DOWNLOAD, pending.record.URL, exc, attempts, retry, payload)
+            return
+        record.whenScraped = _now()
+        if self.frontier is not None:
+            self.frontier.done(record.URL)
+        await out.put(record)
+
+    async def _page_worker(
+        self, links: asyncio.Queue, downloads: DownloadQueue, out: asyncio.Queue
+    ) -> None:
+        while (link := await links.get()) is not _DONE:
+            await self._run_page(link, downloads, out)
+
+    async def _download_worker(self, downloads: DownloadQueue, out: asyncio.Queue) -> None:
+        while (pending := await downloads.get()) is not _DONE:
+            await self._run_download(pending, out)
+
+    async def _run_stages(self, produce: _Producer, out: asyncio.Queue) -> None:
+        if self.config.respect_robots and isinstance(self.limiter, AdaptiveLimiter):
+            assert self.client is not None
+            delay = await fetch_crawl_delay(self.client, self.config.base_url)
+            if delay:
+                logger.info("robots.txt crawl-delay: %ss", delay)
+                self.limiter.set_crawl_delay(self.config.base_url, delay)
+        size = self.config.queue_size
+        links: asyncio.Queue = asyncio.Queue(size)
+        downloads: DownloadQueue = DownloadQueue(
+            size, self.config.download_order, lambda pending: pending.size_bytes
+        )
+        page_workers = [
+            asyncio.create_task(self._page_worker(links, downloads, out))
+            for _ in range(self.config.page_workers)
+        ]
+        download_workers = [
+            asyncio.create_task(self._download_worker(downloads, out))
+            for _ in range(self.config.download_workers)
+        ]
+        try:
+            try:
+                await produce(links, downloads)
+            finally:
+                for _ in page_workers:
+                    await links.put(_DONE)
+            await asyncio.gather(*page_workers)
+            # Page retries run outside the workers and may still queue downloads.
+            await self.retrier.drain(PAGE)
+            for _ in download_workers:
+                await downloads.put_last(_DONE)
+            await asyncio.gather(*download_workers)
+            await self.retrier.drain(DOWNLOAD)
+        finally:
+            for task in page_workers + download_workers:
+                task.cancel()
+            self.retrier.cancel()
+            await out.put(_DONE)
+
+    async def _run(self, produce: _Producer) -> AsyncIterator[LegislationRecord]:
+        owns_client = self.client is None
+        if owns_client:
+            config = self.config
+            self.client = make_client(
+                max_connections=config.max_per_host if config.adaptive else config.per_host,
+                http2=config.http2,
+            )
+        out: asyncio.Queue = asyncio.Queue(self.config.queue_size)
+        runner = asyncio.create_task(self._run_stages(produce, out))
+        try:
+            while (record := await out.get()) is not _DONE:
+                RECORDS.inc()
+                if record.BlobHash and not self.config.inline_content:
+                    record.Content = ""
+                yield record
+            await runner
+        finally:
+            runner.cancel()
+            await asyncio.gather(runner, return_exceptions=True)
+            if owns_client:
+                await self.client.aclose()
+                self.client = None
+
+    async def run(
+        self, pages: Optional[Iterable[IndexPage]] = None
+    ) -> AsyncIterator[LegislationRecord]:
+        """Yield completed records in completion order."""
+        if pages is None:
+            pages = index_pages(base_url=self.config.base_url)
+        async for record in self._run(functools.partial(self._produce_links, pages)):
+            yield record
+
+    async def replay(self, letters: Iterable[DeadLetter]) -> AsyncIterator[LegislationRecord]:
+        """Send dead-lettered work back through the stage it failed in."""
+        letters = list(letters)
+        async for record in self._run(functools.partial(self._produce_dead_letters, letters)):
+            yield record
+
+
+async def scrape(
+    pages: Optional[Iterable[IndexPage]] = None,
+    config: Optional[PipelineConfig] = None,
+    cache: Optional[HttpCache] = None,
+    skip_urls: Optional[set[str]] = None,
+    frontier: Optional[Frontier] = None,
+    dead_letters: Optional[DeadLetterQueue] = None,
+    blobs: Optional[BlobStore] = None,
+) -> AsyncIterator[LegislationRecord]:
+    """Run a full scrape, yielding records as they complete."""
+    pipeline = ScrapePipeline(
+        config,
+        cache=cache,
+        skip_urls=skip_urls,
+        frontier=frontier,
+        dead_letters=dead_letters,
+        blobs=blobs,
+    )
+    async for record in pipeline.run(pages):
+        yield record
@@ -0,0 +1,248 @@
+"""Adaptive per-host concurrency with robots.txt crawl-delay.
+
+:class:`AdaptiveLimiter` is a drop-in :class:`~legalbot.http.HostLimiter`
+whose per-host window is steered AIMD-style, as in TCP congestion control:
+each healthy response grows the window by roughly one request per round
+trip, while a 429/503, a transport error or time-to-first-byte climbing
+well above the host's baseline shrinks it multiplicatively.  A 429's
+``Retry-After`` pauses new requests to the host (a 503's only delays the
+retry of that request, see :mod:`legalbot.retry`), and a robots.txt
+``Crawl-delay`` spaces request starts however large the window grows.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+import time
+from contextlib import asynccontextmanager
+from email.utils import parsedate_to_datetime
+from typing import AsyncIterator, Optional
+from urllib.parse import urljoin, urlsplit
+
+import httpx
+
+from .http import USER_AGENT, HostLimiter, Permit
+from .metrics import CONCURRENCY_LIMIT
+
+logger = logging.getLogger(__name__)
+
+# Responses that mean the host wants us to slow down.
+BACKOFF_STATUSES = frozenset({429, 503})
+
+
+def retry_after(response: httpx.Response) -> Optional[float]:
+    """Seconds asked for by a ``Retry-After`` header, in either of its forms."""
+    value = response.headers.get("Retry-After")
+    if not value:
+        return None
+    if value.strip().isdigit():
+        return float(value)
+    try:
+        when = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    return max(0.0, when.timestamp() - time.time())
+
+
+def crawl_delay(robots: str, user_agent: str = USER_AGENT) -> Optional[float]:
+    """The ``Crawl-delay`` a robots.txt body sets for ``user_agent``.
+
+    Parsed here rather than by :mod:`urllib.robotparser`, which ignores
+    fractional delays.  A group naming the agent wins over ``*``.
+    """
+    agent = user_agent.split("/", 1)[0].lower()
+    delays: dict[str, float] = {}
+    group: list[str] = []
+    in_agents = False
+    for line in robots.splitlines():
+        field, _, value = line.split("#", 1)[0].partition(":")
+        field, value = field.strip().lower(), value.strip()
+        if field == "user-agent":
+            if not in_agents:
+                group = []
+            group.append(value.lower())
+            in_agents = True
+            continue
+        in_agents = False
+        if field == "crawl-delay":
+            try:
+                delay = float(value)
+            except ValueError:
+                continue
+            for name in group:
+                delays.setdefault(name, delay)
+    for name, delay in delays.items():
+        if name != "*" and name in agent:
+            return delay
+    return delays.get("*")
+
+
+async def fetch_crawl_delay(
+    client: httpx.AsyncClient, base_url: str, user_agent: str = USER_AGENT
+) -> Optional[float]:
+    """Read the site's robots.txt; a missing or unreadable one imposes no delay."""
+    url = urljoin(base_url, "/robots.txt")
+    try:
+        response = await client.get(url)
+    except httpx.HTTPError as exc:
+        logger.warning("could not read %s: %s", url, exc)
+        return None
+    if response.status_code != 200:
+        return None
+    return crawl_delay(response.text, user_agent)
+
+
+class _HostWindow:
+    """Congestion state for one host."""
+
+    def __init__(self, host: str, initial: int, minimum: int, maximum: int) -> None:
+        self.host = host
+        self.limit = float(initial)
+        self.minimum = minimum
+        self.maximum = maximum
+        # Places taken in the window, and those of them past their start delay.
+        self.reserved = 0
+        self.active = 0
+        self.changed = asyncio.Condition()
+        self.crawl_delay = 0.0
+        # Earliest start for the next request: crawl-delay spacing or Retry-After.
+        self.next_start = 0.0
+        self.latency: Optional[float] = None
+        self.baseline: Optional[float] = None
+        self.last_decrease = 0.0
+        CONCURRENCY_LIMIT.set(self.limit, host=host)
+
+    @property
+    def window(self) -> int:
+        return max(self.minimum, int(self.limit))
+
+    async def acquire(self) -> float:
+        """Take a place in the window; return how long to wait before starting."""
+        async with self.changed:
+            await self.changed.wait_for(lambda: self.reserved < self.window)
+            self.reserved += 1
+        now = time.monotonic()
+        start = max(now, self.next_start)
+        self.next_start = start + self.crawl_delay
+        return start - now
+
+    def start(self) -> None:
+        """Count a request as in flight once its start delay has passed."""
+        self.active += 1
+
+    async def release(self, started: bool) -> None:
+        async with self.changed:
+            self.reserved -= 1
+            if started:
+                self.active -= 1
+            self.changed.notify_all()
+
+    def increase(self) -> None:
+        # Only grow a window that is actually being filled.  Requests still
+        # sleeping out a crawl-delay do not count, or a host held to one
+        # request per delay would look saturated.
+        if self.active >= self.window and self.limit < self.maximum:
+            self.limit = min(self.maximum, self.limit + 1 / self.limit)
+            CONCURRENCY_LIMIT.set(self.limit, host=self.host)
+
+    def decrease(self, factor: float) -> None:
+        # One cut per round trip, however many responses in the window complain.
+        now = time.monotonic()
+        if now - self.last_decrease < max(self.latency or 0.0, 0.5):
+            return
+        self.last_decrease = now
+        self.limit = max(float(self.minimum), self.limit * factor)
+        CONCURRENCY_LIMIT.set(self.limit, host=self.host)
+        logger.info("backing off %s to %d concurrent requests", self.host, self.window)
+
+    def pause(self, seconds: float) -> None:
+        self.next_start = max(self.next_start, time.monotonic() + seconds)
+
+
+class _AdaptivePermit(Permit):
+    def __init__(self, limiter: AdaptiveLimiter, window: _HostWindow) -> None:
+        self.limiter = limiter
+        self.window = window
+        self.started = time.monotonic()
+        self.observed = False
+
+    def observe(self, response: httpx.Response) -> None:
+        self.observed = True
+        self.limiter.on_response(self.window, response, time.monotonic() - self.started)
+
+
+class AdaptiveLimiter(HostLimiter):
+    """Per-host concurrency that tracks what the host can take.
+
+    The window starts at ``per_host`` and moves between ``min_per_host`` and
+    ``max_per_host``.  Latency is time to first byte, so large downloads do
+    not read as congestion.
+    """
+
+    def __init__(
+        self,
+        per_host: int = 8,
+        max_per_host: int = 32,
+        min_per_host: int = 1,
+        backoff: float = 0.5,
+        latency_tolerance: float = 2.0,
+    ) -> None:
+        super().__init__(per_host)
+        self.max_per_host = max(max_per_host, per_host)
+        self.min_per_host = min_per_host
+        self.backoff = backoff
+        self.latency_tolerance = latency_tolerance
+        self._windows: dict[str, _HostWindow] = {}
+
+    def _window(self, url: str) -> _HostWindow:
+        host = urlsplit(url).netloc
+        if host not in self._windows:
+            self._windows[host] = _HostWindow(
+                host, self.per_host, self.min_per_host, self.max_per_host
+            )
+        return self._windows[host]
+
+    def limit(self, url: str) -> int:
+        """The current concurrency window for ``url``'s host."""
+        return self._window(url).window
+
+    def set_crawl_delay(self, url: str, seconds: float) -> None:
+        """Space request starts to ``url``'s host at least ``seconds`` apart."""
+        self._window(url).crawl_delay = seconds
+
+    @asynccontextmanager
+    async def slot(self, url: str) -> AsyncIterator[Permit]:
+        window = self._window(url)
+        wait = await window.acquire()
+        started = False
+        try:
+            if wait > 0:
+                await asyncio.sleep(wait)
+            window.start()
+            started = True
+            permit = _AdaptivePermit(self, window)
+            yield permit
+        except httpx.TransportError:
+            if not permit.observed:
+                window.decrease(self.backoff)
+            raise
+        finally:
+            await window.release(started)
+
+    def on_response(self, window: _HostWindow, response: httpx.Response, seconds: float) -> None:
+        if response.status_code in BACKOFF_STATUSES:
+            window.decrease(self.backoff)
+            if response.status_code == 429 and (delay := retry_after(response)) is not None:
+                window.pause(delay)
+            return
+        window.latency = seconds if window.latency is None else 0.8 * window.latency + 0.2 * seconds
+        if window.baseline is None or window.latency < window.baseline:
+            window.baseline = window.latency
+        else:
+            # Let the baseline follow a host that is simply slower today.
+            window.baseline += 0.01 * (window.latency - window.baseline)
+        if window.latency > self.latency_tolerance * window.baseline:
+            window.decrease(1 - (1 - self.backoff) / 2)
+        else:
+            window.increase()
@@ -0,0 +1,173 @@
+"""Retry policies and the dead-letter queue.
+
+Failures are sorted into error classes, each with its own
+:class:`RetryPolicy`: throttling and server errors are worth several
+patient attempts, a 404 or a document that will not parse is not.  A
+retry waits out a full-jitter exponential backoff (never less than the
+server's ``Retry-After``) in a background task rather than in the worker,
+so the stage keeps draining its queue meanwhile.  Work that runs out of
+attempts goes to a :class:`DeadLetterQueue`, a JSONL file that
+``python -m legalbot replay`` feeds back through the pipeline later.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import json
+import logging
+import os
+import random
+import time
+from collections import defaultdict
+from contextlib import contextmanager
+from dataclasses import asdict, dataclass
+from pathlib import Path
+from typing import Any, Awaitable, Callable, Iterator, Mapping, Optional
+
+import httpx
+
+from .politeness import BACKOFF_STATUSES, retry_after
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass(frozen=True)
+class RetryPolicy:
+    attempts: int = 1
+    base_delay: float = 1.0
+    max_delay: float = 60.0
+
+    def backoff(self, attempt: int) -> float:
+        """Full-jitter delay before retry number ``attempt`` (1-based)."""
+        return random.uniform(0, min(self.max_delay, self.base_delay * 2 ** (attempt - 1)))
+
+
+POLICIES: Mapping[str, RetryPolicy] = {
+    "throttled": RetryPolicy(attempts=6, base_delay=2.0, max_delay=120.0),
+    "server": RetryPolicy(attempts=4, base_delay=1.0, max_delay=60.0),
+    "timeout": RetryPolicy(attempts=4, base_delay=2.0, max_delay=60.0),
+    "network": RetryPolicy(attempts=5, base_delay=0.5, max_delay=30.0),
+    # 4xx responses and parse errors fail the same way every time.
+    "client": RetryPolicy(attempts=1),
+    "other": RetryPolicy(attempts=1),
+}
+
+
+def error_class(exc: BaseException) -> str:
+    """The :data:`POLICIES` key for ``exc``."""
+    if isinstance(exc, httpx.HTTPStatusError):
+        status = exc.response.status_code
+        if status in BACKOFF_STATUSES:
+            return "throttled"
+        if status == 408:
+            return "timeout"
+        return "server" if status >= 500 else "client"
+    if isinstance(exc, httpx.TimeoutException):
+        return "timeout"
+    if isinstance(exc, httpx.TransportError):
+        return "network"
+    return "other"
+
+
+class Retrier:
+    """Schedules retries as background tasks, tracked per stage."""
+
+    def __init__(self, policies: Optional[Mapping[str, RetryPolicy]] = None) -> None:
+        self.policies = POLICIES if policies is None else policies
+        self._tasks: dict[str, set[asyncio.Task]] = defaultdict(set)
+
+    def delay(self, exc: BaseException, attempts: int) -> Optional[float]:
+        """Seconds to wait before trying again after ``attempts`` failures; None to give up."""
+        policy = self.policies.get(error_class(exc), self.policies["other"])
+        if attempts >= policy.attempts:
+            return None
+        delay = policy.backoff(attempts)
+        if isinstance(exc, httpx.HTTPStatusError):
+            delay = max(delay, retry_after(exc.response) or 0.0)
+        return delay
+
+    def schedule(self, stage: str, delay: float, retry: Callable[[], Awaitable[None]]) -> None:
+        async def later() -> None:
+            await asyncio.sleep(delay)
+            await retry()
+
+        task = asyncio.create_task(later())
+        self._tasks[stage].add(task)
+        task.add_done_callback(self._tasks[stage].discard)
+
+    async def drain(self, stage: str) -> None:
+        """Wait until ``stage`` has no retries outstanding, including ones scheduled meanwhile."""
+        while self._tasks[stage]:
+            await asyncio.gather(*self._tasks[stage])
+
+    def cancel(self) -> None:
+        for tasks in self._tasks.values():
+            for task in tasks:
+                task.cancel()
+
+
+@dataclass
+class DeadLetter:
+    stage: str
+    url: str
+    error_class: str
+    error: str
+    attempts: int
+    # The work item in the frontier's payload format, enough to replay it.
+    payload: Any
+    failed_at: float = 0.0
+
+
+class DeadLetterQueue:
+    """Append-only JSONL file of work that ran out of retries."""
+
+    def __init__(self, path: "str | os.PathLike[str]") -> None:
+        self.path = Path(path)
+        self.added = 0
+
+    def add(self, stage: str, url: str, exc: BaseException, attempts: int, payload: Any) -> None:
+        error = f"{type(exc).__name__}: {exc}"
+        letter = DeadLetter(stage, url, error_class(exc), error, attempts, payload, time.time())
+        line = json.dumps(asdict(letter), ensure_ascii=False) + "\n"
+        with open(self.path, "a+b") as fh:
+            # Start a fresh line if a crash left the last entry half written.
+            if fh.tell():
+                fh.seek(-1, os.SEEK_END)
+                if fh.read(1) != b"\n":
+                    line = "\n" + line
+            fh.write(line.encode("utf-8"))
+        self.added += 1
+
+    def __iter__(self) -> Iterator[DeadLetter]:
+        yield from _read(self.path)
+
+    @contextmanager
+    def replay(self) -> Iterator[list[DeadLetter]]:
+        """Take every entry out of the queue for the duration of the block.
+
+        Failures during the replay are added back as new entries.  If the
+        block does not complete, the taken entries are kept aside and
+        offered again by the next replay.
+        """
+        taken = self.path.with_name(self.path.name + ".replay")
+        if self.path.exists():
+            with open(self.path, "rb") as src, open(taken, "ab") as dst:
+                dst.write(src.read())
+            self.path.unlink()
+        yield list(_read(taken))
+        taken.unlink(missing_ok=True)
+
+
+def _read(path: Path) -> Iterator[DeadLetter]:
+    if not path.exists():
+        return
+    with open(path, encoding="utf-8") as fh:
+        for line in fh:
+            if not line.strip():
+                continue
+            try:
+                data = json.loads(line)
+            except ValueError:
+                logger.warning("skipping a torn dead letter in %s", path)
+                continue
+            yield DeadLetter(**data)
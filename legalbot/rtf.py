@@ -0,0 +1,115 @@
+"""Minimal RTF to plain text conversion.
+
+Handles what AustLII's consolidated RTF downloads use: groups, paragraph
+and line breaks, tabs, ``\\'hh`` and ``\\uN`` escapes, and skipping of
+font/colour/style tables, pictures and other ignorable destinations.
+"""
+
+from __future__ import annotations
+
+import re
+
+_TOKEN = re.compile(
+    r"\\([a-zA-Z]+)(-?\d+)? ?"  # control word with optional numeric parameter
+    r"|\\'([0-9a-fA-F]{2})"  # hex-escaped byte
+    r"|\\([^a-zA-Z])"  # control symbol
+    r"|([{}])"  # group delimiters
+    r"|[\r\n]+"  # raw line breaks are not content
+    r"|([^\\{}\r\n]+)"  # plain text
+)
+
+_SKIP_DESTINATIONS = frozenset(
+    "fonttbl colortbl stylesheet info pict object header footer headerl headerr headerf "
+    "footerl footerr footerf listtable listoverridetable rsidtbl generator xmlnstbl "
+    "themedata colorschememapping latentstyles datastore fldinst pgdsctbl revtbl "
+    "bkmkstart bkmkend".split()
+)
+
+_BREAKS = {
+    "par": "\n",
+    "line": "\n",
+    "sect": "\n",
+    "page": "\n",
+    "row": "\n",
+    "tab": "\t",
+    "cell": "\t",
+}
+_SPECIALS = {
+    "emdash": "\u2014",
+    "endash": "\u2013",
+    "lquote": "\u2018",
+    "rquote": "\u2019",
+    "ldblquote": "\u201c",
+    "rdblquote": "\u201d",
+    "bullet": "\u2022",
+    "emspace": " ",
+    "enspace": " ",
+}
+
+
+def rtf_to_text(rtf: str, encoding: str = "cp1252") -> str:
+    """Return the plain text of an RTF document."""
+    out: list[str] = []
+    stack: list[tuple[bool, int]] = []
+    skipping = False
+    uc = 1  # characters to skip after a \uN escape
+    pending_skip = 0
+    hex_bytes = bytearray()
+
+    def flush_hex() -> None:
+        if hex_bytes:
+            out.append(hex_bytes.decode(encoding, errors="replace"))
+            hex_bytes.clear()
+
+    for match in _TOKEN.finditer(rtf):
+        word, param, hex_byte, symbol, brace, text = match.groups()
+        if hex_byte is None:
+            flush_hex()
+        if pending_skip and (hex_byte is not None or text is not None):
+            if text is not None and len(text) > pending_skip:
+                text = text[pending_skip:]
+                pending_skip = 0
+            else:
+                pending_skip -= 1 if hex_byte is not None else len(text or "")
+                pending_skip = max(pending_skip, 0)
+                continue
+
+        if brace == "{":
+            stack.append((skipping, uc))
+        elif brace == "}":
+            if stack:
+                skipping, uc = stack.pop()
+        elif symbol is not None:
+            if symbol == "*":
+                skipping = True
+            elif not skipping:
+                if symbol in "\\{}":
+                    out.append(symbol)
+                elif symbol == "~":
+                    out.append("\u00a0")
+                elif symbol in "-_":
+                    out.append("-" if symbol == "_" else "")
+        elif word is not None:
+            if word in _SKIP_DESTINATIONS:
+                skipping = True
+            elif word == "uc" and param is not None:
+                uc = int(param)
+            elif skipping:
+                continue
+            elif word == "u" and param is not None:
+                code = int(param)
+                out.append(chr(code + 65536 if code < 0 else code))
+                pending_skip = uc
+            elif word in _BREAKS:
+                out.append(_BREAKS[word])
+            elif word in _SPECIALS:
+                out.append(_SPECIALS[word])
+        elif hex_byte is not None:
+            if not skipping:
+                hex_bytes.append(int(hex_byte, 16))
+        elif text is not None and not skipping:
+            out.append(text)
+    flush_hex()
+
+    lines = ("".join(out)).split("\n")
+    return "\n".join(line.rstrip() for line in lines).strip("\n")
@@ -0,0 +1,123 @@
+"""Size-aware ordering and byte-rate budgeting for the download stage.
+
+``.side-download a`` labels give each file's size before it is fetched.
+:class:`DownloadQueue` uses that to hand the next download to whichever
+worker frees up first, largest-first (LPT, which keeps one huge act from
+becoming the tail of the run) or smallest-first (shortest-job-first, which
+maximizes documents completed early).  :class:`ByteRateLimiter` budgets
+bytes per second rather than requests.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import itertools
+import time
+from enum import Enum
+from typing import Any, Callable, Generic, Optional, TypeVar
+
+import numpy as np
+
+from .sizes import MISSING, parse_sizes
+
+T = TypeVar("T")
+
+# Assumed size of downloads whose label carried no size.
+DEFAULT_SIZE = 64 * 1024
+
+
+class DownloadOrder(str, Enum):
+    FIFO = "fifo"
+    LARGEST_FIRST = "largest-first"
+    SMALLEST_FIRST = "smallest-first"
+
+
+class DownloadQueue(Generic[T]):
+    """Bounded queue that releases items in :class:`DownloadOrder`.
+
+    Items added with :meth:`put_last` (shutdown sentinels) are released only
+    after every sized item.
+    """
+
+    def __init__(
+        self,
+        maxsize: int,
+        order: DownloadOrder,
+        size_of: Callable[[T], int],
+    ) -> None:
+        self.order = DownloadOrder(order)
+        self._size_of = size_of
+        self._queue: asyncio.PriorityQueue = asyncio.PriorityQueue(maxsize)
+        self._seq = itertools.count()
+
+    def _rank(self, item: T) -> int:
+        if self.order is DownloadOrder.FIFO:
+            return 0
+        size = self._size_of(item)
+        if size == MISSING:
+            size = DEFAULT_SIZE
+        return -size if self.order is DownloadOrder.LARGEST_FIRST else size
+
+    async def put(self, item: T) -> None:
+        await self._queue.put((0, self._rank(item), next(self._seq), item))
+
+    async def put_last(self, item: Any) -> None:
+        await self._queue.put((1, 0, next(self._seq), item))
+
+    async def get(self) -> T:
+        return (await self._queue.get())[-1]
+
+    def qsize(self) -> int:
+        return self._queue.qsize()
+
+
+class ByteRateLimiter:
+    """Token bucket measured in bytes.
+
+    A download waits until the bucket holds its size.  One larger than the
+    bucket is admitted once the bucket is full and drives it negative, so
+    later downloads wait for the debt to clear.
+    """
+
+    def __init__(self, bytes_per_second: float, burst: Optional[float] = None) -> None:
+        if bytes_per_second <= 0:
+            raise ValueError("bytes_per_second must be positive")
+        self.rate = float(bytes_per_second)
+        self.capacity = float(burst if burst is not None else bytes_per_second)
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    async def acquire(self, nbytes: int) -> None:
+        if nbytes == MISSING:
+            nbytes = DEFAULT_SIZE
+        needed = min(nbytes, self.capacity)
+        async with self._lock:
+            self._refill()
+            if self._tokens < needed:
+                await asyncio.sleep((needed - self._tokens) / self.rate)
+                self._refill()
+            self._tokens -= nbytes
+
+
+def sort_by_order(
+    items: list[T], order: DownloadOrder, size_of: Callable[[T], Optional[str]]
+) -> list[T]:
+    """Order a known batch of downloads (e.g. resumed from the frontier) up front.
+
+    ``size_of`` gives each item's size label; the batch is parsed in one
+    :func:`~legalbot.sizes.parse_sizes` call.
+    """
+    order = DownloadOrder(order)
+    if order is DownloadOrder.FIFO or not items:
+        return list(items)
+    sizes = parse_sizes([size_of(item) for item in items])
+    sizes = np.where(sizes == MISSING, DEFAULT_SIZE, sizes)
+    if order is DownloadOrder.LARGEST_FIRST:
+        sizes = -sizes
+    return [items[i] for i in np.argsort(sizes, kind="stable")]
@@ -0,0 +1,130 @@
+"""Vectorized parsing of ``DownloadSizes`` and ``.side-download a`` labels.
+
+Sizes arrive as strings such as ``"86.4 KB"`` or, inside anchor text,
+``"Plain text (ASCII) (2.12 KB)"``.  These helpers convert whole columns at
+once with Arrow compute kernels and return NumPy arrays, so scheduling and
+reporting never loop over rows in Python.  Units are binary (1 KB = 1024 B),
+and unparseable or missing sizes become ``-1``.
+"""
+
+from __future__ import annotations
+
+import re
+from enum import IntEnum
+from typing import Optional, Sequence, Union
+
+import numpy as np
+import pyarrow as pa
+import pyarrow.compute as pc
+
+MISSING = -1
+
+UNITS = {"B": 1, "KB": 1024, "MB": 1024**2, "GB": 1024**3}
+
+# The number must stand alone: "1.2.3 KB" is malformed, not 2.3 KB.  Arrow's
+# RE2 has no lookbehind, hence the non-capturing prefix.
+_SIZE_PATTERN = r"(?:^|[^\d.,])(?P<value>\d[\d,]*(?:\.\d+)?)\s*(?P<unit>[KMG]?B)\)?\s*$"
+_SIZE_RE = re.compile(_SIZE_PATTERN)
+
+StringColumn = Union[Sequence[Optional[str]], pa.Array, pa.ChunkedArray]
+
+
+class ContentFormat(IntEnum):
+    UNKNOWN = 0
+    TEXT = 1
+    RTF = 2
+    PDF = 3
+
+
+# First match wins, mirroring legalbot.parsing.parse_download_label.
+_FORMAT_PATTERNS = (
+    (ContentFormat.TEXT, r"plain text|ascii|^text$"),
+    (ContentFormat.RTF, r"rtf"),
+    (ContentFormat.PDF, r"pdf"),
+)
+
+
+def _as_array(values: StringColumn) -> pa.Array:
+    if isinstance(values, pa.ChunkedArray):
+        values = values.combine_chunks()
+    if not isinstance(values, pa.Array):
+        values = pa.array(values, type=pa.string())
+    if pa.types.is_dictionary(values.type):
+        values = values.dictionary_decode()
+    return values
+
+
+def parse_sizes(values: StringColumn) -> np.ndarray:
+    """Convert size strings (bare or embedded in a label) to an int64 byte array."""
+    array = _as_array(values)
+    upper = pc.utf8_upper(array)
+    parts = pc.extract_regex(upper, _SIZE_PATTERN)
+    number = pc.replace_substring(pc.struct_field(parts, "value"), ",", "")
+    number = pc.cast(number, pa.float64())
+    unit = pc.struct_field(parts, "unit")
+    factor = pc.take(
+        pa.array(list(UNITS.values()), pa.float64()),
+        pc.index_in(unit, value_set=pa.array(list(UNITS))),
+    )
+    result = pc.round(pc.multiply(number, factor))
+    return np.asarray(
+        pc.fill_null(pc.cast(result, pa.int64(), safe=False), MISSING), dtype=np.int64
+    )
+
+
+def size_bytes(value: Optional[str]) -> int:
+    """Scalar :func:`parse_sizes` for code that sees one size at a time."""
+    match = _SIZE_RE.search(value.upper()) if value else None
+    if match is None:
+        return MISSING
+    return round(float(match["value"].replace(",", "")) * UNITS[match["unit"]])
+
+
+def parse_formats(labels: StringColumn) -> np.ndarray:
+    """Classify anchor text or ``ContentTypes`` values into :class:`ContentFormat` codes."""
+    lowered = pc.fill_null(pc.utf8_lower(_as_array(labels)), "")
+    conditions = [
+        np.asarray(pc.match_substring_regex(lowered, pattern), dtype=bool)
+        for _, pattern in _FORMAT_PATTERNS
+    ]
+    choices = [np.int8(fmt) for fmt, _ in _FORMAT_PATTERNS]
+    return np.select(conditions, choices, default=np.int8(ContentFormat.UNKNOWN)).astype(np.int8)
+
+
+def parse_labels(labels: StringColumn) -> tuple[np.ndarray, np.ndarray]:
+    """``(bytes, formats)`` for a column of ``.side-download a`` anchor texts."""
+    return parse_sizes(labels), parse_formats(labels)
+
+
+def parse_size_lists(
+    sizes: Union[Sequence[Sequence[Optional[str]]], pa.ListArray, pa.ChunkedArray],
+) -> tuple[np.ndarray, np.ndarray]:
+    """Flatten a ``DownloadSizes`` list column.
+
+    Returns ``(parents, bytes)``: the row index each size came from and the
+    parsed byte count, suitable for ``np.bincount``/``np.add.at`` reductions.
+    """
+    if isinstance(sizes, pa.ChunkedArray):
+        sizes = sizes.combine_chunks()
+    if not isinstance(sizes, pa.Array):
+        sizes = pa.array(sizes, type=pa.list_(pa.string()))
+    parents = np.asarray(pc.list_parent_indices(sizes), dtype=np.int64)
+    return parents, parse_sizes(pc.list_flatten(sizes))
+
+
+def bytes_by_format(
+    sizes: Union[Sequence[Sequence[Optional[str]]], pa.ListArray, pa.ChunkedArray],
+    content_types: Union[Sequence[Sequence[Optional[str]]], pa.ListArray, pa.ChunkedArray],
+    fmt: ContentFormat,
+) -> np.ndarray:
+    """Per-row size of the ``fmt`` download, or ``-1`` where a row has none."""
+    if isinstance(content_types, pa.ChunkedArray):
+        content_types = content_types.combine_chunks()
+    if not isinstance(content_types, pa.Array):
+        content_types = pa.array(content_types, type=pa.list_(pa.string()))
+    parents, values = parse_size_lists(sizes)
+    formats = parse_formats(pc.list_flatten(content_types))
+    result = np.full(len(content_types), MISSING, dtype=np.int64)
+    mask = formats == fmt
+    result[parents[mask]] = values[mask]
+    return result
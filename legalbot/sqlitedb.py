@@ -0,0 +1,55 @@
+"""SQLite plumbing shared by the frontier and the token and embedding caches.
+
+Each store is one file opened in autocommit mode with WAL journaling, so
+readers never block the writer.  In autocommit mode every statement, and
+every row of an ``executemany``, commits on its own; writes that must land
+together go in a :func:`transaction`, which a crash leaves either whole or
+absent.  Lookups of many keys at once go through :func:`select_in`, which
+keeps every statement under SQLite's limit on bound parameters.
+"""
+
+from __future__ import annotations
+
+import os
+import sqlite3
+from contextlib import contextmanager
+from typing import Iterator, Sequence
+
+# Older SQLite builds bind at most 999 parameters per statement.
+MAX_KEYS = 500
+
+
+def connect(path: "str | os.PathLike[str]", schema: str) -> sqlite3.Connection:
+    """Open the database at ``path`` and create ``schema``'s tables if missing."""
+    db = sqlite3.connect(path, isolation_level=None)
+    db.execute("PRAGMA journal_mode=WAL")
+    db.execute("PRAGMA synchronous=NORMAL")
+    db.executescript(schema)
+    return db
+
+
+@contextmanager
+def transaction(db: sqlite3.Connection) -> Iterator[sqlite3.Connection]:
+    """Run the block's statements as one transaction, rolled back if the block raises.
+
+    ``with db:`` does not do this for a connection in autocommit mode.
+    """
+    db.execute("BEGIN")
+    try:
+        yield db
+    except BaseException:
+        db.execute("ROLLBACK")
+        raise
+    db.execute("COMMIT")
+
+
+def select_in(
+    db: sqlite3.Connection, query: str, params: Sequence, keys: Sequence
+) -> Iterator[tuple]:
+    """Rows of ``query`` for ``keys``, whose ``IN ({})`` is filled in per batch of keys.
+
+    ``params`` are bound before the keys of each batch.
+    """
+    for start in range(0, len(keys), MAX_KEYS):
+        batch = keys[start : start + MAX_KEYS]
+        yield from db.execute(query.format(", ".join("?" * len(batch))), (*params, *batch))
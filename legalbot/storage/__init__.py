@@ -0,0 +1 @@
+"""Persistence formats for the legislation dataset."""
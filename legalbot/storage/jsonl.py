@@ -0,0 +1,183 @@
+"""Append-only, sharded, gzip-compressed JSONL storage with checkpoints.
+
+Records are buffered in small batches.  Each batch is appended to the
+current shard as a complete gzip member and fsync'd, then ``checkpoint.json``
+is atomically replaced to record the committed byte offset.  After a crash
+the shard is truncated back to that offset, discarding any partial member,
+and the URLs already committed are skipped by the resumed scrape.
+"""
+
+from __future__ import annotations
+
+import gzip
+import io
+import json
+import logging
+import os
+from pathlib import Path
+from typing import Iterator, Optional
+
+from ..models import LegislationRecord
+
+logger = logging.getLogger(__name__)
+
+CHECKPOINT = "checkpoint.json"
+
+
+def _shard_name(index: int) -> str:
+    return f"shard-{index:05d}.jsonl.gz"
+
+
+def _fsync_dir(path: Path) -> None:
+    try:
+        fd = os.open(path, os.O_RDONLY)
+    except OSError:
+        return
+    try:
+        os.fsync(fd)
+    except OSError:
+        pass
+    finally:
+        os.close(fd)
+
+
+def read_checkpoint(directory: "str | os.PathLike[str]") -> Optional[dict]:
+    try:
+        with open(Path(directory) / CHECKPOINT, encoding="utf-8") as fh:
+            return json.load(fh)
+    except FileNotFoundError:
+        return None
+
+
+class ShardedJsonlWriter:
+    """Append records to ``directory/shard-NNNNN.jsonl.gz`` in checkpointed batches."""
+
+    def __init__(
+        self,
+        directory: "str | os.PathLike[str]",
+        checkpoint_every: int = 100,
+        shard_records: int = 5000,
+        compresslevel: int = 6,
+    ) -> None:
+        self.directory = Path(directory)
+        self.checkpoint_every = checkpoint_every
+        self.shard_records = shard_records
+        self.compresslevel = compresslevel
+        self.directory.mkdir(parents=True, exist_ok=True)
+
+        state = read_checkpoint(self.directory) or {
+            "shard": 0,
+            "offset": 0,
+            "shard_records": 0,
+            "records": 0,
+        }
+        self.shard: int = state["shard"]
+        self.offset: int = state["offset"]
+        self.records_in_shard: int = state["shard_records"]
+        self.records: int = state["records"]
+        self._buffer: list[str] = []
+        self._recover()
+
+    def _recover(self) -> None:
+        """Truncate the current shard to the last committed offset and drop later shards."""
+        path = self.directory / _shard_name(self.shard)
+        if path.exists() and path.stat().st_size != self.offset:
+            logger.warning("discarding uncommitted tail of %s", path)
+            with open(path, "r+b") as fh:
+                fh.truncate(self.offset)
+        for stray in self.directory.glob("shard-*.jsonl.gz"):
+            if int(stray.name[6:11]) > self.shard:
+                stray.unlink()
+
+    def write(self, record: LegislationRecord) -> None:
+        self._buffer.append(json.dumps(record.to_dict(), ensure_ascii=False))
+        if len(self._buffer) >= self.checkpoint_every:
+            self.commit()
+
+    def commit(self) -> None:
+        """Durably append the buffered records and advance the checkpoint."""
+        if not self._buffer:
+            return
+        if self.records_in_shard >= self.shard_records:
+            self.shard += 1
+            self.offset = 0
+            self.records_in_shard = 0
+        member = gzip.compress(
+            ("\n".join(self._buffer) + "\n").encode("utf-8"), compresslevel=self.compresslevel
+        )
+        path = self.directory / _shard_name(self.shard)
+        with open(path, "ab") as fh:
+            fh.write(member)
+            fh.flush()
+            os.fsync(fh.fileno())
+        self.offset += len(member)
+        self.records_in_shard += len(self._buffer)
+        self.records += len(self._buffer)
+        self._buffer = []
+        self._write_checkpoint()
+
+    def _write_checkpoint(self) -> None:
+        state = {
+            "shard": self.shard,
+            "offset": self.offset,
+            "shard_records": self.records_in_shard,
+            "records": self.records,
+        }
+        tmp = self.directory / (CHECKPOINT + ".tmp")
+        with open(tmp, "w", encoding="utf-8") as fh:
+            json.dump(state, fh)
+            fh.flush()
+            os.fsync(fh.fileno())
+        os.replace(tmp, self.directory / CHECKPOINT)
+        _fsync_dir(self.directory)
+
+    def close(self) -> None:
+        self.commit()
+
+    def __enter__(self) -> "ShardedJsonlWriter":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+
+class _Limited(io.RawIOBase):
+    """Read at most ``limit`` bytes of ``fh``."""
+
+    def __init__(self, fh: io.BufferedReader, limit: Optional[int]) -> None:
+        self._fh = fh
+        self._remaining = limit
+
+    def readable(self) -> bool:
+        return True
+
+    def readinto(self, buffer) -> int:
+        view = memoryview(buffer)
+        if self._remaining is not None:
+            view = view[: self._remaining]
+        count = self._fh.readinto(view)
+        if self._remaining is not None:
+            self._remaining -= count
+        return count
+
+
+def iter_records(directory: "str | os.PathLike[str]") -> Iterator[LegislationRecord]:
+    """Yield every committed record, ignoring anything past the checkpoint."""
+    directory = Path(directory)
+    state = read_checkpoint(directory)
+    if state is None:
+        return
+    for index in range(state["shard"] + 1):
+        path = directory / _shard_name(index)
+        if not path.exists():
+            continue
+        limit = state["offset"] if index == state["shard"] else None
+        with open(path, "rb") as raw, gzip.GzipFile(fileobj=_Limited(raw, limit)) as lines:
+            for line in lines:
+                if line.strip():
+                    yield LegislationRecord(**json.loads(line))
+
+
+def committed_urls(directory: "str | os.PathLike[str]") -> set[str]:
+    """URLs of records already committed, for skipping on resume."""
+    return {record.URL for record in iter_records(directory)}
@@ -0,0 +1,240 @@
+"""Partitioned Parquet storage for the legislation dataset.
+
+Rows are written under hive-style ``JurisdictionAbb=.../Type=...``
+directories.  Low-cardinality string columns are dictionary encoded and the
+per-download arrays are list columns, so metadata queries can read
+everything except ``Content`` and never touch the document text.
+"""
+
+from __future__ import annotations
+
+import os
+import uuid
+from collections import OrderedDict
+from datetime import date, datetime
+from typing import Iterable, Iterator, Optional, Sequence
+
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.dataset as ds
+import pyarrow.parquet as pq
+
+from ..config import JURISDICTIONS, LEGISLATION_TYPES
+from ..models import LegislationRecord
+
+PARTITION_COLUMNS = ("JurisdictionAbb", "Type")
+
+_category = pa.dictionary(pa.int8(), pa.string())
+
+SCHEMA = pa.schema(
+    [
+        pa.field("Type", _category, nullable=False),
+        pa.field("JurisdictionAbb", _category, nullable=False),
+        pa.field("Jurisdiction", _category, nullable=False),
+        pa.field("Date", pa.date32()),
+        pa.field("Title", pa.string(), nullable=False),
+        pa.field("URL", pa.string(), nullable=False),
+        pa.field("ContentTypes", pa.list_(_category)),
+        pa.field("DownloadURLs", pa.list_(pa.string())),
+        pa.field("DownloadSizes", pa.list_(pa.string())),
+        pa.field("Content", pa.large_string()),
+        pa.field("whenScraped", pa.timestamp("s", tz="UTC")),
+        pa.field("ContentSource", _category),
+        pa.field("ContentHash", pa.string()),
+        pa.field("BlobHash", pa.string()),
+    ]
+)
+
+METADATA_COLUMNS = [name for name in SCHEMA.names if name != "Content"]
+
+_PARTITIONING = ds.partitioning(
+    pa.schema([SCHEMA.field(name) for name in PARTITION_COLUMNS]),
+    dictionaries={
+        "JurisdictionAbb": pa.array(list(JURISDICTIONS)),
+        "Type": pa.array(list(LEGISLATION_TYPES.values())),
+    },
+    flavor="hive",
+)
+
+
+def records_to_table(records: Sequence[LegislationRecord]) -> pa.Table:
+    columns = {name: [getattr(r, name) for r in records] for name in SCHEMA.names}
+    columns["Date"] = [date.fromisoformat(d) if d else None for d in columns["Date"]]
+    columns["whenScraped"] = [
+        datetime.fromisoformat(ts) if ts else None for ts in columns["whenScraped"]
+    ]
+    return pa.Table.from_pydict(columns, schema=SCHEMA)
+
+
+def write_table(table: pa.Table, root: "str | os.PathLike[str]") -> None:
+    """Append ``table`` to the partitioned dataset at ``root``."""
+    ds.write_dataset(
+        table,
+        root,
+        format="parquet",
+        partitioning=_PARTITIONING,
+        basename_template=f"part-{uuid.uuid4().hex}-{{i}}.parquet",
+        existing_data_behavior="overwrite_or_ignore",
+    )
+
+
+class ParquetWriter:
+    """Buffer records and append them to the dataset in row groups of ``batch_size``."""
+
+    def __init__(self, root: "str | os.PathLike[str]", batch_size: int = 2000) -> None:
+        self.root = root
+        self.batch_size = batch_size
+        self._buffer: list[LegislationRecord] = []
+
+    def write(self, record: LegislationRecord) -> None:
+        self._buffer.append(record)
+        if len(self._buffer) >= self.batch_size:
+            self.flush()
+
+    def flush(self) -> None:
+        if self._buffer:
+            write_table(records_to_table(self._buffer), self.root)
+            self._buffer = []
+
+    def close(self) -> None:
+        self.flush()
+
+    def __enter__(self) -> "ParquetWriter":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+
+def open_dataset(root: "str | os.PathLike[str]") -> ds.Dataset:
+    return ds.dataset(root, format="parquet", schema=SCHEMA, partitioning=_PARTITIONING)
+
+
+def committed_urls(root: "str | os.PathLike[str]") -> set[str]:
+    """URLs of records already written, for skipping on resume."""
+    if not os.path.isdir(root):
+        return set()
+    return set(open_dataset(root).to_table(columns=["URL"])["URL"].to_pylist())
+
+
+def _filter(
+    jurisdictions: Optional[Iterable[str]], types: Optional[Iterable[str]]
+) -> Optional[pc.Expression]:
+    expression = None
+    for column, values in (("JurisdictionAbb", jurisdictions), ("Type", types)):
+        if values:
+            clause = pc.field(column).isin(list(values))
+            expression = clause if expression is None else expression & clause
+    return expression
+
+
+def read_metadata(
+    root: "str | os.PathLike[str]",
+    jurisdictions: Optional[Iterable[str]] = None,
+    types: Optional[Iterable[str]] = None,
+) -> pa.Table:
+    """Read every column except ``Content``, pruning partitions by the filters."""
+    return open_dataset(root).to_table(
+        columns=METADATA_COLUMNS, filter=_filter(jurisdictions, types)
+    )
+
+
+def iter_records(
+    root: "str | os.PathLike[str]",
+    jurisdictions: Optional[Iterable[str]] = None,
+    types: Optional[Iterable[str]] = None,
+) -> Iterator[LegislationRecord]:
+    """Yield full records, one record batch at a time."""
+    dataset = open_dataset(root)
+    for batch in dataset.to_batches(filter=_filter(jurisdictions, types)):
+        for row in batch.to_pylist():
+            row["Date"] = row["Date"].isoformat() if row["Date"] else None
+            row["whenScraped"] = (
+                row["whenScraped"].isoformat(timespec="seconds") if row["whenScraped"] else ""
+            )
+            for name in ("ContentTypes", "DownloadURLs", "DownloadSizes"):
+                row[name] = row[name] or []
+            row["ContentSource"] = row["ContentSource"] or ""
+            row["ContentHash"] = row["ContentHash"] or ""
+            row["BlobHash"] = row["BlobHash"] or ""
+            yield LegislationRecord(**{name: row[name] for name in SCHEMA.names})
+
+
+# Unique document texts of a deduplicated dataset, keyed by ContentHash.
+TEXTS_SCHEMA = pa.schema(
+    [
+        pa.field("ContentHash", pa.string(), nullable=False),
+        pa.field("Content", pa.large_string(), nullable=False),
+    ]
+)
+
+
+class TextsWriter:
+    """Stream ``(ContentHash, Content)`` rows into a single Parquet file."""
+
+    def __init__(self, path: "str | os.PathLike[str]", batch_size: int = 500) -> None:
+        self.batch_size = batch_size
+        self._writer = pq.ParquetWriter(path, TEXTS_SCHEMA)
+        self._buffer: dict[str, list[str]] = {"ContentHash": [], "Content": []}
+
+    def write(self, content_hash: str, content: str) -> None:
+        self._buffer["ContentHash"].append(content_hash)
+        self._buffer["Content"].append(content)
+        if len(self._buffer["Content"]) >= self.batch_size:
+            self.flush()
+
+    def flush(self) -> None:
+        if self._buffer["Content"]:
+            self._writer.write_table(pa.Table.from_pydict(self._buffer, schema=TEXTS_SCHEMA))
+            self._buffer = {"ContentHash": [], "Content": []}
+
+    def close(self) -> None:
+        self.flush()
+        self._writer.close()
+
+    def __enter__(self) -> "TextsWriter":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+
+class TextsReader:
+    """Look texts up by ``ContentHash``, holding only a few row groups in memory.
+
+    Only the hash column is read up front, to find each text's row group;
+    :class:`TextsWriter` writes one row group per ``batch_size`` texts.
+    """
+
+    def __init__(self, path: "str | os.PathLike[str]", cached_groups: int = 4) -> None:
+        self._file = pq.ParquetFile(path)
+        self.cached_groups = cached_groups
+        self._groups: OrderedDict[int, dict[str, str]] = OrderedDict()
+        self._index: dict[str, int] = {}
+        for group in range(self._file.num_row_groups):
+            hashes = self._file.read_row_group(group, columns=["ContentHash"])["ContentHash"]
+            self._index.update(dict.fromkeys(hashes.to_pylist(), group))
+
+    def _group(self, group: int) -> dict[str, str]:
+        if group in self._groups:
+            self._groups.move_to_end(group)
+        else:
+            table = self._file.read_row_group(group)
+            self._groups[group] = dict(
+                zip(table["ContentHash"].to_pylist(), table["Content"].to_pylist())
+            )
+            if len(self._groups) > self.cached_groups:
+                self._groups.popitem(last=False)
+        return self._groups[group]
+
+    def get_many(self, hashes: Iterable[str]) -> dict[str, str]:
+        """The texts of those ``hashes`` the file holds."""
+        by_group: dict[int, list[str]] = {}
+        for digest in hashes:
+            if digest in self._index:
+                by_group.setdefault(self._index[digest], []).append(digest)
+        texts = {}
+        for group, digests in by_group.items():
+            rows = self._group(group)
+            texts.update((digest, rows[digest]) for digest in digests)
+        return texts
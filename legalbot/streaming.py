@@ -0,0 +1,183 @@
+"""Streaming extraction of legislation pages without building a DOM.
+
+The largest consolidated acts render as multi-megabyte HTML.  When they have
+no plain-text download, ``.the-document`` is the content, so instead of
+buffering the page and parsing it into a tree we feed the response body
+through an incremental tokenizer and keep only the rendered text.
+"""
+
+from __future__ import annotations
+
+from html.parser import HTMLParser
+from typing import Callable, Optional
+
+import httpx
+
+from .http import HostLimiter
+from .metrics import BYTES_RECEIVED, IN_FLIGHT
+from .parsers import BLOCK_TAGS, SKIP_TAGS, RawLink, TextJoiner
+
+
+def _has_class(attrs: list[tuple[str, Optional[str]]], name: str) -> bool:
+    for key, value in attrs:
+        if key == "class" and value and name in value.split():
+            return True
+    return False
+
+
+class _Region:
+    """Tracks nesting of a container element by counting its own tag name."""
+
+    def __init__(self, tag: str) -> None:
+        self.tag = tag
+        self.depth = 1
+
+    def start(self, tag: str) -> None:
+        if tag == self.tag:
+            self.depth += 1
+
+    def end(self, tag: str) -> bool:
+        """Return True when the container itself closes."""
+        if tag == self.tag:
+            self.depth -= 1
+        return self.depth == 0
+
+
+class StreamingPageParser(HTMLParser):
+    """Incrementally collect ``.side-download a`` links and ``.the-document`` text.
+
+    When the ``.side-download`` block closes, ``on_downloads`` (if given)
+    decides whether the document text is still wanted.  Without it, document
+    text stops accumulating once a plain-text download has been seen.
+    """
+
+    def __init__(
+        self,
+        collect_document: bool = True,
+        on_downloads: Optional[Callable[["StreamingPageParser"], bool]] = None,
+    ) -> None:
+        super().__init__(convert_charrefs=True)
+        self.on_downloads = on_downloads
+        self.downloads_complete = False
+        # Maintained by stream_page so on_downloads can weigh the unread remainder.
+        self.content_length: Optional[int] = None
+        self.bytes_read = 0
+        self.downloads: list[RawLink] = []
+        self.document = TextJoiner()
+        self.document_found = False
+        self.collect_document = collect_document
+        self._side: Optional[_Region] = None
+        self._doc: Optional[_Region] = None
+        self._href: Optional[str] = None
+        self._label: list[str] = []
+        self._skip = 0
+
+    @property
+    def can_stop(self) -> bool:
+        """True once nothing further in the page is needed."""
+        return self.downloads_complete and not self.collect_document
+
+    @property
+    def has_text_download(self) -> bool:
+        return any("plain text" in label.lower() for _, label in self.downloads)
+
+    def handle_starttag(self, tag: str, attrs: list[tuple[str, Optional[str]]]) -> None:
+        if tag in SKIP_TAGS:
+            self._skip += 1
+        if self._side is not None:
+            self._side.start(tag)
+            if tag == "a":
+                self._href = dict(attrs).get("href")
+                self._label = []
+        elif _has_class(attrs, "side-download"):
+            self._side = _Region(tag)
+
+        if self._doc is not None:
+            self._doc.start(tag)
+            if tag in BLOCK_TAGS:
+                self.document.break_line()
+        elif not self.document_found and _has_class(attrs, "the-document"):
+            self._doc = _Region(tag)
+            self.document_found = True
+
+    def handle_startendtag(self, tag: str, attrs: list[tuple[str, Optional[str]]]) -> None:
+        if self._doc is not None and tag in BLOCK_TAGS:
+            self.document.break_line()
+
+    def handle_endtag(self, tag: str) -> None:
+        if tag in SKIP_TAGS and self._skip:
+            self._skip -= 1
+        if self._side is not None:
+            if tag == "a" and self._href is not None:
+                label = " ".join("".join(self._label).split())
+                self.downloads.append((self._href, label))
+                self._href = None
+                if self.on_downloads is None and self.has_text_download:
+                    self.collect_document = False
+            if self._side.end(tag):
+                self._side = None
+                self.downloads_complete = True
+                if self.on_downloads is not None:
+                    self.collect_document = self.on_downloads(self)
+        if self._doc is not None:
+            if tag in BLOCK_TAGS:
+                self.document.break_line()
+            if self._doc.end(tag):
+                self.document.break_line()
+                self._doc = None
+
+    def handle_data(self, data: str) -> None:
+        if self._skip:
+            return
+        if self._href is not None:
+            self._label.append(data)
+        if self._doc is not None and self.collect_document:
+            self.document.add(data)
+
+    def close(self) -> None:
+        super().close()
+        self.document.break_line()
+
+    def document_text(self) -> Optional[str]:
+        if not self.document_found:
+            return None
+        return "\n".join(self.document.lines)
+
+
+async def stream_page(
+    client: httpx.AsyncClient,
+    limiter: HostLimiter,
+    url: str,
+    on_downloads: Optional[Callable[[StreamingPageParser], bool]] = None,
+    abort_threshold: int = 256 * 1024,
+    stage: str = "page",
+) -> StreamingPageParser:
+    """GET a legislation page, parsing the body as it arrives.
+
+    If ``on_downloads`` rules the document text out and more than
+    ``abort_threshold`` bytes remain (or the length is unknown), the
+    response is closed early; below that, draining the body to keep the
+    connection reusable is cheaper than a new one.
+    """
+    parser = StreamingPageParser(on_downloads=on_downloads)
+    async with limiter.slot(url) as permit:
+        with IN_FLIGHT.track(stage=stage):
+            async with client.stream("GET", url) as response:
+                permit.observe(response)
+                try:
+                    response.raise_for_status()
+                    length = response.headers.get("Content-Length")
+                    parser.content_length = int(length) if length and length.isdigit() else None
+                    async for chunk in response.aiter_text():
+                        parser.bytes_read = response.num_bytes_downloaded
+                        if parser.can_stop:
+                            if parser.content_length is None:
+                                break
+                            if parser.content_length - parser.bytes_read > abort_threshold:
+                                break
+                            continue
+                        parser.feed(chunk)
+                finally:
+                    BYTES_RECEIVED.inc(response.num_bytes_downloaded, stage=stage)
+    parser.close()
+    return parser
@@ -0,0 +1,282 @@
+"""One interface over tiktoken, SentencePiece and Hugging Face tokenizers.
+
+A tokenizer is named by a spec, ``backend:name``::
+
+    tiktoken:cl100k_base
+    sentencepiece:/models/legal.model
+    hf:BAAI/bge-small-en-v1.5@<revision>
+
+:func:`get_tokenizer` makes one :class:`Tokenizer` per spec per process, and
+a backend's library and vocabulary are loaded on first use, so a tokenizer
+that is never called costs nothing.  Every backend encodes and decodes in
+batches and reports each token's character offsets into its input.
+
+:class:`TokenCache` keeps encodings in SQLite keyed by tokenizer and the
+SHA-256 of the text; wrapped in a :class:`CachedTokenizer`, re-chunking a
+corpus after a small delta only tokenizes the texts that changed.
+"""
+
+from __future__ import annotations
+
+import functools
+import hashlib
+import itertools
+import os
+from dataclasses import dataclass
+from typing import TYPE_CHECKING, Optional, Sequence
+
+from .sqlitedb import connect, select_in, transaction
+
+if TYPE_CHECKING:
+    import numpy as np
+
+
+@dataclass
+class Encoding:
+    ids: list[int]
+    # Character offsets of each token's start and end in the encoded text.
+    offsets: list[tuple[int, int]]
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    @property
+    def starts(self) -> list[int]:
+        return [start for start, _ in self.offsets]
+
+
+def _byte_to_char(text: str) -> "Optional[np.ndarray]":
+    """Map each UTF-8 byte offset of ``text`` to its character offset; None if ASCII."""
+    if text.isascii():
+        return None
+    import numpy as np
+
+    data = np.frombuffer(text.encode("utf-8"), dtype=np.uint8)
+    # A continuation byte belongs to the character its lead byte started.
+    chars = np.cumsum((data & 0xC0) != 0x80) - 1
+    return np.append(chars, len(text))
+
+
+def _char_offsets(text: str, byte_offsets: list[tuple[int, int]]) -> list[tuple[int, int]]:
+    mapping = _byte_to_char(text)
+    if mapping is None:
+        return byte_offsets
+    return [(int(mapping[start]), int(mapping[end])) for start, end in byte_offsets]
+
+
+class Tokenizer:
+    """Batch encode/decode with offsets; subclasses wrap one backend."""
+
+    name: str
+
+    def encode_batch(self, texts: Sequence[str]) -> list[Encoding]:
+        raise NotImplementedError
+
+    def decode_batch(self, batch: Sequence[Sequence[int]]) -> list[str]:
+        raise NotImplementedError
+
+    def encode(self, text: str) -> Encoding:
+        return self.encode_batch([text])[0]
+
+    def decode(self, ids: Sequence[int]) -> str:
+        return self.decode_batch([ids])[0]
+
+    def count(self, text: str) -> int:
+        return len(self.encode(text))
+
+
+class TiktokenTokenizer(Tokenizer):
+    def __init__(self, encoding: str, threads: int = 4) -> None:
+        self.name = f"tiktoken:{encoding}"
+        self.encoding = encoding
+        self.threads = threads
+
+    @functools.cached_property
+    def _backend(self):
+        from .tokens import load_encoding
+
+        return load_encoding(self.encoding)
+
+    def encode_batch(self, texts: Sequence[str]) -> list[Encoding]:
+        backend = self._backend
+        batch = backend.encode_ordinary_batch(list(texts), num_threads=self.threads)
+        encodings = []
+        for text, ids in zip(texts, batch):
+            ends = list(itertools.accumulate(map(len, backend.decode_tokens_bytes(ids))))
+            offsets = list(zip([0] + ends[:-1], ends))
+            encodings.append(Encoding(ids, _char_offsets(text, offsets)))
+        return encodings
+
+    def decode_batch(self, batch: Sequence[Sequence[int]]) -> list[str]:
+        return self._backend.decode_batch([list(ids) for ids in batch], num_threads=self.threads)
+
+
+class SentencePieceTokenizer(Tokenizer):
+    def __init__(self, model_file: str) -> None:
+        self.name = f"sentencepiece:{model_file}"
+        self.model_file = model_file
+
+    @functools.cached_property
+    def _backend(self):
+        import sentencepiece
+
+        return sentencepiece.SentencePieceProcessor(model_file=self.model_file)
+
+    def encode_batch(self, texts: Sequence[str]) -> list[Encoding]:
+        protos = self._backend.encode(list(texts), out_type="immutable_proto")
+        encodings = []
+        for text, proto in zip(texts, protos):
+            # SentencePiece reports byte offsets into the input.
+            offsets = [(piece.begin, piece.end) for piece in proto.pieces]
+            ids = [piece.id for piece in proto.pieces]
+            encodings.append(Encoding(ids, _char_offsets(text, offsets)))
+        return encodings
+
+    def decode_batch(self, batch: Sequence[Sequence[int]]) -> list[str]:
+        return self._backend.decode([list(ids) for ids in batch])
+
+
+class HFTokenizer(Tokenizer):
+    """A Hugging Face fast tokenizer; slow ones cannot report offsets."""
+
+    def __init__(self, model: str, revision: Optional[str] = None) -> None:
+        self.name = f"hf:{model}" + (f"@{revision}" if revision else "")
+        self.model = model
+        self.revision = revision
+
+    @functools.cached_property
+    def _backend(self):
+        from transformers import AutoTokenizer
+
+        tokenizer = AutoTokenizer.from_pretrained(self.model, revision=self.revision, use_fast=True)
+        if not tokenizer.is_fast:
+            raise ValueError(f"{self.model} has no fast tokenizer, so no token offsets")
+        return tokenizer
+
+    def encode_batch(self, texts: Sequence[str]) -> list[Encoding]:
+        # Whole documents are longer than any model's input; only the
+        # embedding stage truncates, so the length warning is noise here.
+        out = self._backend(
+            list(texts),
+            add_special_tokens=False,
+            return_offsets_mapping=True,
+            return_attention_mask=False,
+            verbose=False,
+        )
+        return [
+            Encoding(list(ids), [tuple(offset) for offset in offsets])
+            for ids, offsets in zip(out["input_ids"], out["offset_mapping"])
+        ]
+
+    def decode_batch(self, batch: Sequence[Sequence[int]]) -> list[str]:
+        return self._backend.batch_decode([list(ids) for ids in batch])
+
+
+BACKENDS = ("tiktoken", "sentencepiece", "hf")
+
+
+@functools.lru_cache(maxsize=None)
+def get_tokenizer(spec: str) -> Tokenizer:
+    """The process-wide :class:`Tokenizer` for ``spec`` (see the module docstring)."""
+    backend, sep, name = spec.partition(":")
+    if not sep or not name:
+        raise ValueError(f"tokenizer spec must look like backend:name, not {spec!r}")
+    if backend == "tiktoken":
+        return TiktokenTokenizer(name)
+    if backend == "sentencepiece":
+        return SentencePieceTokenizer(name)
+    if backend == "hf":
+        model, _, revision = name.partition("@")
+        return HFTokenizer(model, revision or None)
+    raise ValueError(f"unknown tokenizer backend {backend!r}; expected one of {BACKENDS}")
+
+
+def text_hash(text: str) -> str:
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS encodings (
+    tokenizer   TEXT NOT NULL,
+    hash        TEXT NOT NULL,
+    ids         BLOB NOT NULL,
+    offsets     BLOB NOT NULL,
+    PRIMARY KEY (tokenizer, hash)
+);
+"""
+
+
+class TokenCache:
+    """SQLite store of :class:`Encoding` objects by ``(tokenizer, text hash)``."""
+
+    def __init__(self, path: "str | os.PathLike[str]", level: int = 3) -> None:
+        self._db = connect(path, _SCHEMA)
+        # Imported here so that chunking without a cache needs neither.
+        import zstandard
+
+        self._compressor = zstandard.ZstdCompressor(level=level)
+        self._decompressor = zstandard.ZstdDecompressor()
+        self.hits = 0
+        self.misses = 0
+
+    def close(self) -> None:
+        self._db.close()
+
+    def _pack(self, values: "list[int] | list[tuple[int, int]]") -> bytes:
+        import numpy as np
+
+        return self._compressor.compress(np.asarray(values, dtype=np.uint32).tobytes())
+
+    def _unpack(self, blob: bytes) -> "np.ndarray":
+        import numpy as np
+
+        return np.frombuffer(self._decompressor.decompress(blob), dtype=np.uint32)
+
+    def get_many(self, tokenizer: str, hashes: Sequence[str]) -> dict[str, Encoding]:
+        found: dict[str, Encoding] = {}
+        unique = list(dict.fromkeys(hashes))
+        rows = select_in(
+            self._db,
+            "SELECT hash, ids, offsets FROM encodings WHERE tokenizer = ? AND hash IN ({})",
+            (tokenizer,),
+            unique,
+        )
+        for digest, ids, offsets in rows:
+            pairs = self._unpack(offsets).reshape(-1, 2).tolist()
+            found[digest] = Encoding(self._unpack(ids).tolist(), [tuple(p) for p in pairs])
+        self.hits += len(found)
+        self.misses += len(unique) - len(found)
+        return found
+
+    def put_many(self, tokenizer: str, encodings: dict[str, Encoding]) -> None:
+        with transaction(self._db):
+            self._db.executemany(
+                "INSERT OR REPLACE INTO encodings (tokenizer, hash, ids, offsets)"
+                " VALUES (?, ?, ?, ?)",
+                [
+                    (tokenizer, digest, self._pack(enc.ids), self._pack(enc.offsets))
+                    for digest, enc in encodings.items()
+                ],
+            )
+
+
+class CachedTokenizer(Tokenizer):
+    """``tokenizer`` with encodings looked up in ``cache`` before being computed."""
+
+    def __init__(self, tokenizer: Tokenizer, cache: TokenCache) -> None:
+        self.name = tokenizer.name
+        self.tokenizer = tokenizer
+        self.cache = cache
+
+    def encode_batch(self, texts: Sequence[str]) -> list[Encoding]:
+        hashes = [text_hash(text) for text in texts]
+        known = self.cache.get_many(self.name, hashes)
+        missing = {digest: text for digest, text in zip(hashes, texts) if digest not in known}
+        if missing:
+            fresh = dict(zip(missing, self.tokenizer.encode_batch(list(missing.values()))))
+            self.cache.put_many(self.name, fresh)
+            known.update(fresh)
+        return [known[digest] for digest in hashes]
+
+    def decode_batch(self, batch: Sequence[Sequence[int]]) -> list[str]:
+        return self.tokenizer.decode_batch(batch)
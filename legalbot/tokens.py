@@ -0,0 +1,177 @@
+"""Token counts for every ``Content`` in a dataset, with tiktoken.
+
+Records are streamed from the dataset and their texts counted in batches by
+``Encoding.encode_ordinary_batch``, which runs tiktoken's Rust encoder on
+``threads`` threads outside the GIL, in each of ``processes`` worker
+processes.  A bounded number of batches is in flight at once, so memory
+stays flat however large the corpus, and results come back in dataset
+order.  A text is counted once however many records share it.
+
+tiktoken downloads an encoding's BPE ranks on first use and caches them
+under ``TIKTOKEN_CACHE_DIR``; an offline box needs that cache filled first.
+"""
+
+from __future__ import annotations
+
+import bisect
+import hashlib
+import os
+from collections import deque
+from concurrent.futures import Future, ProcessPoolExecutor
+from dataclasses import dataclass, field
+from typing import Iterable, Iterator, Optional
+
+from .models import LegislationRecord
+
+DEFAULT_ENCODING = "cl100k_base"
+
+# Lower edges of the histogram bins, in tokens.
+HISTOGRAM_EDGES = (0,) + tuple(2**n for n in range(8, 21))
+
+_encoding = None
+
+
+def load_encoding(name: str = DEFAULT_ENCODING):
+    import tiktoken
+
+    try:
+        return tiktoken.get_encoding(name)
+    except ValueError:
+        raise
+    except Exception as exc:
+        # The first use of an encoding downloads it; say so rather than
+        # surfacing a connection error from deep inside tiktoken.
+        raise RuntimeError(
+            f"could not load tiktoken encoding {name!r} ({exc}); on an offline machine, "
+            "point TIKTOKEN_CACHE_DIR at a cache that already holds it"
+        ) from exc
+
+
+def _init_worker(name: str) -> None:
+    global _encoding
+    _encoding = load_encoding(name)
+
+
+def _count_batch(texts: list[str], threads: int) -> list[int]:
+    assert _encoding is not None
+    return [len(tokens) for tokens in _encoding.encode_ordinary_batch(texts, num_threads=threads)]
+
+
+@dataclass
+class TokenHistogram:
+    """Distribution of per-document token counts."""
+
+    documents: int = 0
+    tokens: int = 0
+    max: int = 0
+    bins: list[int] = field(default_factory=lambda: [0] * len(HISTOGRAM_EDGES))
+
+    def add(self, tokens: int) -> None:
+        self.documents += 1
+        self.tokens += tokens
+        self.max = max(self.max, tokens)
+        self.bins[bisect.bisect_right(HISTOGRAM_EDGES, tokens) - 1] += 1
+
+    def to_dict(self) -> dict:
+        labels = [
+            f"{low}-{high - 1}" for low, high in zip(HISTOGRAM_EDGES, HISTOGRAM_EDGES[1:])
+        ] + [f"{HISTOGRAM_EDGES[-1]}+"]
+        return {
+            "documents": self.documents,
+            "tokens": self.tokens,
+            "mean": round(self.tokens / self.documents, 1) if self.documents else 0.0,
+            "max": self.max,
+            "bins": dict(zip(labels, self.bins)),
+        }
+
+
+class TokenCounter:
+    """Count tokens of record texts in batches across a process pool.
+
+    ``processes=1`` counts in this process, which avoids pickling texts to
+    workers and suits small datasets.
+    """
+
+    def __init__(
+        self,
+        encoding: str = DEFAULT_ENCODING,
+        processes: Optional[int] = None,
+        threads: int = 4,
+        batch_size: int = 64,
+    ) -> None:
+        self.encoding = encoding
+        self.processes = processes or os.cpu_count() or 1
+        self.threads = threads
+        self.batch_size = batch_size
+        self.histograms: dict[str, TokenHistogram] = {}
+        self.counted = 0
+        self.reused = 0
+        self._known: dict[str, int] = {}
+
+    def _batches(
+        self, records: Iterable[LegislationRecord]
+    ) -> Iterator[tuple[list[tuple[LegislationRecord, str]], dict[str, str]]]:
+        """Records with their text keys, and the texts each batch has to count."""
+        batch: list[tuple[LegislationRecord, str]] = []
+        pending: dict[str, str] = {}
+        queued: set[str] = set()
+        for record in records:
+            key = hashlib.sha256(record.Content.encode("utf-8")).hexdigest()
+            batch.append((record, key))
+            if key not in self._known and key not in queued:
+                pending[key] = record.Content
+                queued.add(key)
+            # Bound the records held back behind a batch of repeated texts too.
+            if len(pending) >= self.batch_size or len(batch) >= 8 * self.batch_size:
+                yield batch, pending
+                batch, pending = [], {}
+        if batch:
+            yield batch, pending
+
+    def _finish(
+        self, batch: list[tuple[LegislationRecord, str]], pending: dict[str, str], counts: list[int]
+    ) -> Iterator[tuple[LegislationRecord, int]]:
+        self._known.update(zip(pending, counts))
+        self.counted += len(pending)
+        self.reused += len(batch) - len(pending)
+        for record, key in batch:
+            tokens = self._known[key]
+            self.histograms.setdefault(record.JurisdictionAbb, TokenHistogram()).add(tokens)
+            yield record, tokens
+
+    def count(
+        self, records: Iterable[LegislationRecord]
+    ) -> Iterator[tuple[LegislationRecord, int]]:
+        """Yield ``(record, tokens)`` for every record, in order."""
+        # Fail here, not in every worker, when the encoding cannot be loaded.
+        _init_worker(self.encoding)
+        if self.processes == 1:
+            for batch, pending in self._batches(records):
+                counts = _count_batch(list(pending.values()), self.threads)
+                yield from self._finish(batch, pending, counts)
+            return
+        window: deque[tuple[list, dict, Future]] = deque()
+        with ProcessPoolExecutor(
+            self.processes, initializer=_init_worker, initargs=(self.encoding,)
+        ) as pool:
+            for batch, pending in self._batches(records):
+                future = pool.submit(_count_batch, list(pending.values()), self.threads)
+                window.append((batch, pending, future))
+                if len(window) >= 2 * self.processes:
+                    batch, pending, future = window.popleft()
+                    yield from self._finish(batch, pending, future.result())
+            while window:
+                batch, pending, future = window.popleft()
+                yield from self._finish(batch, pending, future.result())
+
+    def report(self) -> dict:
+        """Per-jurisdiction histograms, plus one over the whole dataset under ``"ALL"``."""
+        overall = TokenHistogram()
+        for histogram in self.histograms.values():
+            overall.documents += histogram.documents
+            overall.tokens += histogram.tokens
+            overall.max = max(overall.max, histogram.max)
+            overall.bins = [a + b for a, b in zip(overall.bins, histogram.bins)]
+        report = {name: self.histograms[name].to_dict() for name in sorted(self.histograms)}
+        report["ALL"] = overall.to_dict()
+        return report
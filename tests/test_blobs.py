@@ -0,0 +1,77 @@
+import json
+import tempfile
+import unittest
+from pathlib import Path
+from unittest import mock
+
+from legalbot.blobs import BlobStore, reextract
+from legalbot.formats import HTML_SOURCE
+from legalbot.incremental import iter_contents
+from legalbot.models import IndexLink, LegislationRecord
+
+HTML = '<html><body><div class="the-document"><p>Page text</p></div></body></html>'
+RTF = r"{\rtf1\ansi{\fonttbl{\f0 Times;}}\f0 Section 1\par Caf\'e9 rules\par}"
+
+
+def _record(number: int, source: str, blob_hash: str) -> LegislationRecord:
+    url = f"https://www.austlii.edu.au/au/legis/cth/consol_act/a{number}/"
+    record = LegislationRecord.from_link(IndexLink("CTH", "act", url, f"Act {number}"))
+    record.ContentSource = source
+    record.BlobHash = blob_hash
+    return record
+
+
+class BlobStoreTest(unittest.TestCase):
+    def setUp(self) -> None:
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.root = Path(tmp.name)
+        self.store = BlobStore(self.root / "blobs")
+
+    def test_round_trip_stores_each_body_once(self):
+        digest = self.store.put_text("Größe — text")
+        self.assertEqual(self.store.put_text("Größe — text"), digest)
+        self.assertEqual((self.store.stored, self.store.reused), (1, 1))
+        self.assertIn(digest, self.store)
+        self.assertEqual(self.store.get_text(digest), "Größe — text")
+        self.assertEqual(self.store.path(digest).parent.name, digest[:2])
+
+    def test_failed_put_leaves_no_blob(self):
+        with mock.patch("legalbot.blobs.os.replace", side_effect=OSError("disk full")):
+            with self.assertRaises(OSError):
+                self.store.put(b"body")
+        self.assertEqual(list(self.store.root.rglob("*.tmp")), [])
+        digest = self.store.put(b"body")
+        self.assertEqual(self.store.get(digest, verify=True), b"body")
+        self.assertEqual(self.store.stored, 1)
+
+    def test_corrupt_blob_fails_verification(self):
+        digest = self.store.put(b"original")
+        # A blob replaced by another body still decompresses, but not to its hash.
+        self.store.path(digest).write_bytes(self.store._compressor().compress(b"tampered"))
+        self.assertEqual(self.store.get(digest), b"tampered")
+        with self.assertRaises(ValueError):
+            self.store.get(digest, verify=True)
+
+    def test_reextract_fills_content_from_bodies(self):
+        records = [
+            _record(1, "RTF", self.store.put_text(RTF)),
+            _record(2, HTML_SOURCE, self.store.put_text(HTML)),
+            _record(3, "Text", ""),
+        ]
+        records[2].Content = "kept"
+        contents = [record.Content for record in reextract(records, self.store)]
+        self.assertEqual(contents, ["Section 1\nCafé rules", "Page text", "kept"])
+
+    def test_blob_only_dataset_needs_the_store(self):
+        path = self.root / "dataset.jsonl"
+        record = _record(1, "Text", self.store.put_text("Blob text"))
+        path.write_text(json.dumps(record.to_dict()) + "\n", encoding="utf-8")
+        with self.assertRaises(ValueError):
+            list(iter_contents(str(path)))
+        (read,) = iter_contents(str(path), str(self.store.root))
+        self.assertEqual(read.Content, "Blob text")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,47 @@
+import tempfile
+import unittest
+from pathlib import Path
+from unittest import mock
+
+from legalbot.cache import CacheEntry, HttpCache
+
+URL = "https://www.austlii.edu.au/au/legis/cth/consol_act/a1/"
+
+
+def _entry(body: bytes, etag: str) -> CacheEntry:
+    return CacheEntry(URL, etag, "Mon, 01 Jan 2024 00:00:00 GMT", "utf-8", body)
+
+
+class HttpCacheTest(unittest.TestCase):
+    def setUp(self) -> None:
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.root = Path(tmp.name)
+        self.cache = HttpCache(self.root)
+
+    def files(self) -> list[str]:
+        return sorted(path.suffix for path in self.root.rglob("*") if path.is_file())
+
+    def test_round_trip(self):
+        entry = _entry("Größe".encode("utf-8"), '"v1"')
+        self.cache.store(entry)
+        self.assertEqual(self.cache.load(URL), entry)
+        self.assertIsNone(self.cache.load(URL + "other"))
+
+    def test_failed_write_keeps_previous_entry(self):
+        self.cache.store(_entry(b"old", '"v1"'))
+        with mock.patch("legalbot.cache.os.replace", side_effect=OSError("disk full")):
+            with self.assertRaises(OSError):
+                self.cache.store(_entry(b"new", '"v2"'))
+        self.assertEqual(self.cache.load(URL), _entry(b"old", '"v1"'))
+        self.assertEqual(self.files(), [".body", ".json"])
+
+    def test_truncated_metadata_is_a_miss(self):
+        self.cache.store(_entry(b"body", '"v1"'))
+        meta_path, _ = self.cache._paths(URL)
+        meta_path.write_bytes(meta_path.read_bytes()[:10])
+        self.assertIsNone(self.cache.load(URL))
+
+
+if __name__ == "__main__":
+    unittest.main()
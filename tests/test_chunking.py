@@ -0,0 +1,49 @@
+import unittest
+from pathlib import Path
+
+from legalbot.chunking import approx_tokens, chunk_text
+from legalbot.parsing import extract_document_text
+
+FIXTURE = Path(__file__).resolve().parent.parent / "benchmarks" / "fixtures" / "document.html"
+
+
+def _section(number: int, words: int) -> str:
+    body = " ".join(f"word{i}" for i in range(words))
+    return f"{number} Section {number}\n(1) {body}.\n"
+
+
+class ChunkTextTest(unittest.TestCase):
+    def assert_chunks(self, text: str, max_tokens: int) -> list:
+        chunks = chunk_text(text, "u", max_tokens)
+        self.assertEqual("".join(chunk.text for chunk in chunks), text)
+        for chunk in chunks:
+            self.assertLessEqual(chunk.tokens, max_tokens, chunk.text[:80])
+            self.assertEqual(chunk.tokens, approx_tokens(chunk.text))
+        return chunks
+
+    def test_heading_merge_respects_budget(self):
+        # The section alone fills the budget, so the Part and Division
+        # headings carried into it would overflow it.
+        section = _section(1, 250)
+        max_tokens = approx_tokens(section)
+        text = "PART 1--PRELIMINARY\nDivision 1--Introduction\n" + section + _section(2, 10)
+        chunks = self.assert_chunks(text, max_tokens)
+        self.assertTrue(chunks[0].text.startswith("PART 1--PRELIMINARY\n"))
+
+    def test_headings_carried_into_next_section(self):
+        text = "PART 1--PRELIMINARY\nDivision 1--Introduction\n" + _section(1, 20)
+        chunks = self.assert_chunks(text, 512)
+        self.assertEqual(len(chunks), 1)
+        self.assertEqual(
+            chunks[0].path, ["PART 1--PRELIMINARY", "Division 1--Introduction", "1 Section 1"]
+        )
+
+    def test_fixture_at_most_max_tokens(self):
+        text = extract_document_text(FIXTURE.read_text(encoding="utf-8"))
+        for max_tokens in (32, 64, 128, 256, 512):
+            with self.subTest(max_tokens=max_tokens):
+                self.assert_chunks(text, max_tokens)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,98 @@
+import tempfile
+import unittest
+from pathlib import Path
+from typing import Iterator
+
+from legalbot.dedup import Deduplicator, content_hash, deduplicate, iter_deduplicated
+from legalbot.models import IndexLink, LegislationRecord
+from legalbot.storage.parquet import TextsReader, TextsWriter
+
+
+def _record(number: int, content: str, type_: str = "act") -> LegislationRecord:
+    url = f"https://www.austlii.edu.au/au/legis/cth/consol_{type_}/a{number}/"
+    record = LegislationRecord.from_link(IndexLink("CTH", type_, url, f"Act {number}"))
+    record.Content = content
+    return record
+
+
+def _words(start: int, count: int) -> str:
+    return " ".join(f"word{i}" for i in range(start, start + count))
+
+
+class DeduplicatorTest(unittest.TestCase):
+    def test_hash_ignores_whitespace_and_line_endings(self):
+        self.assertEqual(
+            content_hash("Section 1\r\n  Text\u00a0here "), content_hash("Section 1\nText here")
+        )
+        self.assertNotEqual(content_hash("Section 1"), content_hash("Section 2"))
+
+    def test_exact_duplicates_share_a_hash(self):
+        dedup = Deduplicator()
+        first, copy, other = _record(1, "Same text"), _record(2, "Same  text\r\n"), _record(3, "x")
+        self.assertEqual([dedup.assign(r) for r in (first, copy, other)], [True, False, True])
+        self.assertEqual(first.ContentHash, copy.ContentHash)
+        self.assertEqual((dedup.stats.unique, dedup.stats.exact_duplicates), (2, 1))
+
+    def test_near_duplicates_fold_only_when_enabled(self):
+        body = _words(0, 400)
+        original = _record(1, "Reprint 1 " + body)
+        reprint = _record(2, "Reprint 2 " + body)
+        unrelated = _record(3, _words(1000, 400))
+        dedup = Deduplicator(near_threshold=0.8)
+        self.assertEqual(
+            [dedup.assign(r) for r in (original, reprint, unrelated)], [True, False, True]
+        )
+        self.assertEqual(reprint.ContentHash, original.ContentHash)
+        self.assertEqual(dedup.stats.near_duplicates, 1)
+        self.assertTrue(Deduplicator().assign(_record(2, "Reprint 2 " + body)))
+
+
+class DeduplicateRoundTripTest(unittest.TestCase):
+    def setUp(self) -> None:
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.root = Path(tmp.name)
+
+    def test_round_trip(self):
+        records = [
+            _record(1, "Shared text"),
+            _record(1, "Shared text", "reg"),
+            _record(2, "Other text"),
+            _record(3, ""),
+        ]
+        expected = {(r.URL, r.Content) for r in records}
+        stats = deduplicate(records, self.root)
+        self.assertEqual((stats.records, stats.unique, stats.exact_duplicates), (4, 2, 1))
+        restored = list(iter_deduplicated(self.root, batch_size=2))
+        self.assertEqual({(r.URL, r.Content) for r in restored}, expected)
+
+    def test_interrupted_run_leaves_consistent_output(self):
+        def records() -> Iterator[LegislationRecord]:
+            for number in range(5):
+                yield _record(number, f"Text {number}")
+            raise KeyboardInterrupt
+
+        with self.assertRaises(KeyboardInterrupt):
+            deduplicate(records(), self.root)
+        restored = list(iter_deduplicated(self.root))
+        # Whatever was written reads back with its text.
+        self.assertTrue(restored)
+        for record in restored:
+            self.assertEqual(record.Content, f"Text {record.Title.split()[-1]}")
+
+
+class TextsTest(unittest.TestCase):
+    def test_lookup_across_row_groups(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = Path(tmp) / "texts.parquet"
+            texts = {f"h{i}": f"text {i}" for i in range(10)}
+            with TextsWriter(path, batch_size=3) as writer:
+                for digest, text in texts.items():
+                    writer.write(digest, text)
+            reader = TextsReader(path, cached_groups=1)
+            self.assertEqual(reader.get_many(list(texts) + ["unknown"]), texts)
+            self.assertEqual(len(reader._groups), 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,68 @@
+import tempfile
+import unittest
+from pathlib import Path
+
+from legalbot.models import IndexLink, LegislationRecord
+from legalbot.storage.jsonl import ShardedJsonlWriter, committed_urls, iter_records, read_checkpoint
+
+
+def _record(number: int) -> LegislationRecord:
+    url = f"https://www.austlii.edu.au/au/legis/cth/consol_act/a{number}/"
+    record = LegislationRecord.from_link(IndexLink("CTH", "act", url, f"Act {number}"))
+    record.Content = f"Section {number}\nÉtat — text {number}"
+    return record
+
+
+class ShardedJsonlTest(unittest.TestCase):
+    def setUp(self) -> None:
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.root = Path(tmp.name)
+
+    def urls(self) -> list[str]:
+        return [record.URL for record in iter_records(self.root)]
+
+    def test_round_trip_across_shards(self):
+        records = [_record(number) for number in range(7)]
+        with ShardedJsonlWriter(self.root, checkpoint_every=2, shard_records=4) as writer:
+            for record in records:
+                writer.write(record)
+        self.assertEqual(list(iter_records(self.root)), records)
+        self.assertEqual(len(list(self.root.glob("shard-*.jsonl.gz"))), 2)
+        self.assertEqual(read_checkpoint(self.root)["records"], 7)
+
+    def test_partial_tail_is_ignored_then_truncated(self):
+        writer = ShardedJsonlWriter(self.root, checkpoint_every=2)
+        for number in range(3):
+            writer.write(_record(number))
+        # The third record is still buffered; a crash mid-append leaves a
+        # torn gzip member after the checkpointed offset.
+        shard = self.root / "shard-00000.jsonl.gz"
+        with open(shard, "ab") as fh:
+            fh.write(b"\x1f\x8b\x08\x00garbage")
+        expected = [_record(0).URL, _record(1).URL]
+        self.assertEqual(self.urls(), expected)
+        self.assertEqual(committed_urls(self.root), set(expected))
+
+        with self.assertLogs("legalbot.storage.jsonl", "WARNING"):
+            resumed = ShardedJsonlWriter(self.root, checkpoint_every=2)
+        with resumed:
+            self.assertEqual(shard.stat().st_size, read_checkpoint(self.root)["offset"])
+            resumed.write(_record(2))
+        self.assertEqual(self.urls(), expected + [_record(2).URL])
+
+    def test_shards_past_the_checkpoint_are_dropped(self):
+        with ShardedJsonlWriter(self.root, checkpoint_every=1, shard_records=1) as writer:
+            writer.write(_record(0))
+        stray = self.root / "shard-00001.jsonl.gz"
+        stray.write_bytes(b"uncommitted")
+        ShardedJsonlWriter(self.root).close()
+        self.assertFalse(stray.exists())
+        self.assertEqual(self.urls(), [_record(0).URL])
+
+    def test_no_checkpoint_reads_nothing(self):
+        self.assertEqual(self.urls(), [])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,52 @@
+import tempfile
+import unittest
+from pathlib import Path
+
+from legalbot.models import IndexLink, LegislationRecord
+from legalbot.storage.parquet import ParquetWriter, committed_urls, iter_records, read_metadata
+
+
+def _record(number: int, abb: str = "CTH", type_: str = "act") -> LegislationRecord:
+    url = f"https://www.austlii.edu.au/au/legis/{abb.lower()}/consol_{type_}/a{number}/"
+    record = LegislationRecord.from_link(IndexLink(abb, type_, url, f"Act {number}"))
+    record.Date = "2024-03-01"
+    record.ContentTypes = ["Plain text (ASCII)"]
+    record.DownloadURLs = [url + "a.txt"]
+    record.DownloadSizes = ["1.5 KB"]
+    record.Content = f"Section {number}\nÉtat — text {number}"
+    record.whenScraped = "2024-03-02T10:00:00+00:00"
+    record.ContentSource = "Plain text (ASCII)"
+    return record
+
+
+class ParquetDatasetTest(unittest.TestCase):
+    def setUp(self) -> None:
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.root = Path(tmp.name) / "dataset"
+
+    def test_round_trip(self):
+        records = [_record(1), _record(2, "NSW"), _record(3, "NSW", "reg")]
+        with ParquetWriter(self.root, batch_size=2) as writer:
+            for record in records:
+                writer.write(record)
+        by_url = {record.URL: record for record in iter_records(self.root)}
+        self.assertEqual(by_url, {record.URL: record for record in records})
+        filtered = iter_records(self.root, jurisdictions=["NSW"], types=["Secondary"])
+        self.assertEqual([record.URL for record in filtered], [records[2].URL])
+        metadata = read_metadata(self.root, jurisdictions=["NSW"])
+        self.assertNotIn("Content", metadata.column_names)
+        self.assertEqual(metadata.num_rows, 2)
+
+    def test_unflushed_records_are_not_committed(self):
+        # A crash before close loses the buffer; resume must not skip it.
+        writer = ParquetWriter(self.root, batch_size=2)
+        records = [_record(number) for number in range(3)]
+        for record in records:
+            writer.write(record)
+        self.assertEqual(committed_urls(self.root), {records[0].URL, records[1].URL})
+        self.assertEqual(committed_urls(self.root / "missing"), set())
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,37 @@
+import asyncio
+import unittest
+
+import httpx
+
+from legalbot.politeness import AdaptiveLimiter
+
+URL = "http://host.test/page"
+
+
+class AdaptiveLimiterTest(unittest.TestCase):
+    def run_requests(self, limiter: AdaptiveLimiter, count: int) -> None:
+        async def request() -> None:
+            async with limiter.slot(URL) as permit:
+                await asyncio.sleep(0.002)
+                permit.observe(httpx.Response(200))
+
+        async def run() -> None:
+            await asyncio.gather(*(request() for _ in range(count)))
+
+        asyncio.run(run())
+
+    def test_window_grows_while_full(self):
+        limiter = AdaptiveLimiter(per_host=2, max_per_host=32)
+        self.run_requests(limiter, 100)
+        self.assertGreater(limiter.limit(URL), 2)
+
+    def test_crawl_delay_does_not_grow_window(self):
+        # One request starts per delay, so the window is never actually full.
+        limiter = AdaptiveLimiter(per_host=4, max_per_host=32)
+        limiter.set_crawl_delay(URL, 0.01)
+        self.run_requests(limiter, 60)
+        self.assertEqual(limiter.limit(URL), 4)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,97 @@
+import asyncio
+import tempfile
+import unittest
+from pathlib import Path
+from typing import Optional
+
+import httpx
+
+from legalbot.retry import DeadLetterQueue, Retrier, RetryPolicy, error_class
+
+URL = "https://www.austlii.edu.au/au/legis/cth/consol_act/a1/"
+
+
+def _status_error(status: int, headers: Optional[dict] = None) -> httpx.HTTPStatusError:
+    request = httpx.Request("GET", URL)
+    response = httpx.Response(status, headers=headers, request=request)
+    return httpx.HTTPStatusError(f"{status}", request=request, response=response)
+
+
+class RetrierTest(unittest.TestCase):
+    def test_error_classes(self):
+        self.assertEqual(error_class(_status_error(429)), "throttled")
+        self.assertEqual(error_class(_status_error(503)), "throttled")
+        self.assertEqual(error_class(_status_error(500)), "server")
+        self.assertEqual(error_class(_status_error(404)), "client")
+        self.assertEqual(error_class(httpx.ReadTimeout("slow")), "timeout")
+        self.assertEqual(error_class(httpx.ConnectError("refused")), "network")
+        self.assertEqual(error_class(ValueError("unparseable")), "other")
+
+    def test_delay_gives_up_and_honours_retry_after(self):
+        retrier = Retrier(
+            {"throttled": RetryPolicy(attempts=3, max_delay=1.0), "other": RetryPolicy()}
+        )
+        exc = _status_error(429, {"Retry-After": "30"})
+        self.assertEqual(retrier.delay(exc, 1), 30.0)
+        self.assertIsNone(retrier.delay(exc, 3))
+        self.assertIsNone(retrier.delay(ValueError("bad"), 1))
+
+    def test_drain_waits_for_retries_scheduled_by_retries(self):
+        retrier = Retrier()
+        calls = []
+
+        async def attempt() -> None:
+            calls.append(len(calls))
+            if len(calls) < 3:
+                retrier.schedule("page", 0, attempt)
+
+        async def run() -> None:
+            retrier.schedule("page", 0, attempt)
+            await retrier.drain("page")
+
+        asyncio.run(run())
+        self.assertEqual(calls, [0, 1, 2])
+
+
+class DeadLetterQueueTest(unittest.TestCase):
+    def setUp(self) -> None:
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.path = Path(tmp.name) / "dead.jsonl"
+        self.queue = DeadLetterQueue(self.path)
+
+    def add(self, url: str) -> None:
+        self.queue.add("page", url, _status_error(500), 4, {"link": {"url": url}})
+
+    def test_round_trip(self):
+        self.add(URL)
+        (letter,) = list(self.queue)
+        self.assertEqual((letter.stage, letter.url, letter.attempts), ("page", URL, 4))
+        self.assertEqual(letter.error_class, "server")
+        self.assertEqual(letter.payload, {"link": {"url": URL}})
+
+    def test_torn_entry_is_skipped(self):
+        self.add(URL)
+        # A crash mid-append leaves half an entry with no newline.
+        with open(self.path, "ab") as fh:
+            fh.write(b'{"stage": "page", "url": "https://')
+        self.add(URL + "2")
+        with self.assertLogs("legalbot.retry", "WARNING"):
+            urls = [letter.url for letter in self.queue]
+        self.assertEqual(urls, [URL, URL + "2"])
+
+    def test_interrupted_replay_is_offered_again(self):
+        self.add(URL)
+        with self.assertRaises(KeyboardInterrupt):
+            with self.queue.replay() as letters:
+                self.assertEqual([letter.url for letter in letters], [URL])
+                raise KeyboardInterrupt
+        self.add(URL + "2")
+        with self.queue.replay() as letters:
+            self.assertEqual([letter.url for letter in letters], [URL, URL + "2"])
+        with self.queue.replay() as letters:
+            self.assertEqual(letters, [])
+
+
+if __name__ == "__main__":
+    unittest.main()
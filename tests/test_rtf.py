@@ -0,0 +1,32 @@
+import unittest
+
+from legalbot.rtf import rtf_to_text
+
+
+class RtfToTextTest(unittest.TestCase):
+    def test_field_keeps_result_drops_instruction(self):
+        rtf = (
+            r"{\rtf1 See {\field{\*\fldinst HYPERLINK "
+            r'"http://www.austlii.edu.au/au/legis/cth/consol_act/a1/s5.html"}'
+            r"{\fldrslt section 5}} of the Act.\par}"
+        )
+        self.assertEqual(rtf_to_text(rtf), "See section 5 of the Act.")
+
+    def test_field_result_with_formatting(self):
+        rtf = r"{\rtf1 {\field{\*\fldinst PAGEREF s12}{\fldrslt {\b\i 12}}}\par}"
+        self.assertEqual(rtf_to_text(rtf), "12")
+
+    def test_skipped_destinations(self):
+        rtf = (
+            r"{\rtf1{\fonttbl{\f0 Times;}}{\colortbl;\red0\green0\blue0;}"
+            r"{\*\generator Word;}Body\par}"
+        )
+        self.assertEqual(rtf_to_text(rtf), "Body")
+
+    def test_escapes(self):
+        rtf = r"{\rtf1\uc1 caf\'e9 \u8212? \ldblquote x\rdblquote\par}"
+        self.assertEqual(rtf_to_text(rtf), "café — “x”")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,46 @@
+import asyncio
+import unittest
+from unittest import mock
+
+from legalbot.scheduler import ByteRateLimiter
+
+
+class FakeClock:
+    def __init__(self) -> None:
+        self.now = 0.0
+        self.slept: list[float] = []
+
+    def monotonic(self) -> float:
+        return self.now
+
+    async def sleep(self, seconds: float) -> None:
+        self.slept.append(seconds)
+        self.now += seconds
+
+
+class ByteRateLimiterTest(unittest.TestCase):
+    def run_with_clock(self, steps):
+        clock = FakeClock()
+        with mock.patch("legalbot.scheduler.time.monotonic", clock.monotonic), mock.patch(
+            "legalbot.scheduler.asyncio.sleep", clock.sleep
+        ):
+            limiter = ByteRateLimiter(1000, burst=1000)
+            for nbytes in steps:
+                asyncio.run(limiter.acquire(nbytes))
+        return clock.slept
+
+    def test_waits_for_its_own_size(self):
+        # 1000 bytes empty the bucket; 500 more take half a second to refill.
+        self.assertEqual(self.run_with_clock([1000, 500]), [0.5])
+
+    def test_oversized_waits_for_full_bucket_then_owes(self):
+        slept = self.run_with_clock([1, 5000, 1])
+        # A near-full bucket is topped up first, not admitted with 999 bytes...
+        self.assertAlmostEqual(slept[0], 0.001)
+        # ...and the 4000-byte debt is repaid before the next byte.
+        self.assertAlmostEqual(slept[1], 4.001)
+        self.assertEqual(len(slept), 2)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,65 @@
+import unittest
+
+import numpy as np
+
+from legalbot.scheduler import DEFAULT_SIZE, DownloadOrder, sort_by_order
+from legalbot.sizes import MISSING, parse_sizes, size_bytes
+
+SAMPLES = [
+    "86.4 KB",
+    "146 KB",
+    "2.12 KB",
+    "512 B",
+    "1.5 MB",
+    "1 GB",
+    "1,024 KB",
+    "86.4kb",
+    "Plain text (ASCII) (2.12 KB)",
+    "RTF format (1,234.5 KB)",
+    "PDF format (146 KB)",
+    # Malformed or missing: all -1.
+    "1.2.3 KB",
+    ". KB",
+    ".5 KB",
+    "1. KB",
+    "KB",
+    "",
+    "n/a",
+    None,
+]
+
+
+class SizeParsingTest(unittest.TestCase):
+    def test_known_values(self):
+        self.assertEqual(size_bytes("86.4 KB"), round(86.4 * 1024))
+        self.assertEqual(size_bytes("Plain text (ASCII) (2.12 KB)"), round(2.12 * 1024))
+        self.assertEqual(size_bytes("1,024 KB"), 1024 * 1024)
+        self.assertEqual(size_bytes("1.2.3 KB"), MISSING)
+        self.assertEqual(size_bytes(". KB"), MISSING)
+
+    def test_vector_matches_scalar(self):
+        expected = np.array([size_bytes(value) for value in SAMPLES], dtype=np.int64)
+        np.testing.assert_array_equal(parse_sizes(SAMPLES), expected)
+
+    def test_vector_accepts_arrow_dictionary(self):
+        import pyarrow as pa
+
+        column = pa.array(SAMPLES, pa.string()).dictionary_encode()
+        expected = [size_bytes(value) for value in SAMPLES]
+        self.assertEqual(parse_sizes(column).tolist(), expected)
+
+
+class SortByOrderTest(unittest.TestCase):
+    def test_orders_by_parsed_size(self):
+        items = ["10 KB", None, "2 MB", "1 KB", "64 KB"]
+        largest = sort_by_order(items, DownloadOrder.LARGEST_FIRST, lambda item: item)
+        # An unsized item counts as DEFAULT_SIZE (64 KB); ties keep input order.
+        self.assertEqual(DEFAULT_SIZE, 64 * 1024)
+        self.assertEqual(largest, ["2 MB", None, "64 KB", "10 KB", "1 KB"])
+        smallest = sort_by_order(items, DownloadOrder.SMALLEST_FIRST, lambda item: item)
+        self.assertEqual(smallest, ["1 KB", "10 KB", None, "64 KB", "2 MB"])
+        self.assertEqual(sort_by_order(items, DownloadOrder.FIFO, lambda item: item), items)
+
+
+if __name__ == "__main__":
+    unittest.main()